@@ -1,3 +1,5 @@
+import sys
+
 import pygame
 from pygame.locals import *
 from OpenGL.GL import *
@@ -20,6 +22,11 @@ glDisable(GL_CULL_FACE)
 rend = Renderer(screen)
 rend.pointLight = glm.vec3(2, 2, 2)
 
+# El profiler viene apagado; --profile lo prende desde el arranque (con eventos por draw)
+if "--profile" in sys.argv:
+    rend.profiler.enabled = True
+    rend.profiler.perDraw = True
+
 currVertexShader = vertex_shader
 currFragmentShader = fragment_shader
 rend.SetShaders(currVertexShader, currFragmentShader)
@@ -41,32 +48,6 @@ nijntjeModel.rotation = glm.vec3(0.0, 180.0, 0.0)
 
 rend.scene.append(nijntjeModel)
 
-fragment_shaders = [
-    ("Phong", fragment_shader),
-    ("Toon", toon_shader),
-    ("Rainbow", rainbow_shader),
-    ("Holographic", holographic_shader),
-    ("Glitch", glitch_shader),
-    ("X-Ray", xray_shader),
-    ("Fire", fire_shader),
-    ("Wireframe", wireframe_shader),
-    ("Matrix", matrix_shader),
-    ("Disco", disco_shader),
-]
-
-vertex_shaders = [
-    ("Default", vertex_shader),
-    ("Water", water_shader),
-    ("Twist", twist_shader),
-    ("Pulse", pulse_shader),
-    ("Explode", explode_shader),
-    ("Jelly", jelly_shader),
-    ("Spikes", spike_shader),
-    ("Melt", melt_shader),
-    ("Fat", fat_shader),
-    ("Glitch", glitch_vertex_shader),
-]
-
 current_frag_idx = 0
 current_vert_idx = 0
 rotating = True
@@ -96,6 +77,8 @@ print(",/.: Siguiente/Anterior Vertex")
 print("ESPACIO: Pausar rotación")
 print("Flechas: Mover cámara")
 print("WASD: Mover luz")
+print("Click: Seleccionar modelo")
+print("P: Perfil + overlay | T: Grabar / exportar traza (trace.json)")
 print("F: Wireframe | I: Info | ESC: Salir\n")
 
 isRunning = True
@@ -103,76 +86,106 @@ isRunning = True
 while isRunning:
     deltaTime = clock.tick(60) / 1000
     rend.elapsedTime += deltaTime
-    keys = pygame.key.get_pressed()
+    rend.profiler.BeginFrame()
+    with rend.profiler.Scope("input"):
+        keys = pygame.key.get_pressed()
 
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
-            isRunning = False
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                isRunning = False
             
-        elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_f:
-                rend.ToggleFilledMode()
-            elif event.key == pygame.K_SPACE:
-                rotating = not rotating
-            elif event.key == pygame.K_i:
-                print(f"\nFrame: {frame} | FPS: {clock.get_fps():.1f}")
-                print(f"Fragment: {fragment_shaders[current_frag_idx][0]}")
-                print(f"Vertex: {vertex_shaders[current_vert_idx][0]}")
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                picked = rend.Pick(*event.pos)
+                print(f"Click: {type(picked).__name__} en {tuple(round(c, 2) for c in picked.position)}"
+                      if picked else "Click: nada")
+
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_f:
+                    rend.ToggleFilledMode()
+                elif event.key == pygame.K_SPACE:
+                    rotating = not rotating
+                elif event.key == pygame.K_i:
+                    print(f"\nFrame: {frame} | FPS: {clock.get_fps():.1f}")
+                    print(f"Uniforms: {rend.frameStats}")
+                    print(f"Fragment: {fragment_shaders[current_frag_idx][0]}")
+                    print(f"Vertex: {vertex_shaders[current_vert_idx][0]}")
+                    print(f"Texturas: {len(rend.assets.timings)} listas, {rend.assets.Pending()} pendientes")
+                    rend.assets.Report()
+                    rend.profiler.Report()
+                elif event.key == pygame.K_p:
+                    rend.showProfiler = not rend.showProfiler
+                    rend.profiler.enabled = rend.showProfiler or rend.profiler.perDraw
+                elif event.key == pygame.K_t:
+                    if rend.profiler.perDraw:
+                        rend.profiler.ExportChromeTrace("trace.json")
+                        rend.profiler.perDraw = False
+                        rend.profiler.enabled = rend.showProfiler
+                    else:
+                        rend.profiler.enabled = rend.profiler.perDraw = True
+                        print("Grabando traza (T de nuevo para exportar)")
             
-            elif event.key == pygame.K_n:
-                change_fragment_shader(current_frag_idx + 1)
-            elif event.key == pygame.K_m:
-                change_fragment_shader(current_frag_idx - 1)
+                elif event.key == pygame.K_n:
+                    change_fragment_shader(current_frag_idx + 1)
+                elif event.key == pygame.K_m:
+                    change_fragment_shader(current_frag_idx - 1)
             
-            elif event.key == pygame.K_COMMA:
-                change_vertex_shader(current_vert_idx - 1)
-            elif event.key == pygame.K_PERIOD:
-                change_vertex_shader(current_vert_idx + 1)
+                elif event.key == pygame.K_COMMA:
+                    change_vertex_shader(current_vert_idx - 1)
+                elif event.key == pygame.K_PERIOD:
+                    change_vertex_shader(current_vert_idx + 1)
             
-            elif keys[K_LSHIFT] or keys[K_RSHIFT]:
-                if event.key == pygame.K_1:   change_vertex_shader(0)
-                elif event.key == pygame.K_2: change_vertex_shader(1)
-                elif event.key == pygame.K_3: change_vertex_shader(2)
-                elif event.key == pygame.K_4: change_vertex_shader(3)
-                elif event.key == pygame.K_5: change_vertex_shader(4)
-                elif event.key == pygame.K_6: change_vertex_shader(5)
-                elif event.key == pygame.K_7: change_vertex_shader(6)
-                elif event.key == pygame.K_8: change_vertex_shader(7)
-                elif event.key == pygame.K_9: change_vertex_shader(8)
-                elif event.key == pygame.K_0: change_vertex_shader(9)
-            else:
-                if event.key == pygame.K_1:   change_fragment_shader(0)
-                elif event.key == pygame.K_2: change_fragment_shader(1)
-                elif event.key == pygame.K_3: change_fragment_shader(2)
-                elif event.key == pygame.K_4: change_fragment_shader(3)
-                elif event.key == pygame.K_5: change_fragment_shader(4)
-                elif event.key == pygame.K_6: change_fragment_shader(5)
-                elif event.key == pygame.K_7: change_fragment_shader(6)
-                elif event.key == pygame.K_8: change_fragment_shader(7)
-                elif event.key == pygame.K_9: change_fragment_shader(8)
-                elif event.key == pygame.K_0: change_fragment_shader(9)
-
-    cam_speed = 3.0
-    if keys[K_UP]:      rend.camera.position.z += cam_speed * deltaTime
-    if keys[K_DOWN]:    rend.camera.position.z -= cam_speed * deltaTime
-    if keys[K_RIGHT]:   rend.camera.position.x += cam_speed * deltaTime
-    if keys[K_LEFT]:    rend.camera.position.x -= cam_speed * deltaTime
-    if keys[K_PAGEUP]:  rend.camera.position.y += cam_speed * deltaTime
-    if keys[K_PAGEDOWN]:rend.camera.position.y -= cam_speed * deltaTime
-
-    light_speed = 5.0
-    if keys[K_w]: rend.pointLight.z -= light_speed * deltaTime
-    if keys[K_s]: rend.pointLight.z += light_speed * deltaTime
-    if keys[K_a]: rend.pointLight.x -= light_speed * deltaTime
-    if keys[K_d]: rend.pointLight.x += light_speed * deltaTime
-    if keys[K_q]: rend.pointLight.y -= light_speed * deltaTime
-    if keys[K_e]: rend.pointLight.y += light_speed * deltaTime
+                elif keys[K_LSHIFT] or keys[K_RSHIFT]:
+                    if event.key == pygame.K_1:   change_vertex_shader(0)
+                    elif event.key == pygame.K_2: change_vertex_shader(1)
+                    elif event.key == pygame.K_3: change_vertex_shader(2)
+                    elif event.key == pygame.K_4: change_vertex_shader(3)
+                    elif event.key == pygame.K_5: change_vertex_shader(4)
+                    elif event.key == pygame.K_6: change_vertex_shader(5)
+                    elif event.key == pygame.K_7: change_vertex_shader(6)
+                    elif event.key == pygame.K_8: change_vertex_shader(7)
+                    elif event.key == pygame.K_9: change_vertex_shader(8)
+                    elif event.key == pygame.K_0: change_vertex_shader(9)
+                else:
+                    if event.key == pygame.K_1:   change_fragment_shader(0)
+                    elif event.key == pygame.K_2: change_fragment_shader(1)
+                    elif event.key == pygame.K_3: change_fragment_shader(2)
+                    elif event.key == pygame.K_4: change_fragment_shader(3)
+                    elif event.key == pygame.K_5: change_fragment_shader(4)
+                    elif event.key == pygame.K_6: change_fragment_shader(5)
+                    elif event.key == pygame.K_7: change_fragment_shader(6)
+                    elif event.key == pygame.K_8: change_fragment_shader(7)
+                    elif event.key == pygame.K_9: change_fragment_shader(8)
+                    elif event.key == pygame.K_0: change_fragment_shader(9)
+
+        cam_speed = 3.0
+        if keys[K_UP]:      rend.camera.position.z += cam_speed * deltaTime
+        if keys[K_DOWN]:    rend.camera.position.z -= cam_speed * deltaTime
+        if keys[K_RIGHT]:   rend.camera.position.x += cam_speed * deltaTime
+        if keys[K_LEFT]:    rend.camera.position.x -= cam_speed * deltaTime
+        if keys[K_PAGEUP]:  rend.camera.position.y += cam_speed * deltaTime
+        if keys[K_PAGEDOWN]:rend.camera.position.y -= cam_speed * deltaTime
+
+        light_speed = 5.0
+        if keys[K_w]: rend.pointLight.z -= light_speed * deltaTime
+        if keys[K_s]: rend.pointLight.z += light_speed * deltaTime
+        if keys[K_a]: rend.pointLight.x -= light_speed * deltaTime
+        if keys[K_d]: rend.pointLight.x += light_speed * deltaTime
+        if keys[K_q]: rend.pointLight.y -= light_speed * deltaTime
+        if keys[K_e]: rend.pointLight.y += light_speed * deltaTime
 
     if rotating:
         nijntjeModel.rotation.y += 30 * deltaTime
 
     rend.Render()
-    pygame.display.flip()
+    with rend.profiler.Scope("flip"):
+        pygame.display.flip()
+    rend.profiler.EndFrame(rend.frameStats)
+
+    # Con el primer frame ya en pantalla, precompilar el resto de combinaciones
+    # entre frames para que cambiar de shader sea instantáneo
+    if frame == 0:
+        rend.WarmUpShaders([(v, f) for _, v in vertex_shaders for _, f in fragment_shaders])
     frame += 1
 
+rend.assets.Shutdown()
 pygame.quit()
\ No newline at end of file
@@ -0,0 +1,405 @@
+"""
+Carga asíncrona de texturas.
+
+Los JPEG se decodifican en un ThreadPoolExecutor mientras el hilo
+principal sigue dibujando. Cada textura existe en GL desde el primer
+momento con un texel 1x1 de relleno (placeholder); cuando la
+decodificación termina, Update() -- llamado una vez por frame desde el
+hilo del contexto GL -- copia los píxeles a un PBO
+(GL_PIXEL_UNPACK_BUFFER) y los pasa a la textura en bandas de filas,
+repartidas entre frames: cada paso llena una banda del PBO y la sube, así
+ningún frame paga la copia de la imagen entera. Las bandas van a una
+textura de paso; el id que devuelven LoadTexture2D / LoadCubemap (el del
+Skybox) no cambia y sigue mostrando el relleno hasta que la imagen está
+completa (mips incluidos, y en el cubemap las seis caras): entonces se
+copia de una vez con glCopyImageSubData y la de paso se borra. Las
+texturas de los modelos van por texturemanager: Model.textures guarda
+TextureHandles cuyo `array` sí cambia (relleno -> array real, o al
+crecer el array), así que se consulta al dibujar.
+
+Si texcompress.py generó un .dds al día para la imagen (y el driver
+soporta el formato) se lee ese archivo en lugar de decodificar el JPEG y
+se sube con glCompressedTexImage2D, mips incluidos.
+
+`timings` guarda por asset los milisegundos de decodificación y subida.
+"""
+
+import ctypes
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pygame
+from OpenGL.GL import *
+
+# El wrapper de PyOpenGL calcula el tamaño desde un array; con PBO hay que pasar un offset
+from OpenGL.raw.GL.VERSION.GL_1_3 import glCompressedTexImage2D as _glCompressedTexImage2D
+
+import texcompress
+
+PLACEHOLDER_RGBA  = bytes((128, 128, 128, 255))
+UPLOAD_BAND_BYTES = 4 << 20        # bytes por glTexSubImage2D
+
+
+class AssetLoader(object):
+    def __init__(self, workers: int = None, uploadBudget: float = 0.004):
+        # Un núcleo queda para el hilo de render
+        if workers is None:
+            workers = max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asset")
+        self.uploadBudget = uploadBudget
+        self.useCompressed = True   # preferir los .dds de texcompress.py cuando existan
+
+        self._jobs = []             # _Job en orden de pedido
+        self.timings = {}           # path -> {"decode_ms", "upload_ms", "ready_ms", "bytes"}
+
+    # -------------------- API pública ------------------------
+    def LoadTexture2D(self, path, texture=None):
+        """Id de textura 2D utilizable ya (placeholder); la imagen llega con Update()"""
+        if texture is None:
+            texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, texture)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, 1, 1, 0, GL_RGBA, GL_UNSIGNED_BYTE, PLACEHOLDER_RGBA)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        def upload(image):
+            staging = glGenTextures(1)
+            if isinstance(image, texcompress.CompressedImage):
+                # Mipmaps ya vienen en el .dds
+                yield from _UploadCompressed(GL_TEXTURE_2D, staging, GL_TEXTURE_2D, image)
+            else:
+                yield from _UploadFromPBO(GL_TEXTURE_2D, staging, GL_TEXTURE_2D, GL_RGBA, 4, image)
+                glBindTexture(GL_TEXTURE_2D, staging)
+                glGenerateMipmap(GL_TEXTURE_2D)
+                glBindTexture(GL_TEXTURE_2D, 0)
+            _CopyTexture(GL_TEXTURE_2D, staging, texture, (GL_TEXTURE_2D,))
+            glDeleteTextures(1, [staging])
+
+        self.LoadImage(path, upload, "RGBA")
+        return texture
+
+    def LoadCubemap(self, faces, texture=None):
+        """Cubemap con las 6 caras en orden +X -X +Y -Y +Z -Z; cada cara se sube al llegar"""
+        if texture is None:
+            texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_CUBE_MAP, texture)
+        for i in range(len(faces)):
+            glTexImage2D(GL_TEXTURE_CUBE_MAP_POSITIVE_X + i, 0, GL_RGB, 1, 1, 0,
+                         GL_RGB, GL_UNSIGNED_BYTE, PLACEHOLDER_RGBA[:3])
+        glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_R, GL_CLAMP_TO_EDGE)
+        glBindTexture(GL_TEXTURE_CUBE_MAP, 0)
+
+        # Las caras llegan a un cubemap de paso; el público sigue completo
+        # (relleno 1x1) hasta que llega la última y se copian las seis juntas.
+        # Si una cara falla el cubemap se queda con el relleno.
+        staging = glGenTextures(1)
+        targets = tuple(GL_TEXTURE_CUBE_MAP_POSITIVE_X + i for i in range(len(faces)))
+        remaining = [len(faces)]
+        for i, path in enumerate(faces):
+            def upload(image, target=targets[i]):
+                if isinstance(image, texcompress.CompressedImage):
+                    yield from _UploadCompressed(GL_TEXTURE_CUBE_MAP, staging, target, image)
+                else:
+                    yield from _UploadFromPBO(GL_TEXTURE_CUBE_MAP, staging, target, GL_RGB, 3, image)
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    _CopyTexture(GL_TEXTURE_CUBE_MAP, staging, texture, targets)
+                    glDeleteTextures(1, [staging])
+
+            self.LoadImage(path, upload, "RGB")
+        return texture
+
+    def LoadImage(self, path, upload, fmt="RGBA", digest=False):
+        """
+        Decodifica `path` (o lee su .dds) en segundo plano. `upload` es un
+        generador que recibe (ancho, alto, bytes) o un CompressedImage y
+        hace la subida a GL en pasos, desde Update(). Con digest=True el
+        worker calcula además el sha1 del archivo y `upload` lo recibe como
+        segundo argumento (así el hilo de render no lee el archivo).
+        """
+        dds = self._FindCompressed(path)
+        if dds is not None:
+            self._Submit(path, texcompress.read_dds, (dds,), upload, digest)
+        else:
+            self._Submit(path, _DecodeImage, (path, fmt), upload, digest)
+
+    def Update(self, budget=None):
+        """Avanza subidas (por bandas de filas) hasta gastar `budget` segundos; devuelve cuántas faltan"""
+        budget = self.uploadBudget if budget is None else budget
+        start = time.perf_counter()
+        for job in list(self._jobs):
+            if time.perf_counter() - start >= budget:
+                break
+            if not job.future.done():
+                continue
+            while time.perf_counter() - start < budget:
+                if job.Step():
+                    self._Finish(job)
+                    break
+        return len(self._jobs)
+
+    def Wait(self):
+        """Bloquea hasta que todo lo pedido esté decodificado y subido"""
+        while self._jobs:
+            job = self._jobs[0]
+            while not job.Step():
+                pass
+            self._Finish(job)
+
+    def Pending(self):
+        return len(self._jobs)
+
+    def Report(self):
+        for path, t in self.timings.items():
+            print(f"  {path}: decode {t['decode_ms']:.1f} ms, upload {t['upload_ms']:.1f} ms, "
+                  f"listo a los {t['ready_ms']:.0f} ms ({t['bytes'] / 2**20:.1f} MB)")
+
+    def Shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # -------------------- Interno ------------------------
+    def _FindCompressed(self, path):
+        """.dds al día de `path` (texcompress) si el driver soporta su formato"""
+        if not self.useCompressed:
+            return None
+        dds = texcompress.find_compressed(path)
+        if dds is None:
+            return None
+        try:
+            with open(dds, "rb") as f:
+                fourCC = f.read(88)[84:88]
+        except OSError:
+            return None
+        fmt = next((v[2] for v in texcompress.FORMATS.values() if v[0] == fourCC), None)
+        if fmt is None or fmt not in _CompressedFormats():
+            return None
+        return dds
+
+    def _Submit(self, path, decode, args, upload, digest=False):
+        if digest:
+            future = self.executor.submit(_Timed, _WithDigest, path, decode, *args)
+        else:
+            future = self.executor.submit(_Timed, decode, *args)
+        self._jobs.append(_Job(future, upload, path, digest))
+
+    def _Finish(self, job):
+        self._jobs.remove(job)
+        if job.error is not None:
+            print(f"✗ Error cargando {job.path}: {job.error}")
+            return
+        self.timings[job.path] = {"decode_ms": job.decodeTime * 1e3,
+                                  "upload_ms": job.uploadTime * 1e3,
+                                  "ready_ms":  (time.perf_counter() - job.t0) * 1e3,
+                                  "bytes":     job.nbytes}
+
+
+class _Job(object):
+    """Decodificación en curso + su subida como generador (un paso por banda)"""
+
+    def __init__(self, future, upload, path, digest=False):
+        self.future, self.upload, self.path = future, upload, path
+        self.digest = digest
+        self.t0 = time.perf_counter()
+        self.steps = None
+        self.error = None
+        self.decodeTime = self.uploadTime = 0.0
+        self.nbytes = 0
+
+    def Step(self):
+        """Un paso de subida (bloquea si la decodificación no terminó); True al acabar"""
+        if self.steps is None:
+            try:
+                image, self.decodeTime = self.future.result()
+            except Exception as e:
+                self.error = e
+                return True
+            args = image if self.digest else (image,)
+            image = args[0]
+            self.nbytes = len(image.data) if isinstance(image, texcompress.CompressedImage) else len(image[2])
+            self.steps = self.upload(*args)
+
+        t = time.perf_counter()
+        done = next(self.steps, StopIteration) is StopIteration
+        self.uploadTime += time.perf_counter() - t
+        return done
+
+
+def _Timed(fn, *args):
+    t = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t
+
+
+def _WithDigest(path, decode, *args):
+    """(decode(*args), sha1 del archivo `path`) -- corre en el worker"""
+    return decode(*args), FileDigest(path)
+
+
+def FileDigest(path):
+    """sha1 (hex) del contenido de `path`, leído de a 1 MB"""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _DecodeImage(path, fmt):
+    """(ancho, alto, bytes) en el orden de filas que usaba la carga síncrona"""
+    surf = pygame.image.load(path)
+    return surf.get_width(), surf.get_height(), pygame.image.tostring(surf, fmt, False)
+
+
+def CreatePBO(size):
+    """PBO (GL_PIXEL_UNPACK_BUFFER) de `size` bytes sin datos; el llamador lo borra"""
+    pbo = glGenBuffers(1)
+    glBindBuffer(GL_PIXEL_UNPACK_BUFFER, pbo)
+    glBufferData(GL_PIXEL_UNPACK_BUFFER, size, None, GL_STREAM_DRAW)
+    glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+    return pbo
+
+
+def FillPBO(pbo, data, offset, size):
+    """Copia data[offset:offset + size] (bytes o array) al mismo rango del PBO"""
+    src = data.reshape(-1).view(np.uint8) if isinstance(data, np.ndarray) else np.frombuffer(data, np.uint8)
+    glBindBuffer(GL_PIXEL_UNPACK_BUFFER, pbo)
+    ptr = glMapBufferRange(GL_PIXEL_UNPACK_BUFFER, offset, size,
+                           GL_MAP_WRITE_BIT | GL_MAP_INVALIDATE_RANGE_BIT)
+    ctypes.memmove(ptr, src.ctypes.data + offset, size)
+    glUnmapBuffer(GL_PIXEL_UNPACK_BUFFER)
+    glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+
+
+def StagePBO(data, bandBytes=UPLOAD_BAND_BYTES):
+    """
+    Generador: PBO con una copia de `data`, llenado de a `bandBytes` por
+    paso (así una imagen grande no hace un memmove de decenas de MB en un
+    solo frame). Devuelve el PBO: `pbo = yield from StagePBO(data)`.
+    """
+    size = len(data)
+    pbo = CreatePBO(size)
+    for offset in range(0, size, bandBytes):
+        FillPBO(pbo, data, offset, min(bandBytes, size - offset))
+        yield
+    return pbo
+
+
+def _UploadFromPBO(bindTarget, texture, target, fmt, bpp, image, bandBytes=UPLOAD_BAND_BYTES):
+    """
+    Generador: pasa los píxeles a la textura en bandas de filas; cada paso
+    copia una banda al PBO y la sube con glTexSubImage2D, cediendo entre
+    banda y banda para no bloquear un frame entero con una imagen grande.
+    """
+    w, h, pixels = image
+    pbo = CreatePBO(len(pixels))
+
+    # Reserva del tamaño final (sin datos)
+    glBindTexture(bindTarget, texture)
+    glTexImage2D(target, 0, fmt, w, h, 0, fmt, GL_UNSIGNED_BYTE, None)
+    glBindTexture(bindTarget, 0)
+    yield
+
+    rows = max(1, bandBytes // (w * bpp))
+    for y in range(0, h, rows):
+        band = min(rows, h - y)
+        FillPBO(pbo, pixels, y * w * bpp, band * w * bpp)
+        glBindTexture(bindTarget, texture)
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, pbo)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)     # filas de tostring sin padding
+        glTexSubImage2D(target, 0, 0, y, w, band, fmt, GL_UNSIGNED_BYTE,
+                        ctypes.c_void_p(y * w * bpp))
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+        glBindTexture(bindTarget, 0)
+        yield
+
+    glDeleteBuffers(1, [pbo])
+
+
+def _CopyTexture(bindTarget, src, dst, targets):
+    """
+    Reemplaza `dst` por una copia de `src` (todos los niveles; en un cubemap
+    las caras de `targets`) en un solo paso: quien muestrea `dst` pasa del
+    contenido anterior al nuevo sin ver nunca la textura a medio llenar.
+    """
+    glBindTexture(bindTarget, src)
+    levels = []
+    while True:
+        level = len(levels)
+        w = glGetTexLevelParameteriv(targets[0], level, GL_TEXTURE_WIDTH)
+        if w == 0:
+            break
+        h = glGetTexLevelParameteriv(targets[0], level, GL_TEXTURE_HEIGHT)
+        internal = glGetTexLevelParameteriv(targets[0], level, GL_TEXTURE_INTERNAL_FORMAT)
+        size = 0
+        if glGetTexLevelParameteriv(targets[0], level, GL_TEXTURE_COMPRESSED):
+            size = glGetTexLevelParameteriv(targets[0], level, GL_TEXTURE_COMPRESSED_IMAGE_SIZE)
+        levels.append((w, h, internal, size))
+    # glCopyImageSubData exige texturas completas: src no tiene más niveles que estos
+    glTexParameteri(bindTarget, GL_TEXTURE_MAX_LEVEL, len(levels) - 1)
+
+    # Reserva con el formato de src (sin datos) y copia en GPU
+    glBindTexture(bindTarget, dst)
+    for level, (w, h, internal, size) in enumerate(levels):
+        for target in targets:
+            if size:
+                _glCompressedTexImage2D(target, level, internal, w, h, 0, size, None)
+            else:
+                glTexImage2D(target, level, internal, w, h, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+    glTexParameteri(bindTarget, GL_TEXTURE_MAX_LEVEL, len(levels) - 1)
+    glBindTexture(bindTarget, 0)
+
+    for level, (w, h, _, _) in enumerate(levels):
+        glCopyImageSubData(src, bindTarget, level, 0, 0, 0,
+                           dst, bindTarget, level, 0, 0, 0, w, h, len(targets))
+
+
+def _UploadCompressed(bindTarget, texture, target, image):
+    """Generador: todos los niveles de un CompressedImage vía PBO + glCompressedTexImage2D"""
+    pbo = yield from StagePBO(image.data)
+
+    glBindTexture(bindTarget, texture)
+    glBindBuffer(GL_PIXEL_UNPACK_BUFFER, pbo)
+    for level, (w, h, offset, size) in enumerate(image.levels):
+        _glCompressedTexImage2D(target, level, image.glFormat, w, h, 0, size, ctypes.c_void_p(offset))
+    glTexParameteri(bindTarget, GL_TEXTURE_MAX_LEVEL, len(image.levels) - 1)
+    glBindTexture(bindTarget, 0)
+
+    glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+    glDeleteBuffers(1, [pbo])
+
+
+_compressed_formats = None
+
+
+def _CompressedFormats():
+    """Formatos comprimidos que acepta el driver (se consulta una vez)"""
+    global _compressed_formats
+    if _compressed_formats is None:
+        try:
+            n = glGetIntegerv(GL_NUM_COMPRESSED_TEXTURE_FORMATS)
+            _compressed_formats = set(int(f) for f in glGetIntegerv(GL_COMPRESSED_TEXTURE_FORMATS)) if n else set()
+        except Exception:
+            _compressed_formats = set()
+    return _compressed_formats
+
+
+# Loader compartido (se crea con el primer uso, cuando ya hay contexto GL)
+_default_loader = None
+
+
+def GetLoader():
+    global _default_loader
+    if _default_loader is None:
+        _default_loader = AssetLoader()
+    return _default_loader
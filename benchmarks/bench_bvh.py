@@ -0,0 +1,136 @@
+"""
+Consultas espaciales con SceneBVH frente a recorrer toda la escena
+(escaneo lineal vectorizado sobre las mismas cajas). Uso:
+
+    python benchmarks/bench_bvh.py [--counts 1000 10000 100000] [--queries Q] [--repeat R]
+
+Escena sintética (sin contexto GL): N objetos de una esfera unitaria con
+posición, rotación y escala aleatorias en un TransformStore, densidad
+constante. Se mide construcción, refit tras mover el 1% de los objetos y
+Q consultas de frustum, rayo (picking) y radio; cada consulta se compara
+con el resultado del escaneo lineal.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import glm
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bvh import SceneBVH, _BoxDistance2, _RaySlab  # noqa: E402
+from culling import AABBsInFrustum, FrustumPlanes, WorldAABBs  # noqa: E402
+from transforms import TransformStore  # noqa: E402
+
+
+def make_scene(n, rng):
+    store = TransformStore(capacity=n)
+    side = 8.0 * n ** (1.0 / 3.0)
+    store.count = n
+    store.alive[:n] = True
+    store.positions[:n] = rng.uniform(-side, side, (n, 3))
+    store.rotations[:n] = rng.uniform(0.0, 360.0, (n, 3))
+    store.scales[:n] = rng.uniform(0.5, 2.0, (n, 3))
+    store.SetBounds(np.arange(n), np.full((n, 3), -0.75), np.full((n, 3), 0.75))
+    store.MarkDirty()
+    store.Update()
+    return store, side
+
+
+def cameras(q, side, rng):
+    proj = glm.perspective(glm.radians(60.0), 16 / 9, 0.1, 1000.0)
+    for _ in range(q):
+        eye = glm.vec3(*rng.uniform(-side, side, 3))
+        target = glm.vec3(*rng.uniform(-side, side, 3))
+        yield proj * glm.lookAt(eye, target, glm.vec3(0, 1, 0))
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def run_queries(queries, fn):
+    return [fn(q) for q in queries]
+
+
+def bench(n, q, repeat, rng):
+    store, side = make_scene(n, rng)
+    slots = np.arange(n)
+
+    t_build, tree = best_of(lambda: _built(store, slots), repeat)
+
+    # Mover el 1% y refit
+    moved = rng.choice(n, max(1, n // 100), replace=False)
+    store.positions[moved] += rng.uniform(-2.0, 2.0, (len(moved), 3)).astype(np.float32)
+    store.MarkDirty(moved)
+    t0 = time.perf_counter()
+    refitted = tree.Refit()
+    t_refit = time.perf_counter() - t0
+
+    # Lineal: mismas cajas en mundo, todas contra la consulta
+    centers, extents = WorldAABBs(store, slots)
+    mins, maxs = centers - extents, centers + extents
+
+    frusta = list(cameras(q, side, rng))
+    rays = [(rng.uniform(-side, side, 3), _unit(rng.normal(size=3))) for _ in range(q)]
+    spheres = [(rng.uniform(-side, side, 3), 10.0) for _ in range(q)]
+
+    def lin_frustum(vp):
+        return np.flatnonzero(AABBsInFrustum(FrustumPlanes(vp), centers, extents))
+
+    def lin_ray(r):
+        near, far = _RaySlab(mins, maxs, r[0], 1.0 / np.where(np.abs(r[1]) > 1e-12, r[1], 1e-12))
+        return np.flatnonzero((near <= far) & (far >= 0.0))
+
+    def lin_radius(s):
+        return np.flatnonzero(_BoxDistance2(mins, maxs, s[0]) <= s[1] ** 2)
+
+    rows = [("frustum", frusta, lin_frustum, tree.QueryFrustum),
+            ("ray",     rays,    lin_ray,     lambda r: np.sort(tree.QueryRay(*r)[0])),
+            ("radius",  spheres, lin_radius,  lambda s: tree.QueryRadius(*s))]
+
+    print(f"N={n:>7}  build={t_build * 1e3:8.1f} ms  refit({refitted} movidos)={t_refit * 1e3:7.2f} ms")
+    for name, queries, linear, query in rows:
+        t_lin, ref = best_of(lambda: run_queries(queries, linear), repeat)
+        t_bvh, got = best_of(lambda: run_queries(queries, query), repeat)
+        ok = all(np.array_equal(a, b) for a, b in zip(ref, got))
+        hits = sum(len(r) for r in ref) / max(len(ref), 1)
+        print(f"    {name:<8} hits/consulta={hits:9.1f}  lineal={t_lin / q * 1e3:8.3f} ms  "
+              f"bvh={t_bvh / q * 1e3:8.3f} ms  x{t_lin / max(t_bvh, 1e-9):6.1f}  "
+              f"{'OK' if ok else 'MISMATCH'}")
+
+
+def _built(store, slots):
+    tree = SceneBVH(store)
+    tree.Build(slots, slots)
+    return tree
+
+
+def _unit(v):
+    return (v / np.linalg.norm(v)).astype(np.float32)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--counts", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for n in args.counts:
+        bench(n, args.queries, args.repeat, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Mide el pico de memoria de la carga de un OBJ y falla si:
+
+- el empaquetado de vértices (Model.PackObj) supera --limit veces el
+  tamaño final del VBO + EBO;
+- la carga completa (Obj + PackObj, lo que hace Model sin caché) supera
+  --load-limit veces el VBO + EBO, más la memoria fija de un bloque de
+  parseo (BLOCK_ALLOWANCE).
+
+    python benchmarks/bench_memory.py [archivo.obj ...] [--grid N] [--limit 2.0] [--load-limit 6.0]
+
+El objetivo de 2x VBO se cumple para PackObj pero NO para la carga
+completa. Obj parsea por bloques (obj.CHUNK_BYTES), así que el texto y
+las tablas por línea ya no escalan con el archivo, y las normales
+calculadas se acumulan por bloques de triángulos. Pero Obj conserva las
+tablas crudas (vertices / texCoords / normals / faces) junto a los
+vértices únicos, y solo eso ya ocupa ~2.6x el VBO. La deduplicación de
+esquinas (un argsort sobre una clave int64 por esquina) suma otro ~2.5x.
+Con la grilla de 300x300 y con 500k triángulos sin normales, el pico
+queda en ~5.5x el VBO; --load-limit 6.0 evita que eso empeore. Para
+quedar por debajo de 2x hay que cargar con stream=True (streaming.Meshlets),
+cuyo pico depende del tamaño de bloque y no del archivo.
+
+Los picos se miden con tracemalloc (NumPy reporta sus buffers), así que
+no dependen de lo que el proceso ya tuviera reservado.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from obj import Obj  # noqa: E402
+from model import Model  # noqa: E402
+import streaming  # noqa: E402
+from bench_obj import write_grid_obj  # noqa: E402
+
+
+# Memoria de trabajo de un bloque de texto (obj.CHUNK_BYTES) o de normales
+# (obj.NORMAL_BLOCK triángulos): fija, se suma al límite de la carga completa
+# para que las mallas chicas no fallen por ella
+BLOCK_ALLOWANCE = 8 << 20
+
+
+def measure(fn):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, result
+
+
+def measure_load(path):
+    """(pico del parseo, pico propio de PackObj, pico de toda la carga, resultado de PackObj)"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    objFile = Obj(path)
+    retained, parse_peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    packed = Model.PackObj(objFile)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return parse_peak, peak - retained, max(parse_peak, peak), packed
+
+
+def bench(path, limit, loadLimit):
+    parse_peak, pack_peak, load_peak, packed = measure_load(path)
+    stream_peak, _ = measure(lambda: sum(1 for _ in streaming.Meshlets(path)))
+
+    data, indices = packed[0], packed[1]
+    gpu_bytes = data.nbytes + indices.nbytes
+    ratio = pack_peak / max(gpu_bytes, 1)
+    load_ratio = load_peak / max(gpu_bytes, 1)
+    ok = ratio <= limit and load_peak <= loadLimit * gpu_bytes + BLOCK_ALLOWANCE
+    print(f"{Path(path).name:<24} VBO+EBO={gpu_bytes / 2**20:8.2f} MB  "
+          f"pack peak={pack_peak / 2**20:8.2f} MB (x{ratio:4.2f} VBO)  "
+          f"parse peak={parse_peak / 2**20:8.2f} MB  "
+          f"load peak={load_peak / 2**20:8.2f} MB (x{load_ratio:4.2f} VBO)  "
+          f"stream peak={stream_peak / 2**20:8.2f} MB  {'OK' if ok else 'FAIL'}")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("files", nargs="*")
+    ap.add_argument("--grid", type=int, default=300)
+    ap.add_argument("--limit", type=float, default=2.0, help="pico de PackObj / VBO+EBO")
+    ap.add_argument("--load-limit", type=float, default=6.0, help="pico de Obj + PackObj / VBO+EBO")
+    args = ap.parse_args()
+
+    files = list(args.files)
+    tmp = None
+    if not files:
+        files.append(str(ROOT / "models" / "sphere.obj"))
+        tmp = tempfile.NamedTemporaryFile(suffix=".obj", delete=False)
+        tmp.close()
+        write_grid_obj(tmp.name, args.grid)
+        files.append(tmp.name)
+
+    try:
+        ok = all([bench(path, args.limit, args.load_limit) for path in files])
+    finally:
+        if tmp is not None:
+            os.unlink(tmp.name)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
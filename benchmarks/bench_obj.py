@@ -0,0 +1,179 @@
+"""
+Compara el parser OBJ vectorizado (obj.Obj) contra el loader original
+línea por línea. Uso:
+
+    python benchmarks/bench_obj.py [archivo.obj ...] [--grid N] [--repeat R]
+
+Sin archivos usa models/sphere.obj y una malla de grilla sintética de
+N x N quads (por defecto 300) escrita en un archivo temporal. Antes
+verifica casos borde de sintaxis (líneas indentadas y comentarios al final
+de línea) con Obj y con la carga por partes; sale con 1 si alguno falla.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from obj import Obj  # noqa: E402
+import streaming  # noqa: E402
+
+
+class LegacyObj:
+    """Loader original (tokeniza cada línea en Python) usado como referencia."""
+
+    def __init__(self, filename):
+        self.vertices, self.texCoords, self.normals, self.faces = [], [], [], []
+        self.positions, self.uvs, self.norms = [], [], []
+
+        with open(filename, "r", encoding="utf-8", errors="ignore") as f:
+            for raw in f:
+                line = raw.strip()
+                if not line or line.startswith("#"):
+                    continue
+                parts = line.split()
+                tag = parts[0]
+                if tag == "v" and len(parts) >= 4:
+                    self.vertices.append(tuple(map(float, parts[1:4])))
+                elif tag == "vt" and len(parts) >= 2:
+                    u = float(parts[1])
+                    v = float(parts[2]) if len(parts) >= 3 else 0.0
+                    self.texCoords.append((u, v))
+                elif tag == "vn" and len(parts) >= 4:
+                    self.normals.append(tuple(map(float, parts[1:4])))
+                elif tag == "f":
+                    face = []
+                    for comp in parts[1:]:
+                        trio = comp.split("/") + ["", ""]
+                        face.append(tuple(int(s) if s else None for s in trio[:3]))
+                    for i in range(1, len(face) - 1):
+                        self.faces.append([face[0], face[i], face[i + 1]])
+
+        for tri in self.faces:
+            for (vi, ti, ni) in tri:
+                self.positions.append(self._fetch(self.vertices, vi, (0.0, 0.0, 0.0)))
+                self.uvs.append(self._fetch(self.texCoords, ti, (0.0, 0.0)))
+                self.norms.append(self._fetch(self.normals, ni, (0.0, 0.0, 1.0)))
+
+    @staticmethod
+    def _fetch(arr, idx, default):
+        if idx is None:
+            return default
+        j = idx - 1 if idx > 0 else len(arr) + idx
+        return arr[j] if 0 <= j < len(arr) else default
+
+
+def write_grid_obj(path, n):
+    """Grilla de n x n quads con v/t/n, para medir mallas grandes."""
+    xs, zs = np.meshgrid(np.linspace(-1, 1, n + 1), np.linspace(-1, 1, n + 1))
+    verts = np.column_stack((xs.ravel(), np.zeros(xs.size), zs.ravel()))
+    uvs = np.column_stack(((xs.ravel() + 1) * 0.5, (zs.ravel() + 1) * 0.5))
+
+    i, j = np.meshgrid(np.arange(n), np.arange(n))
+    a = (j * (n + 1) + i).ravel() + 1
+    quads = np.column_stack((a, a + 1, a + n + 2, a + n + 1))
+
+    with open(path, "w") as f:
+        f.write("".join(f"v {x:.6f} {y:.6f} {z:.6f}\n" for x, y, z in verts))
+        f.write("".join(f"vt {u:.6f} {v:.6f}\n" for u, v in uvs))
+        f.write("vn 0 1 0\n")
+        f.write("".join("f " + " ".join(f"{k}/{k}/1" for k in q) + "\n" for q in quads))
+
+
+EDGE_CASES_OBJ = """# comentario de cabecera
+v 0 0 0 # comentario al final
+  v 1 0 0
+\tv 0 1 0   # indentado y con comentario
+    v 0 0 1
+vt 0.5 0.25#pegado
+vn 0 0 1 # normal
+  f 1/1/1 2/1/1 3/1/1
+f 1 2 4 # comentario en cara
+\t f 2 3 4
+    # línea solo con comentario
+"""
+
+
+def check_edge_cases():
+    """Indentación y comentarios al final de línea: 4 vértices, 3 triángulos"""
+    with tempfile.NamedTemporaryFile("w", suffix=".obj", delete=False) as f:
+        f.write(EDGE_CASES_OBJ)
+    try:
+        o = Obj(f.name)
+        soup = sum(len(m) for m in streaming.Meshlets(f.name) if not isinstance(m, streaming.StreamHeader))
+    except ValueError as e:
+        print(f"{'casos borde (indentación, # al final)':<40} FAIL: {e}")
+        return False
+    finally:
+        os.unlink(f.name)
+
+    expected = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], np.float32)
+    checks = {"v": np.array_equal(o.vertices, expected),
+              "vt": np.allclose(o.texCoords, [[0.5, 0.25]]),
+              "vn": np.allclose(o.normals, [[0, 0, 1]]),
+              "f": len(o.faces) == 3 and o.faces[:, :, 0].tolist() == [[0, 1, 2], [0, 1, 3], [1, 2, 3]],
+              "stream": soup == 9}
+    failed = [name for name, ok in checks.items() if not ok]
+    print(f"{'casos borde (indentación, # al final)':<40} {'OK' if not failed else 'FAIL: ' + ', '.join(failed)}")
+    return not failed
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def bench(path, repeat):
+    t_old, old = best_of(lambda: LegacyObj(path), repeat)
+    t_new, new = best_of(lambda: Obj(path), repeat)
+
+    soup_pos = new.positions[new.indices]
+    soup_uv  = new.uvs[new.indices]
+    ok = (np.allclose(np.asarray(old.positions, np.float32), soup_pos, atol=1e-5)
+          and np.allclose(np.asarray(old.uvs, np.float32).reshape(-1, 2), soup_uv, atol=1e-5))
+    size_mb = os.path.getsize(path) / 1e6
+    print(f"{Path(path).name:<24} {size_mb:8.2f} MB  tris={len(new.faces):>9}  verts={len(new.positions):>8}  "
+          f"legacy={t_old * 1e3:9.1f} ms  numpy={t_new * 1e3:8.1f} ms  "
+          f"x{t_old / max(t_new, 1e-9):6.1f}  {'OK' if ok else 'MISMATCH'}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("files", nargs="*")
+    ap.add_argument("--grid", type=int, default=300)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    ok = check_edge_cases()
+
+    files = list(args.files)
+    tmp = None
+    if not files:
+        files.append(str(ROOT / "models" / "sphere.obj"))
+        tmp = tempfile.NamedTemporaryFile(suffix=".obj", delete=False)
+        tmp.close()
+        write_grid_obj(tmp.name, args.grid)
+        files.append(tmp.name)
+
+    try:
+        for path in files:
+            bench(path, args.repeat)
+    finally:
+        if tmp is not None:
+            os.unlink(tmp.name)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,442 @@
+"""
+Suite de benchmarks deterministas del renderer, sin ventana (EGL + Mesa
+llvmpipe, ver headless.py). Uso:
+
+    python benchmarks/bench_suite.py run [--out resultados.json] [--only micro scenes shaders]
+                                         [--quick] [--repeat R] [--frames N] [--size 640x360]
+    python benchmarks/bench_suite.py compare base.json nuevo.json [--threshold 0.10]
+
+run mide:
+
+- micro (CPU): Obj._load, Obj._compute_normals y Obj._expand sobre
+  sphere.obj y una grilla de N x N quads, Model._BuildBuffers,
+  Model.GetModelMatrix de 10k modelos (con el store sucio y limpio) y
+  Camera.Update.
+- scenes: frames a paso fijo (1/60 s, con glFinish) de 1 y 100 esferas,
+  10k planos (un draw cada uno), los mismos 10k planos instanciados (un
+  solo draw), una grilla procedural grande y las 100 esferas con el
+  profiler prendido (su costo).
+- shaders: cada par vertex x fragment de las listas del selector sobre la
+  esfera. Los pares que no compilan se guardan con "error" y sin tiempos.
+
+Todo es determinista: semillas, cámara y tiempos fijos. Cada resultado
+guarda mediana, p95 y mínimo (ms) de sus muestras; el JSON incluye
+además versión de Python/NumPy, renderer GL y commit.
+
+compare marca regresión si la mediana nueva supera a la base por más de
+max(--threshold, ruido), donde ruido = p95 / mediana - 1 de la más ruidosa
+de las dos corridas, o si un par que compilaba en la base ahora falla;
+sale con código 1 si hay alguna (para CI).
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import headless  # noqa: E402  (antes que OpenGL: elige la plataforma EGL)
+
+import glm  # noqa: E402
+from OpenGL.GL import (GL_RENDERER, GL_VERSION, glDeleteBuffers, glDeleteVertexArrays,  # noqa: E402
+                       glFinish, glGetString)
+
+from bench_obj import write_grid_obj  # noqa: E402
+
+FRAME_DT = 1.0 / 60.0
+SEED = 1234
+
+
+# ------------------------------------------------------------
+# Medición
+# ------------------------------------------------------------
+def sample(fn, repeat, setup=None, teardown=None):
+    """Tiempos (ms) de `repeat` llamadas; setup/teardown quedan fuera de la medición"""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1e3)
+        if teardown:
+            teardown()
+    return summarize(times)
+
+
+def summarize(times, **extra):
+    times = np.asarray(times, np.float64)
+    result = {"median_ms": float(np.median(times)), "p95_ms": float(np.percentile(times, 95)),
+              "min_ms": float(times.min()), "samples": len(times)}
+    result.update(extra)
+    return result
+
+
+@contextlib.contextmanager
+def quiet():
+    """Los loaders imprimen una línea por malla; con 10k modelos tapan el reporte"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def report(name, result):
+    print(f"  {name:<44} mediana {result['median_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  "
+          f"mín {result['min_ms']:9.3f} ms")
+
+
+# ------------------------------------------------------------
+# Microbenchmarks de CPU
+# ------------------------------------------------------------
+def bench_micro(args, results):
+    from camera import Camera
+    from model import Model
+    from obj import Obj
+    from transforms import TransformStore
+
+    print("micro:")
+    grid = data_path(f"grid{args.grid}.obj", lambda p: write_grid_obj(p, args.grid))
+    meshes = (("sphere", str(ROOT / "models" / "sphere.obj")), (f"grid{args.grid}", grid))
+
+    for label, path in meshes:
+        with quiet():
+            o = Obj(path)
+        for name, fn in ((f"Obj._load[{label}]", lambda: o._load(path)),
+                         (f"Obj._compute_normals[{label}]", lambda: o._compute_normals("area")),
+                         (f"Obj._expand[{label}]", o._expand)):
+            with quiet():
+                results[name] = sample(fn, args.repeat)
+            report(name, results[name])
+
+        # _BuildBuffers sobre un Model ya creado: solo la subida (VAO/VBO/EBO)
+        data, indices, has_uv, has_normals, stride = Model.PackObj(o)
+        with quiet():
+            model = Model(str(ROOT / "models" / "plane.obj"), useCache=False)
+        model._has_uv, model._has_normals = has_uv, has_normals
+
+        def build():
+            model.lods = []
+            with quiet():
+                model._BuildBuffers(data, indices, stride)
+            glFinish()
+
+        def release():
+            glDeleteVertexArrays(1, [model.vao])
+            glDeleteBuffers(2, [model.vbo, model.ebo])
+
+        name = f"Model._BuildBuffers[{label}]"
+        results[name] = sample(build, args.repeat, teardown=release)
+        report(name, results[name])
+
+    # GetModelMatrix de 10k modelos: solo la parte de matrices (sin malla ni GL)
+    count = 10000
+    store = TransformStore(capacity=count)
+    rng = np.random.default_rng(SEED)
+    models = []
+    for _ in range(count):
+        m = Model.__new__(Model)
+        m._transforms, m._slot = store, store.Allocate(position=tuple(rng.uniform(-50, 50, 3)),
+                                                      rotation=tuple(rng.uniform(0, 360, 3)))
+        m._matrix, m._matrixVersion = None, -1
+        models.append(m)
+
+    def matrices():
+        for m in models:
+            m.GetModelMatrix()
+
+    results["Model.GetModelMatrix[10k sucios]"] = sample(matrices, args.repeat, setup=store.MarkDirty)
+    results["Model.GetModelMatrix[10k limpios]"] = sample(matrices, args.repeat)
+    report("Model.GetModelMatrix[10k sucios]", results["Model.GetModelMatrix[10k sucios]"])
+    report("Model.GetModelMatrix[10k limpios]", results["Model.GetModelMatrix[10k limpios]"])
+
+    camera = Camera(960, 540)
+    camera.position = glm.vec3(0.5, 1.0, 3.0)
+    camera.rotation = glm.vec3(10.0, 20.0, 0.0)
+
+    def updates():
+        for _ in range(1000):
+            camera.Update()
+
+    results["Camera.Update[x1000]"] = sample(updates, args.repeat)
+    report("Camera.Update[x1000]", results["Camera.Update[x1000]"])
+
+
+# ------------------------------------------------------------
+# Escenas (frames completos)
+# ------------------------------------------------------------
+def scene_spheres(count):
+    def build(rend):
+        from model import Model
+        models = []
+        side = int(np.ceil(np.sqrt(count)))
+        for i in range(count):
+            m = Model("models/sphere.obj")
+            m.AddTexture("textures/0000.jpg.jpeg")
+            if count == 1:
+                m.position, m.scale, m.rotation = (0.0, -0.5, -4.0), (1.8, 1.8, 1.8), (0.0, 180.0, 0.0)
+            else:
+                m.position = ((i % side - side / 2) * 1.6, (i // side - side / 2) * 1.6, -18.0)
+            models.append(m)
+        return models
+    return build
+
+
+def scene_planes(count):
+    def build(rend):
+        from model import Model
+        rng = np.random.default_rng(SEED)
+        models = []
+        for i in range(count):
+            m = Model("models/plane.obj")
+            m.position = tuple(rng.uniform((-30, -20, -80), (30, 20, -5)))
+            m.rotation = tuple(rng.uniform(0, 360, 3))
+            m.scale = (0.5, 0.5, 0.5)
+            models.append(m)
+        return models
+    return build
+
+
+def scene_instanced(count):
+    """Los mismos planos que scene_planes, en un solo draw instanciado"""
+    def build(rend):
+        from instancing import InstancedModel
+        rng = np.random.default_rng(SEED)
+        m = InstancedModel("models/plane.obj")
+        m.position = (0.0, 0.0, 0.0)
+        m.SetInstances(rng.uniform((-30, -20, -80), (30, 20, -5), (count, 3)),
+                       rng.uniform(0, 360, (count, 3)), 0.5, rng.uniform(0, 1, (count, 3)))
+        return [m]
+    return build
+
+
+def scene_grid(path):
+    def build(rend):
+        from model import Model
+        m = Model(path)
+        m.position, m.rotation, m.scale = (0.0, -1.0, -4.0), (20.0, 0.0, 0.0), (3.0, 3.0, 3.0)
+        return [m]
+    return build
+
+
+def render_frames(rend, models, frames, warmup, spin=True):
+    """Tiempos (ms) de Render + glFinish a paso fijo; los modelos giran 30°/s"""
+    base = [float(m.rotation[1]) for m in models]
+    times = []
+    for i in range(warmup + frames):
+        t = i * FRAME_DT
+        rend.elapsedTime = t
+        if spin:
+            for m, r in zip(models, base):
+                m.rotation.y = r + 30.0 * t
+        t0 = time.perf_counter()
+        rend.Render()
+        glFinish()
+        if i >= warmup:
+            times.append((time.perf_counter() - t0) * 1e3)
+    return times
+
+
+def bench_scenes(args, rend, results):
+    import fragmentShaders
+    import vertexShaders
+
+    print("scenes:")
+    grid = data_path(f"grid{args.grid}.obj", lambda p: write_grid_obj(p, args.grid))
+    scenes = [("sphere_x1", scene_spheres(1)), ("sphere_x100", scene_spheres(100)),
+              (f"plane_x{args.many}", scene_planes(args.many)),
+              (f"plane_instanced_x{args.many}", scene_instanced(args.many)),
+              (f"grid{args.grid}_x1", scene_grid(grid))]
+
+    rend.SetShaders(vertexShaders.vertex_shader, fragmentShaders.fragment_shader)
+    for name, build in scenes:
+        with quiet():
+            rend.scene = models = build(rend)
+        rend.assets.Wait()
+        times = render_frames(rend, models, args.frames, args.warmup, spin=len(models) <= 100)
+        stats = rend.frameStats
+        key = f"scene[{name}]"
+        results[key] = summarize(times, draws=stats.get("draws", 0), triangles=stats.get("triangles", 0))
+        report(key, results[key])
+        rend.scene = []
+
+    # Costo del profiler: la misma escena con fases, queries GPU y eventos por draw
+    with quiet():
+        rend.scene = models = scene_spheres(100)(rend)
+    rend.assets.Wait()
+    rend.profiler.enabled = rend.profiler.perDraw = True
+    try:
+        times = render_frames(rend, models, args.frames, args.warmup)
+    finally:
+        rend.profiler.enabled = rend.profiler.perDraw = False
+    key = "scene[sphere_x100+profiler]"
+    results[key] = summarize(times, draws=rend.frameStats.get("draws", 0))
+    report(key, results[key])
+    rend.scene = []
+
+
+def bench_shaders(args, rend, results):
+    import fragmentShaders
+    import vertexShaders
+
+    print("shaders:")
+    with quiet():
+        rend.scene = models = scene_spheres(1)(rend)
+    rend.assets.Wait()
+    for vname, vs in vertexShaders.vertex_shaders:
+        for fname, fs in fragmentShaders.fragment_shaders:
+            with quiet():
+                rend.SetShaders(vs, fs)
+            key = f"shader[{vname}+{fname}]"
+            if rend.activeProgram is None:
+                # No compila: sin tiempos (mediría un frame sin escena), queda como fallo
+                results[key] = {"error": "los shaders no compilan"}
+                print(f"  {key:<44} ✗ {results[key]['error']}")
+                continue
+            results[key] = summarize(render_frames(rend, models, args.shader_frames, 1))
+            report(key, results[key])
+    rend.scene = []
+
+
+# ------------------------------------------------------------
+# run / compare
+# ------------------------------------------------------------
+def data_path(name, write):
+    """Archivo generado estable entre corridas (así la caché de mallas lo reusa)"""
+    path = Path(tempfile.gettempdir()) / "renderer_bench" / name
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        write(str(tmp))
+        os.replace(tmp, path)
+    return str(path)
+
+
+def metadata(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"date": time.strftime("%Y-%m-%d %H:%M:%S"), "commit": commit,
+            "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "cpus": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k != "func"}}
+
+
+def run(args):
+    out = Path(args.out).resolve()
+    os.chdir(ROOT)
+    if args.quick:
+        args.repeat, args.frames, args.warmup = 3, 10, 2
+        args.grid, args.many, args.shader_frames = 150, 2000, 3
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    meta = metadata(args)
+    results = {}
+    rend = None
+    with quiet():
+        context = headless.HeadlessContext(width, height)      # también para Model._BuildBuffers
+    meta["gl_renderer"] = glGetString(GL_RENDERER).decode()
+    meta["gl_version"] = glGetString(GL_VERSION).decode()
+    print(f"{meta['gl_renderer']} | GL {meta['gl_version']} | {width}x{height} | commit {meta['commit']}")
+    if {"scenes", "shaders"} & set(args.only):
+        from gl import Renderer
+        with quiet():
+            rend = Renderer(context)
+            headless.BuildScene(rend, "models/sphere.obj", "textures/0000.jpg.jpeg")
+        rend.scene = []
+
+    if "micro" in args.only:
+        bench_micro(args, results)
+    if "scenes" in args.only:
+        bench_scenes(args, rend, results)
+    if "shaders" in args.only:
+        bench_shaders(args, rend, results)
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+    failed = sum("error" in r for r in results.values())
+    print(f"✓ {len(results) - failed} resultados en {out}" + (f" (✗ {failed} fallidos)" if failed else ""))
+    if rend is not None:
+        rend.assets.Shutdown()
+    return 0
+
+
+def compare(args):
+    base = json.loads(Path(args.base).read_text())
+    new = json.loads(Path(args.new).read_text())
+    print(f"base {args.base} ({base['meta'].get('commit')})  vs  nuevo {args.new} ({new['meta'].get('commit')})")
+
+    regressions = improvements = 0
+    for name in sorted(set(base["results"]) | set(new["results"])):
+        a, b = base["results"].get(name), new["results"].get(name)
+        if a is None or b is None:
+            print(f"  {name:<44} {'solo en nuevo' if a is None else 'solo en base'}")
+            continue
+        if "error" in a or "error" in b:
+            if "error" not in a:
+                print(f"  {name:<44} ✗ REGRESIÓN: {b['error']}")
+                regressions += 1
+            elif "error" not in b:
+                print(f"  {name:<44} ✓ mejora: ya no falla")
+                improvements += 1
+            else:
+                print(f"  {name:<44} falla en ambos: {b['error']}")
+            continue
+        noise = max(a["p95_ms"] / max(a["median_ms"], 1e-9), b["p95_ms"] / max(b["median_ms"], 1e-9)) - 1.0
+        limit = max(args.threshold, noise)
+        change = b["median_ms"] / max(a["median_ms"], 1e-9) - 1.0
+        if change > limit:
+            mark, regressions = "✗ REGRESIÓN", regressions + 1
+        elif change < -limit:
+            mark, improvements = "✓ mejora", improvements + 1
+        else:
+            mark = ""
+        print(f"  {name:<44} {a['median_ms']:9.3f} -> {b['median_ms']:9.3f} ms  {change * 100:+6.1f}% "
+              f"(umbral ±{limit * 100:.0f}%)  {mark}")
+
+    print(f"{regressions} regresiones, {improvements} mejoras")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run", help="correr la suite y guardar JSON")
+    r.add_argument("--out", default="bench_results.json")
+    r.add_argument("--only", nargs="+", choices=("micro", "scenes", "shaders"),
+                   default=["micro", "scenes", "shaders"])
+    r.add_argument("--quick", action="store_true", help="menos muestras y escenas más chicas")
+    r.add_argument("--repeat", type=int, default=7, help="muestras por microbenchmark")
+    r.add_argument("--frames", type=int, default=30, help="frames medidos por escena")
+    r.add_argument("--warmup", type=int, default=5, help="frames descartados por escena")
+    r.add_argument("--shader-frames", type=int, default=5, help="frames por par de shaders")
+    r.add_argument("--grid", type=int, default=300, help="lado de la grilla procedural (quads)")
+    r.add_argument("--many", type=int, default=10000, help="modelos de las escenas grandes")
+    r.add_argument("--size", default="640x360")
+    r.set_defaults(func=run)
+
+    c = sub.add_parser("compare", help="comparar dos JSON y marcar regresiones")
+    c.add_argument("base")
+    c.add_argument("new")
+    c.add_argument("--threshold", type=float, default=0.10, help="cambio relativo mínimo a marcar")
+    c.set_defaults(func=compare)
+
+    args = ap.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
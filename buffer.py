@@ -13,16 +13,25 @@ class Buffer(object):
 		# Vertex Buffer Object
 		self.VBO = glGenBuffers(1)
 
+		# Mandar la informacion de vertices (una sola vez)
+		self.Update(self.vertexBuffer)
 
-	def Use(self, attribNumber, size):
 
-		glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
+	def Update(self, data):
+		# Re-subir solo cuando los datos cambian de verdad
+		self.vertexBuffer = array(data, dtype = float32)
 
-		# Mandar la informacion de vertices
+		glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
 		glBufferData(GL_ARRAY_BUFFER,               # Buffer ID
 					 self.vertexBuffer.nbytes,      # Buffer size in bytes
 					 self.vertexBuffer,             # Buffer data
 					 GL_STATIC_DRAW)                # Usage
+		glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+
+	def Use(self, attribNumber, size):
+
+		glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
 
 		# Atributo
 		glVertexAttribPointer(attribNumber,			# Attribute Number
@@ -0,0 +1,229 @@
+"""
+BVH de la escena para consultas espaciales: frustum, rayo (picking) y radio.
+
+Las cajas son las AABB en mundo de cada slot del TransformStore (volumen
+local del OBJ llevado por la matriz de modelo, ver culling.WorldAABBs).
+
+Construcción tipo LBVH: los objetos se ordenan por código Morton del
+centro, se agrupan de a `leafSize` en hojas consecutivas y encima va un
+árbol binario implícito (nodo i -> hijos 2i, 2i+1; raíz 1; hojas en
+[P, 2P) con P potencia de 2). Todo son arrays NumPy, así que:
+
+- Refit() solo recalcula las cajas de los objetos cuya versión cambió en
+  el store y sube nivel por nivel por sus ancestros.
+- Las consultas recorren el árbol por niveles: en cada nivel se prueban
+  a la vez todos los nodos de la frontera (log2(P) pasos vectorizados).
+
+Si los objetos se mueven mucho el orden Morton envejece y las cajas
+crecen; Build() rehace el orden.
+"""
+
+import numpy as np
+
+from culling import AABBsInFrustum, AABBsInsideFrustum, FrustumPlanes, WorldAABBs
+from transforms import scene_transforms
+
+_EMPTY = np.zeros(0, np.int64)
+
+
+class SceneBVH(object):
+    def __init__(self, store=None, leafSize=8):
+        self.store = store if store is not None else scene_transforms
+        self.leafSize = leafSize
+        self.stats = {"builds": 0, "refits": 0, "refit_objects": 0, "nodes_tested": 0}
+        self.Build([], [])
+
+    def __len__(self):
+        return len(self.slots)
+
+    # -------------------- Construcción ------------------------
+    def Build(self, items, slots=None):
+        """items: Models (o cualquier objeto); slots: sus filas del store (por defecto item._slot)"""
+        self.items = list(items)
+        if slots is None:
+            slots = [m._slot for m in self.items]
+        self.slots = np.asarray(slots, np.int64).reshape(-1)
+        self._SyncStore()
+
+        n, L = len(self.slots), self.leafSize
+        centers, extents = WorldAABBs(self.store, self.slots)
+        self.order = np.argsort(_MortonCodes(centers), kind="stable")   # posición -> item
+        self.position = np.empty(n, np.int64)                           # item -> posición
+        self.position[self.order] = np.arange(n)
+
+        leaves = max(1, -(-n // L))
+        self.leafCount = 1 << (leaves - 1).bit_length()
+        self.depth = self.leafCount.bit_length() - 1
+
+        # Cajas por posición; el relleno (inf, -inf) es una caja vacía que nunca pasa
+        P = self.leafCount
+        self.objMin = np.full((P * L, 3), np.inf, np.float32)
+        self.objMax = np.full((P * L, 3), -np.inf, np.float32)
+        self.objMin[:n] = (centers - extents)[self.order]
+        self.objMax[:n] = (centers + extents)[self.order]
+        self.nodeMin = np.full((2 * P, 3), np.inf, np.float32)
+        self.nodeMax = np.full((2 * P, 3), -np.inf, np.float32)
+        self._RefitLeaves(np.arange(P))
+
+        self._versions = self.store.versions[self.slots].copy()
+        self.stats["builds"] += 1
+
+    def Refit(self):
+        """Actualiza las cajas de lo que se movió (versión del slot); devuelve cuántos objetos"""
+        if not len(self.slots):
+            return 0
+        self._SyncStore()
+        versions = self.store.versions[self.slots]
+        changed = np.flatnonzero(versions != self._versions)
+        if not len(changed):
+            return 0
+
+        centers, extents = WorldAABBs(self.store, self.slots[changed])
+        pos = self.position[changed]
+        self.objMin[pos] = centers - extents
+        self.objMax[pos] = centers + extents
+        self._versions[changed] = versions[changed]
+        self._RefitLeaves(np.unique(pos // self.leafSize))
+
+        self.stats["refits"] += 1
+        self.stats["refit_objects"] += len(changed)
+        return len(changed)
+
+    # -------------------- Consultas ------------------------
+    def QueryFrustum(self, viewProj):
+        """Índices (en self.items) de los objetos cuya caja toca el frustum de proj * view"""
+        planes = FrustumPlanes(viewProj)
+        return self._Traverse(lambda mn, mx: AABBsInFrustum(planes, (mn + mx) * 0.5, (mx - mn) * 0.5),
+                              lambda mn, mx: AABBsInsideFrustum(planes, (mn + mx) * 0.5, (mx - mn) * 0.5))
+
+    def QueryRadius(self, center, radius):
+        """Índices de los objetos cuya caja corta la esfera (centro, radio)"""
+        c = np.asarray(center, np.float32).reshape(3)
+        r2 = float(radius) ** 2
+        return self._Traverse(lambda mn, mx: _BoxDistance2(mn, mx, c) <= r2)
+
+    def QueryRay(self, origin, direction, maxDistance=np.inf):
+        """(índices, t) de las cajas que corta el rayo, ordenados por distancia de entrada"""
+        o = np.asarray(origin, np.float32).reshape(3)
+        d = np.asarray(direction, np.float32).reshape(3)
+        invDir = 1.0 / np.where(np.abs(d) > 1e-12, d, 1e-12)
+
+        def test(mn, mx):
+            near, far = _RaySlab(mn, mx, o, invDir)
+            return (near <= far) & (far >= 0.0) & (near <= maxDistance)
+
+        hits = self._Traverse(test)
+        if not len(hits):
+            return hits, np.zeros(0, np.float32)
+        pos = self.position[hits]
+        near, _ = _RaySlab(self.objMin[pos], self.objMax[pos], o, invDir)
+        t = np.maximum(near, 0.0)
+        first = np.argsort(t, kind="stable")
+        return hits[first], t[first]
+
+    def Items(self, indices):
+        return [self.items[i] for i in indices]
+
+    # -------------------- Interno ------------------------
+    def _SyncStore(self):
+        # Matrices al día antes de leerlas (Model.position += ... solo marca sucio)
+        if len(self.slots) and self.store.dirty[self.slots].any():
+            self.store.Update()
+
+    def _RefitLeaves(self, leaves):
+        """Recalcula las hojas indicadas y, nivel por nivel, sus ancestros"""
+        P, L = self.leafCount, self.leafSize
+        self.nodeMin[P + leaves] = self.objMin.reshape(P, L, 3)[leaves].min(axis=1)
+        self.nodeMax[P + leaves] = self.objMax.reshape(P, L, 3)[leaves].max(axis=1)
+
+        nodes = np.unique((P + leaves) >> 1)
+        while len(nodes) and nodes[-1] >= 1:
+            self.nodeMin[nodes] = np.minimum(self.nodeMin[2 * nodes], self.nodeMin[2 * nodes + 1])
+            self.nodeMax[nodes] = np.maximum(self.nodeMax[2 * nodes], self.nodeMax[2 * nodes + 1])
+            nodes = np.unique(nodes >> 1)
+            nodes = nodes[nodes >= 1]
+
+    def _Traverse(self, test, inside=None):
+        """
+        Recorrido por niveles; test(mins, maxs) -> máscara de cajas que tocan la
+        consulta. Con inside(mins, maxs) los nodos contenidos enteros se aceptan
+        sin bajar. Devuelve índices de item ordenados.
+        """
+        n = len(self.slots)
+        if n == 0:
+            return _EMPTY
+
+        L, P = self.leafSize, self.leafCount
+        accepted = []
+        with np.errstate(invalid="ignore", over="ignore"):
+            frontier = np.ones(1, np.int64)
+            for level in range(self.depth + 1):
+                mn, mx = self.nodeMin[frontier], self.nodeMax[frontier]
+                keep = test(mn, mx) & (mn[:, 0] <= mx[:, 0])
+                self.stats["nodes_tested"] += len(frontier)
+                if inside is not None and level < self.depth:
+                    full = keep & inside(mn, mx)
+                    if full.any():
+                        # Subárbol entero: sus hojas son un rango contiguo de posiciones
+                        shift = self.depth - level
+                        accepted.append(_Ranges((frontier[full] << shift) - P, 1 << shift, L, n))
+                        keep &= ~full
+                frontier = frontier[keep]
+                if not len(frontier):
+                    break
+                if level < self.depth:
+                    frontier = np.stack((2 * frontier, 2 * frontier + 1), axis=1).reshape(-1)
+
+            # Hojas -> posiciones de sus objetos -> prueba exacta por objeto
+            if len(frontier):
+                pos = ((frontier - P)[:, None] * L + np.arange(L)).reshape(-1)
+                pos = pos[pos < n]
+                accepted.append(pos[test(self.objMin[pos], self.objMax[pos])])
+        if not accepted:
+            return _EMPTY
+        return np.sort(self.order[np.concatenate(accepted)])
+
+
+# ------------------------------------------------------------
+# Helpers vectorizados
+# ------------------------------------------------------------
+def _MortonCodes(centers):
+    """Código Morton de 30 bits (10 por eje) de los centros normalizados a su AABB"""
+    if not len(centers):
+        return np.zeros(0, np.uint32)
+    lo, hi = centers.min(axis=0), centers.max(axis=0)
+    # Objetos sin volumen o muy lejanos no deben aplastar la grilla del resto
+    lo, hi = np.maximum(lo, -1e6), np.minimum(hi, 1e6)
+    q = np.clip((centers - lo) / np.maximum(hi - lo, 1e-9) * 1023.0, 0, 1023).astype(np.uint32)
+    return (_SpreadBits(q[:, 0]) << 2) | (_SpreadBits(q[:, 1]) << 1) | _SpreadBits(q[:, 2])
+
+
+def _SpreadBits(v):
+    """10 bits -> 30 bits con dos ceros entre cada bit"""
+    v = v.astype(np.uint32)
+    v = (v | (v << 16)) & np.uint32(0x030000FF)
+    v = (v | (v << 8))  & np.uint32(0x0300F00F)
+    v = (v | (v << 4))  & np.uint32(0x030C30C3)
+    v = (v | (v << 2))  & np.uint32(0x09249249)
+    return v
+
+
+def _Ranges(firstLeaves, leafSpan, leafSize, n):
+    """Posiciones de objetos de los subárboles que empiezan en firstLeaves (leafSpan hojas c/u)"""
+    span = leafSpan * leafSize
+    pos = (firstLeaves[:, None] * leafSize + np.arange(span)).reshape(-1)
+    return pos[pos < n]
+
+
+def _BoxDistance2(mins, maxs, point):
+    d = np.clip(point, mins, maxs) - point
+    return (d * d).sum(axis=1)
+
+
+def _RaySlab(mins, maxs, origin, invDir):
+    """Distancias (entrada, salida) del rayo a cada caja (método de slabs)"""
+    t1 = (mins - origin) * invDir
+    t2 = (maxs - origin) * invDir
+    near = np.minimum(t1, t2).max(axis=1)
+    far = np.maximum(t1, t2).min(axis=1)
+    return near, far
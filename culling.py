@@ -0,0 +1,110 @@
+"""
+Frustum culling vectorizado.
+
+Los planos salen de projectionMatrix * viewMatrix (Gribb/Hartmann) y cada
+modelo se prueba con sus volúmenes locales (esfera y AABB) llevados a
+mundo con las matrices del TransformStore, todo en arrays NumPy: una
+pasada por frame para la escena entera.
+
+Primero la esfera (barata) descarta lo que está claramente afuera; a lo
+que sobrevive se le aplica la AABB orientada por la matriz de modelo
+(centro + extensión proyectada sobre la normal de cada plano).
+
+Los volúmenes son los de la malla: un vertex shader que desplaza mucho
+los vértices (explode, spikes...) puede necesitar `padding`.
+"""
+
+import numpy as np
+
+from transforms import GlmToNumpy
+
+_UNBOUNDED = np.float32(1e30)    # finito: |normal| * semieje no da NaN con componentes 0
+
+
+def FrustumPlanes(viewProj):
+    """mat4 (glm o (4,4) NumPy) -> (6,4) planos normalizados: izq, der, abajo, arriba, cerca, lejos"""
+    m = GlmToNumpy(viewProj) if not isinstance(viewProj, np.ndarray) else np.asarray(viewProj, np.float32)
+    r0, r1, r2, r3 = m
+    planes = np.stack([r3 + r0, r3 - r0, r3 + r1, r3 - r1, r3 + r2, r3 - r2]).astype(np.float32)
+    planes /= np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+    return planes
+
+
+def SpheresInFrustum(planes, centers, radii):
+    """(N,3) centros, (N,) radios -> máscara (N,) de esferas que tocan el frustum"""
+    dist = centers @ planes[:, :3].T + planes[:, 3]          # (N,6)
+    return np.all(dist >= -radii[:, None], axis=1)
+
+
+def AABBsInFrustum(planes, centers, extents):
+    """(N,3) centros, (N,3) semiejes en mundo -> máscara (N,) de cajas que tocan el frustum"""
+    dist = centers @ planes[:, :3].T + planes[:, 3]
+    reach = extents @ np.abs(planes[:, :3]).T
+    return np.all(dist >= -reach, axis=1)
+
+
+def AABBsInsideFrustum(planes, centers, extents):
+    """Máscara (N,) de cajas completamente dentro del frustum"""
+    dist = centers @ planes[:, :3].T + planes[:, 3]
+    reach = extents @ np.abs(planes[:, :3]).T
+    return np.all(dist >= reach, axis=1)
+
+
+def WorldAABBs(store, slots):
+    """(centros, semiejes) (N,3) en mundo de los slots; sin volumen -> caja enorme (siempre pasa)"""
+    slots = np.asarray(slots, np.int64)
+    matrices = store.matrices[slots]
+    basis = matrices[:, :3, :3]
+    centers = np.einsum("nij,nj->ni", basis, store.boundsCenter[slots]) + matrices[:, :3, 3]
+    extents = np.einsum("nij,nj->ni", np.abs(basis), store.boundsExtent[slots])
+    extents[~np.isfinite(store.boundsRadius[slots])] = _UNBOUNDED
+    return centers, extents
+
+
+class FrustumCuller(object):
+    def __init__(self, padding=0.0):
+        self.padding = padding
+        self.stats = {"tested": 0, "visible": 0, "culled": 0, "culled_sphere": 0, "culled_aabb": 0}
+
+    def ResetStats(self):
+        for k in self.stats:
+            self.stats[k] = 0
+
+    def Cull(self, store, slots, viewProj):
+        """Máscara (N,) de visibles para los slots del store (matrices ya actualizadas)"""
+        slots = np.asarray(slots, np.int64)
+        n = len(slots)
+        visible = np.ones(n, np.bool_)
+        self.stats["tested"] += n
+        if n == 0:
+            return visible
+
+        # Sin volumen (radio infinito) -> siempre visible
+        radii = store.boundsRadius[slots]
+        bounded = np.flatnonzero(np.isfinite(radii))
+        if len(bounded):
+            planes = FrustumPlanes(viewProj)
+            idx = slots[bounded]
+            matrices = store.matrices[idx]
+            basis = matrices[:, :3, :3]
+
+            # Centro local -> mundo; el radio escala con la columna más larga
+            centers = np.einsum("nij,nj->ni", basis, store.boundsCenter[idx]) + matrices[:, :3, 3]
+            scale = np.sqrt((basis * basis).sum(axis=1).max(axis=1))
+            inside = SpheresInFrustum(planes, centers, radii[bounded] * scale + self.padding)
+            self.stats["culled_sphere"] += int(len(inside) - inside.sum())
+
+            # AABB orientada: semiejes en mundo = |R*S| * semiejes locales
+            survivors = np.flatnonzero(inside)
+            if len(survivors):
+                extents = np.einsum("nij,nj->ni", np.abs(basis[survivors]),
+                                    store.boundsExtent[idx[survivors]]) + self.padding
+                boxed = AABBsInFrustum(planes, centers[survivors], extents)
+                inside[survivors] = boxed
+                self.stats["culled_aabb"] += int(len(boxed) - boxed.sum())
+            visible[bounded] = inside
+
+        count = int(visible.sum())
+        self.stats["visible"] += count
+        self.stats["culled"] += n - count
+        return visible
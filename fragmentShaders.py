@@ -1,6 +1,8 @@
+from framedata import frame_uniforms
+
 fragment_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 in VS_OUT {
     vec2 uv;
     vec3 normal;
@@ -11,8 +13,6 @@ out vec4 outColor;
 
 uniform sampler2D uTexture0;
 uniform bool      uHasTexture;
-uniform vec3      uLightPos;
-uniform vec3      uViewPos;
 uniform vec3      uColor;
 
 void main() {
@@ -37,7 +37,7 @@ void main() {
 
 toon_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 in VS_OUT {
     vec2 uv;
     vec3 normal;
@@ -48,8 +48,6 @@ out vec4 outColor;
 
 uniform sampler2D uTexture0;
 uniform bool      uHasTexture;
-uniform vec3      uLightPos;
-uniform vec3      uViewPos;
 uniform vec3      uColor;
 
 void main() {
@@ -73,7 +71,7 @@ void main() {
 
 rainbow_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 in VS_OUT {
     vec2 uv;
     vec3 normal;
@@ -82,8 +80,6 @@ in VS_OUT {
 
 out vec4 outColor;
 
-uniform vec3  uLightPos;
-uniform float uTime;
 
 vec3 hsv2rgb(vec3 c) {
     vec4 K = vec4(1.0, 2.0 / 3.0, 1.0 / 3.0, 3.0);
@@ -106,7 +102,7 @@ void main() {
 
 holographic_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 in VS_OUT {
     vec2 uv;
     vec3 normal;
@@ -115,8 +111,6 @@ in VS_OUT {
 
 out vec4 outColor;
 
-uniform vec3  uViewPos;
-uniform float uTime;
 
 void main() {
     vec3 N = normalize(fin.normal);
@@ -138,7 +132,7 @@ void main() {
 
 glitch_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 in VS_OUT {
     vec2 uv;
     vec3 normal;
@@ -150,7 +144,6 @@ out vec4 outColor;
 uniform sampler2D uTexture0;
 uniform bool      uHasTexture;
 uniform vec3      uColor;
-uniform float     uTime;
 
 float random(vec2 st) {
     return fract(sin(dot(st.xy, vec2(12.9898, 78.233))) * 43758.5453123);
@@ -179,7 +172,7 @@ void main() {
 
 xray_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 in VS_OUT {
     vec2 uv;
     vec3 normal;
@@ -188,7 +181,6 @@ in VS_OUT {
 
 out vec4 outColor;
 
-uniform vec3 uViewPos;
 
 void main() {
     vec3 N = normalize(fin.normal);
@@ -206,7 +198,7 @@ void main() {
 
 fire_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 in VS_OUT {
     vec2 uv;
     vec3 normal;
@@ -215,8 +207,6 @@ in VS_OUT {
 
 out vec4 outColor;
 
-uniform vec3  uLightPos;
-uniform float uTime;
 
 void main() {
     vec3 N = normalize(fin.normal);
@@ -243,7 +233,7 @@ void main() {
 
 wireframe_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 in VS_OUT {
     vec2 uv;
     vec3 normal;
@@ -255,7 +245,6 @@ out vec4 outColor;
 uniform sampler2D uTexture0;
 uniform bool      uHasTexture;
 uniform vec3      uColor;
-uniform vec3      uLightPos;
 
 void main() {
     vec3 N = normalize(fin.normal);
@@ -277,7 +266,7 @@ void main() {
 
 matrix_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 in VS_OUT {
     vec2 uv;
     vec3 normal;
@@ -286,7 +275,6 @@ in VS_OUT {
 
 out vec4 outColor;
 
-uniform float uTime;
 
 float random(vec2 st) {
     return fract(sin(dot(st.xy, vec2(12.9898,78.233))) * 43758.5453123);
@@ -310,7 +298,7 @@ void main() {
 
 disco_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 in VS_OUT {
     vec2 uv;
     vec3 normal;
@@ -319,7 +307,6 @@ in VS_OUT {
 
 out vec4 outColor;
 
-uniform float uTime;
 
 void main() {
     vec3 N = normalize(fin.normal);
@@ -350,7 +337,7 @@ void main() {
 
 negative_shader = """
 #version 330 core
-in VS_OUT {
+""" + frame_uniforms + """in VS_OUT {
     vec2 uv;
     vec3 normal;
     vec3 worldPos;
@@ -367,13 +354,12 @@ void main() {
 
 magma_shader = """
 #version 330 core
-in VS_OUT {
+""" + frame_uniforms + """in VS_OUT {
     vec2 uv;
     vec3 normal;
     vec3 worldPos;
 } fin;
 out vec4 outColor;
-uniform vec3      uLightPos;
 uniform sampler2D uTexture0;
 uniform bool      uHasTexture;
 uniform vec3      uColor;
@@ -392,7 +378,7 @@ void main() {
 
 sepia_shader = """
 #version 330 core
-in VS_OUT {
+""" + frame_uniforms + """in VS_OUT {
     vec2 uv;
     vec3 normal;
     vec3 worldPos;
@@ -414,7 +400,7 @@ void main() {
 
 normal_visualization_shader = """
 #version 330 core
-in VS_OUT {
+""" + frame_uniforms + """in VS_OUT {
     vec2 uv;
     vec3 normal;
     vec3 worldPos;
@@ -428,7 +414,7 @@ void main() {
 
 unlit_shader = """
 #version 330 core
-in VS_OUT {
+""" + frame_uniforms + """in VS_OUT {
     vec2 uv;
     vec3 normal;
     vec3 worldPos;
@@ -441,4 +427,19 @@ void main() {
     vec3 base = uHasTexture ? texture(uTexture0, fin.uv).rgb : uColor;
     outColor = vec4(base, 1.0);
 }
-"""
\ No newline at end of file
+"""
+
+
+# Efectos del selector (RendererOpenGL2025.py) y de preview.py, en orden de tecla
+fragment_shaders = [
+    ("Phong", fragment_shader),
+    ("Toon", toon_shader),
+    ("Rainbow", rainbow_shader),
+    ("Holographic", holographic_shader),
+    ("Glitch", glitch_shader),
+    ("X-Ray", xray_shader),
+    ("Fire", fire_shader),
+    ("Wireframe", wireframe_shader),
+    ("Matrix", matrix_shader),
+    ("Disco", disco_shader),
+]
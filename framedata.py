@@ -0,0 +1,60 @@
+"""
+Datos por frame (cámara, luz, tiempo) en un Uniform Buffer Object std140
+compartido por todos los programas. Se actualiza una vez por frame con un
+solo glBufferSubData; los shaders incluyen `frame_uniforms` y leen los
+miembros por nombre como si fueran uniforms sueltos.
+"""
+
+import ctypes
+
+import glm
+import numpy as np
+from OpenGL.GL import *
+
+FRAME_BLOCK   = "FrameData"
+FRAME_BINDING = 0
+
+frame_uniforms = """
+layout (std140) uniform FrameData {
+    mat4  viewMatrix;
+    mat4  projectionMatrix;
+    vec3  uLightPos;
+    float uTime;
+    vec3  uViewPos;
+};
+"""
+
+# Offsets std140 en floats: mat4 = 16, vec3 alinea a 16 bytes y el float
+# siguiente ocupa su cuarto componente
+_VIEW, _PROJ, _LIGHT, _TIME, _VIEWPOS = 0, 16, 32, 35, 36
+_SIZE_FLOATS = 40
+
+
+class FrameUniforms(object):
+    def __init__(self):
+        self.data = np.zeros(_SIZE_FLOATS, np.float32)   # buffer CPU preasignado
+
+        self.ubo = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferData(GL_UNIFORM_BUFFER, self.data.nbytes, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+        glBindBufferBase(GL_UNIFORM_BUFFER, FRAME_BINDING, self.ubo)
+
+    def Update(self, viewMatrix, projectionMatrix, lightPos, viewPos, time):
+        base = self.data.ctypes.data
+        ctypes.memmove(base + _VIEW * 4, glm.value_ptr(viewMatrix), 64)
+        ctypes.memmove(base + _PROJ * 4, glm.value_ptr(projectionMatrix), 64)
+        self.data[_LIGHT:_LIGHT + 3] = (lightPos[0], lightPos[1], lightPos[2])
+        self.data[_TIME] = time
+        self.data[_VIEWPOS:_VIEWPOS + 3] = (viewPos[0], viewPos[1], viewPos[2])
+
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferSubData(GL_UNIFORM_BUFFER, 0, self.data.nbytes, self.data)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+
+
+def BindFrameBlock(program):
+    """Conecta el bloque FrameData del programa (si lo usa) al binding point común"""
+    index = glGetUniformBlockIndex(program, FRAME_BLOCK)
+    if index != GL_INVALID_INDEX:
+        glUniformBlockBinding(program, index, FRAME_BINDING)
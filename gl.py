@@ -4,9 +4,22 @@ scene draw, and skybox. Clean prints and time uniform support.
 """
 
 from OpenGL.GL import *
-from OpenGL.GL.shaders import compileProgram, compileShader
 import glm
 from skybox import Skybox
+from shadercache import ShaderCache
+from framedata import FrameUniforms
+from transforms import scene_transforms
+import assets
+import streaming
+import texturemanager
+from texturemanager import TextureArrayFragmentShader
+from renderqueue import RenderQueue
+from culling import FrustumCuller
+from bvh import SceneBVH
+from lod import LODSelector
+from vertexformat import CompactVertexShader
+from profiler import FrameProfiler, ProfilerOverlay
+from instancing import InstancedModel, InstancedVertexShader, InstancedFragmentShader
 
 
 class Renderer:
@@ -23,7 +36,27 @@ class Renderer:
         self.scene = []
         self.skybox = None
 
-        self.activeShader = None
+        self.activeShader = None     # id GL del programa activo
+        self.activeProgram = None    # ShaderProgram (locations + estado de uniforms)
+        self.instancedProgram = None # variante instanciada del par activo
+        self.vertexSource = None
+        self.fragmentSource = None
+        self.frameStats = {}
+        self.shaderCache = ShaderCache()
+        self.frameUniforms = FrameUniforms()
+        self.transforms = scene_transforms   # posición/rotación/escala de todos los Model
+        self.assets = assets.GetLoader()     # texturas decodificadas en segundo plano
+        self.meshStreams = streaming.GetStreamer()   # Model(..., stream=True) llegando por meshlets
+        self.textures = texturemanager.GetManager()
+        self.renderQueue = RenderQueue()
+        self.culler = FrustumCuller()
+        self.frustumCulling = True           # descartar modelos fuera de cámara antes de los draws
+        self.sceneBVH = SceneBVH(self.transforms)   # consultas espaciales (picking, radio)
+        self.lodSelector = LODSelector()
+        self.levelOfDetail = True            # nivel de malla según tamaño en pantalla
+        self.profiler = FrameProfiler()      # tiempos CPU/GPU por fase y contadores por frame
+        self.showProfiler = False            # overlay con percentiles y gráfico de frame time
+        self._profilerOverlay = None
         self.value = 0.0
         self.elapsedTime = 0.0
         self.pointLight = glm.vec3(1, 1, 1)
@@ -32,17 +65,31 @@ class Renderer:
         self.camera = Camera(self.width, self.height)
 
     def SetShaders(self, vertex_shader_source, fragment_shader_source):
+        # La caché devuelve el programa ya enlazado si esta combinación se usó antes
         try:
-            vertex_shader = compileShader(vertex_shader_source, GL_VERTEX_SHADER)
-            fragment_shader = compileShader(fragment_shader_source, GL_FRAGMENT_SHADER)
-            self.activeShader = compileProgram(vertex_shader, fragment_shader)
-            print("✓ Shaders compilados correctamente")
+            # Las texturas de los modelos son capas de arrays (texturemanager)
+            fragment_shader_source = TextureArrayFragmentShader(fragment_shader_source)
+            # Posición float32 o compacta (int16 normalizado) con el mismo programa
+            vertex_shader_source = CompactVertexShader(vertex_shader_source)
+            misses = self.shaderCache.stats["misses"]
+            self.activeProgram = self.shaderCache.Get(vertex_shader_source, fragment_shader_source)
+            self.activeShader = self.activeProgram.program
+            self.vertexSource, self.fragmentSource = vertex_shader_source, fragment_shader_source
+            self.instancedProgram = None    # se compila al primer InstancedModel
+            if self.shaderCache.stats["misses"] != misses:
+                print("✓ Shaders compilados correctamente")
         except Exception as e:
             print("✗ Error compilando shaders:", e)
             self.activeShader = None
+            self.activeProgram = None
+            self.instancedProgram = None
 
-    def CreateSkybox(self, faces):
-        self.skybox = Skybox(faces)
+    def WarmUpShaders(self, pairs):
+        """Precompila combinaciones (vertex, fragment) de a poco, entre frames"""
+        self.shaderCache.WarmUp((CompactVertexShader(vs), TextureArrayFragmentShader(fs)) for vs, fs in pairs)
+
+    def CreateSkybox(self, faces, fullscreen=False):
+        self.skybox = Skybox(faces, fullscreen)
         self.skybox.cameraRef = self.camera
         print("✓ Skybox creado correctamente")
 
@@ -54,56 +101,150 @@ class Renderer:
             glPolygonMode(GL_FRONT_AND_BACK, GL_FILL)
 
     def Render(self):
+        # Si el loop no abrió el frame del profiler (input/flip), lo abre y cierra Render
+        prof = self.profiler
+        ownFrame = prof.enabled and not prof.inFrame
+        if ownFrame:
+            prof.BeginFrame()
+
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         
-        self.camera.Update()
+        with prof.Scope("camera"):
+            self.camera.Update()
+
+        # Texturas ya decodificadas -> GPU (vía PBO, presupuesto acotado por frame)
+        # y meshlets de las mallas en streaming (glBufferSubData al VBO reservado)
+        with prof.Scope("assets"):
+            if self.assets.Pending():
+                self.assets.Update()
+            if self.meshStreams.Pending():
+                self.meshStreams.Update()
+            self.textures.Update()
+
+        # Cámara, luz y tiempo: una sola subida al UBO compartido por todos los programas
+        self.frameUniforms.Update(self.camera.viewMatrix, self.camera.projectionMatrix,
+                                  self.pointLight, self.camera.position, self.elapsedTime)
+
+        # Matrices de modelo (y model-view / normal) solo de lo que se movió
+        with prof.Scope("transforms"):
+            self.transforms.ResetStats()
+            self.transforms.Update(self.camera.viewMatrix)
+
+        programs = [p for p in (self.activeProgram, self.instancedProgram,
+                                self.skybox.program if self.skybox else None) if p]
+        for p in programs:
+            p.ResetStats()
+        self.renderQueue.ResetStats()
+        self.culler.ResetStats()
+        self.lodSelector.ResetStats()
 
         # ========== DIBUJAR SKYBOX PRIMERO (al fondo) ==========
-        if self.skybox:
+        if self.skybox and not self.skybox.fullscreen:
             # Desactivar escritura en depth buffer para que todo se dibuje "encima"
-            glDepthMask(GL_FALSE)
-            self.skybox.Render()
-            glDepthMask(GL_TRUE)
+            with prof.Scope("skybox", gpu=True):
+                glDepthMask(GL_FALSE)
+                self.skybox.Render()
+                glDepthMask(GL_TRUE)
 
         # ========== DIBUJAR MODELOS (al frente) ==========
-        if not self.activeShader:
-            return
-
-        # Activar shader y pasar matrices comunes
-        glUseProgram(self.activeShader)
-
-        # Tiempo para shaders animados (si se declara)
-        loc_time = glGetUniformLocation(self.activeShader, "uTime")
-        if loc_time != -1:
-            glUniform1f(loc_time, self.elapsedTime)
-
-        loc_view = glGetUniformLocation(self.activeShader, "viewMatrix")
-        loc_proj = glGetUniformLocation(self.activeShader, "projectionMatrix")
-        glUniformMatrix4fv(loc_view, 1, GL_FALSE, glm.value_ptr(self.camera.viewMatrix))
-        glUniformMatrix4fv(loc_proj, 1, GL_FALSE, glm.value_ptr(self.camera.projectionMatrix))
-
-        # Luz y cámara
-        glUniform3f(glGetUniformLocation(self.activeShader, "uLightPos"),
-                    self.pointLight.x, self.pointLight.y, self.pointLight.z)
-        glUniform3f(glGetUniformLocation(self.activeShader, "uViewPos"),
-                    self.camera.position.x, self.camera.position.y, self.camera.position.z)
-
-        # Dibujar cada modelo de la escena
-        for model in self.scene:
-            modelMatrix = model.GetModelMatrix()
-            loc_model = glGetUniformLocation(self.activeShader, "modelMatrix")
-            glUniformMatrix4fv(loc_model, 1, GL_FALSE, glm.value_ptr(modelMatrix))
-
-            # Color base (si no hay textura)
-            glUniform3f(glGetUniformLocation(self.activeShader, "uColor"), 0.85, 0.85, 0.85)
-
-            # Textura (solo si hay UVs)
-            has_tex = (len(model.textures) > 0) and getattr(model, "_has_uv", False)
-            glUniform1i(glGetUniformLocation(self.activeShader, "uHasTexture"), GL_TRUE if has_tex else GL_FALSE)
-            if has_tex:
-                glActiveTexture(GL_TEXTURE0)
-                glBindTexture(GL_TEXTURE_2D, model.textures[0])
-                glUniform1i(glGetUniformLocation(self.activeShader, "uTexture0"), 0)
-
-            # Dibujar
-            model.Render()
\ No newline at end of file
+        if self.activeProgram:
+            with prof.Scope("scene", gpu=True):
+                self._RenderScene(self.activeProgram)
+
+        # ========== SKYBOX FULLSCREEN (solo donde no hay modelos) ==========
+        if self.skybox and self.skybox.fullscreen:
+            with prof.Scope("skybox", gpu=True):
+                self.skybox.Render()
+
+        self._CollectStats(programs)
+
+        # Warm-up de shaders pendiente (presupuesto acotado por frame)
+        self.shaderCache.Update()
+
+        if self.showProfiler:
+            with prof.Scope("overlay"):
+                if self._profilerOverlay is None:
+                    self._profilerOverlay = ProfilerOverlay(prof)
+                self._profilerOverlay.Render(self.width, self.height)
+
+        if ownFrame:
+            prof.EndFrame(self.frameStats)
+
+    def SpatialIndex(self):
+        """BVH de la escena al día: se reconstruye si cambió la lista, si no solo refit"""
+        for m in self.scene:
+            if isinstance(m, InstancedModel):
+                m.UpdateBounds()
+        if self.sceneBVH.items != self.scene:
+            self.sceneBVH.Build(self.scene)
+        else:
+            self.sceneBVH.Refit()
+        return self.sceneBVH
+
+    def Pick(self, x, y):
+        """Modelo bajo el píxel (x, y) de la ventana (test contra su AABB), o None"""
+        self.camera.Update()
+        viewport = glm.vec4(0, 0, self.width, self.height)
+        near = glm.unProject(glm.vec3(x, self.height - y, 0.0), self.camera.viewMatrix,
+                             self.camera.projectionMatrix, viewport)
+        far = glm.unProject(glm.vec3(x, self.height - y, 1.0), self.camera.viewMatrix,
+                            self.camera.projectionMatrix, viewport)
+        hits, _ = self.SpatialIndex().QueryRay(near, glm.normalize(far - near))
+        return self.scene[hits[0]] if len(hits) else None
+
+    def _RenderScene(self, prog):
+        models = self.scene
+        programSlots = [1 if isinstance(m, InstancedModel) else 0 for m in models]
+        slots = [m._slot for m in models]
+
+        # Frustum culling de toda la escena en una pasada (esfera y AABB por slot)
+        if self.frustumCulling and models:
+            for m, slot in zip(models, programSlots):
+                if slot:
+                    m.UpdateBounds()
+            viewProj = self.camera.projectionMatrix * self.camera.viewMatrix
+            visible = self.culler.Cull(self.transforms, slots, viewProj).tolist()
+            models = [m for m, v in zip(models, visible) if v]
+            programSlots = [s for s, v in zip(programSlots, visible) if v]
+            slots = [s for s, v in zip(slots, visible) if v]
+
+        # Nivel de detalle por tamaño proyectado (con histéresis)
+        if self.levelOfDetail and models:
+            levels = self.lodSelector.Select(self.transforms, slots, [len(m.lods) for m in models],
+                                             self.camera.projectionMatrix, self.height).tolist()
+        else:
+            levels = [0] * len(models)
+        for m, level in zip(models, levels):
+            m.lodLevel = level
+
+        # Programa 0 = activo, 1 = su variante instanciada (matrices/color por instancia)
+        instanced = self._GetInstancedProgram() if any(programSlots) else None
+
+        # Orden por estado y de adelante hacia atrás; solo se emiten los cambios
+        self.renderQueue.Build(models, programSlots, self.transforms)
+        self.renderQueue.Submit((prog, instanced), self.profiler)
+
+    def _GetInstancedProgram(self):
+        if self.instancedProgram is None and self.vertexSource is not None:
+            try:
+                self.instancedProgram = self.shaderCache.Get(InstancedVertexShader(self.vertexSource),
+                                                             InstancedFragmentShader(self.fragmentSource))
+            except Exception as e:
+                print("✗ Error compilando variante instanciada:", e)
+                self.instancedProgram = False   # no reintentar hasta el próximo SetShaders
+        return self.instancedProgram or None
+
+    def _CollectStats(self, programs):
+        """Suma los contadores de uniforms del frame (llamadas GL ahorradas)"""
+        stats = {"uniform_uploads": 0, "uniform_skipped": 0, "location_lookups_saved": 0}
+        for p in programs:
+            stats["uniform_uploads"]        += p.stats["uploads"]
+            stats["uniform_skipped"]        += p.stats["skipped"]
+            stats["location_lookups_saved"] += p.stats["lookups_saved"]
+        stats["gl_calls_saved"] = stats["uniform_skipped"] + stats["location_lookups_saved"]
+        stats["transforms_recomputed"] = self.transforms.stats["recomputed"]
+        stats.update(self.renderQueue.stats)
+        stats["lod_switches"] = self.lodSelector.stats["switches"]
+        stats["culled"] = self.culler.stats["culled"]
+        stats["visible"] = self.culler.stats["visible"] if self.frustumCulling else len(self.scene)
+        self.frameStats = stats
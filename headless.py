@@ -0,0 +1,397 @@
+"""
+Render sin ventana (sin display ni GPU): contexto EGL sobre Mesa llvmpipe
+(u OSMesa) dibujando en un FBO, para previews en granjas de render.
+
+    python headless.py [--vertex twist_shader] [--fragment toon_shader] [--frames 120] [--fps 30]
+                       [--size 960x540] [--out render] [--format png|raw] [--model models/sphere.obj]
+
+Las rutas de --model / --texture / --out son relativas al directorio
+actual; sin --model / --texture se usan la esfera y la textura del repo.
+
+HeadlessContext reemplaza a la ventana de pygame: crea el contexto, deja
+ligado un FBO (color RGBA8 + depth24/stencil8) y tiene get_size(), así
+que gl.Renderer(HeadlessContext(w, h)) funciona sin cambios.
+
+FrameReader lee cada frame con glReadPixels a un anillo de PBOs
+(GL_PIXEL_PACK_BUFFER): el frame N se mapea recién cuando ya se pidió el
+N+1, así la copia no frena el frame siguiente. FrameWriter convierte y
+escribe en un hilo aparte (PNG numerados o RGB24 crudo para ffmpeg), con
+una cola acotada para que la memoria no crezca si el disco es más lento.
+
+PyOpenGL elige la plataforma al importar OpenGL: este módulo tiene que
+importarse antes que gl / model / etc. (o exportar PYOPENGL_PLATFORM=egl
+u osmesa).
+"""
+
+import os
+import sys
+
+if "OpenGL" in sys.modules and os.environ.get("PYOPENGL_PLATFORM") not in ("egl", "osmesa"):
+    print("⚠ headless: OpenGL ya estaba importado; exportar PYOPENGL_PLATFORM=egl antes de arrancar")
+os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+if os.environ["PYOPENGL_PLATFORM"] == "egl":
+    os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+import ctypes
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+from OpenGL.GL import *
+
+# El wrapper de PyOpenGL arma un array de salida; con PBO hay que pasar un offset
+from OpenGL.raw.GL.VERSION.GL_1_0 import glReadPixels as _glReadPixels
+
+ROOT = Path(__file__).resolve().parent
+
+GL_VERSION_REQUESTED = (4, 5)       # el skybox usa #version 450
+
+
+class HeadlessContext(object):
+    def __init__(self, width=960, height=540, platform=None):
+        self.width, self.height = width, height
+        self.platform = platform or os.environ["PYOPENGL_PLATFORM"]
+        self._egl = self._osmesa = None
+        if self.platform == "egl":
+            self._CreateEGL()
+        elif self.platform == "osmesa":
+            self._CreateOSMesa()
+        else:
+            raise RuntimeError(f"Plataforma headless no soportada: {self.platform}")
+        self._CreateFramebuffer()
+        print(f"✓ Contexto headless ({self.platform}): {glGetString(GL_RENDERER).decode()}, "
+              f"GL {glGetString(GL_VERSION).decode()}, {width}x{height}")
+
+    def get_size(self):
+        return self.width, self.height
+
+    def Close(self):
+        glDeleteFramebuffers(1, [self.fbo])
+        glDeleteRenderbuffers(2, [self.colorBuffer, self.depthBuffer])
+        if self._egl is not None:
+            from OpenGL import EGL
+            display, context = self._egl
+            EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+            EGL.eglDestroyContext(display, context)
+            EGL.eglTerminate(display)
+        if self._osmesa is not None:
+            from OpenGL import osmesa
+            osmesa.OSMesaDestroyContext(self._osmesa[0])
+        self._egl = self._osmesa = None
+
+    # -------------------- Interno ------------------------
+    def _CreateEGL(self):
+        from OpenGL import EGL
+        display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        if not display or not EGL.eglInitialize(display, None, None):
+            raise RuntimeError("EGL: no se pudo inicializar el display (¿Mesa instalado?)")
+
+        attrs = (EGL.EGLint * 5)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                                 EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT, EGL.EGL_NONE)
+        config, count = EGL.EGLConfig(), EGL.EGLint()
+        if not EGL.eglChooseConfig(display, attrs, ctypes.pointer(config), 1, ctypes.pointer(count)) \
+                or count.value == 0:
+            raise RuntimeError("EGL: ninguna configuración con OpenGL de escritorio")
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+
+        major, minor = GL_VERSION_REQUESTED
+        contextAttrs = (EGL.EGLint * 7)(EGL.EGL_CONTEXT_MAJOR_VERSION, major,
+                                        EGL.EGL_CONTEXT_MINOR_VERSION, minor,
+                                        EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK,
+                                        EGL.EGL_CONTEXT_OPENGL_COMPATIBILITY_PROFILE_BIT, EGL.EGL_NONE)
+        context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, contextAttrs)
+        if not context:
+            raise RuntimeError(f"EGL: no se pudo crear un contexto OpenGL {major}.{minor}")
+        # Sin superficie: todo se dibuja en el FBO
+        if not EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context):
+            raise RuntimeError("EGL: eglMakeCurrent sin superficie falló")
+        self._egl = (display, context)
+
+    def _CreateOSMesa(self):
+        from OpenGL import osmesa
+        major, minor = GL_VERSION_REQUESTED
+        attrs = (ctypes.c_int * 11)(osmesa.OSMESA_FORMAT, osmesa.OSMESA_RGBA,
+                                    osmesa.OSMESA_DEPTH_BITS, 24,
+                                    osmesa.OSMESA_PROFILE, osmesa.OSMESA_COMPAT_PROFILE,
+                                    osmesa.OSMESA_CONTEXT_MAJOR_VERSION, major,
+                                    osmesa.OSMESA_CONTEXT_MINOR_VERSION, minor, 0)
+        context = osmesa.OSMesaCreateContextAttribs(attrs, None)
+        if not context:
+            raise RuntimeError(f"OSMesa: no se pudo crear un contexto OpenGL {major}.{minor}")
+        # OSMesa exige un buffer propio; es mínimo porque se dibuja en el FBO
+        buffer = (ctypes.c_ubyte * 4)()
+        if not osmesa.OSMesaMakeCurrent(context, buffer, GL_UNSIGNED_BYTE, 1, 1):
+            raise RuntimeError("OSMesa: OSMesaMakeCurrent falló")
+        self._osmesa = (context, buffer)
+
+    def _CreateFramebuffer(self):
+        self.fbo = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+
+        self.colorBuffer = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.colorBuffer)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, self.width, self.height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, self.colorBuffer)
+
+        self.depthBuffer = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.depthBuffer)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH24_STENCIL8, self.width, self.height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_STENCIL_ATTACHMENT, GL_RENDERBUFFER,
+                                  self.depthBuffer)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError(f"FBO incompleto: 0x{int(status):04x}")
+        # Queda ligado: el Renderer dibuja en él como si fuera la ventana
+
+
+class FrameReader(object):
+    """Lectura asíncrona del framebuffer con un anillo de `buffers` PBOs"""
+
+    def __init__(self, width, height, buffers=2):
+        self.width, self.height = width, height
+        self.size = width * height * 4
+        self.pbos = [int(p) for p in np.atleast_1d(glGenBuffers(buffers))]
+        for pbo in self.pbos:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+            glBufferData(GL_PIXEL_PACK_BUFFER, self.size, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self._free = deque(self.pbos)
+        self._pending = deque()     # (pbo, tag) en orden de pedido
+
+    def Request(self, tag=None):
+        """Encola la lectura del frame actual; devuelve [(tag, rgba)] de los que ya se pueden mapear"""
+        ready = []
+        if not self._free:
+            ready.append(self._Collect())
+        pbo = self._free.popleft()
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+        _glReadPixels(0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self._pending.append((pbo, tag))
+        # Anillo de 2: se mapea el anterior mientras el actual sigue en vuelo
+        while len(self._pending) >= len(self.pbos):
+            ready.append(self._Collect())
+        return ready
+
+    def Flush(self):
+        """Los frames que quedan en vuelo"""
+        return [self._Collect() for _ in range(len(self._pending))]
+
+    def Delete(self):
+        glDeleteBuffers(len(self.pbos), self.pbos)
+        self.pbos, self._free, self._pending = [], deque(), deque()
+
+    def _Collect(self):
+        pbo, tag = self._pending.popleft()
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+        ptr = glMapBufferRange(GL_PIXEL_PACK_BUFFER, 0, self.size, GL_MAP_READ_BIT)
+        frame = np.empty((self.height, self.width, 4), np.uint8)
+        ctypes.memmove(frame.ctypes.data, ptr, self.size)
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self._free.append(pbo)
+        return tag, frame
+
+
+class FrameWriter(object):
+    """Hilo que escribe frames RGBA (filas de abajo hacia arriba, como los da GL)"""
+
+    FORMATS = ("png", "raw")
+
+    def __init__(self, outDir, fmt="png", queueSize=8, prefix="frame"):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Formato desconocido: {fmt} (usar {', '.join(self.FORMATS)})")
+        self.outDir = Path(outDir)
+        self.outDir.mkdir(parents=True, exist_ok=True)
+        self.format = fmt
+        self.prefix = prefix
+        self.written = 0
+        self.writeTime = 0.0
+        self.rawPath = self.outDir / f"{prefix}s.rgb"
+        self._error = None
+        self._queue = queue.Queue(maxsize=queueSize)
+        self._thread = threading.Thread(target=self._Run, name="frame-writer", daemon=True)
+        self._thread.start()
+
+    def Put(self, index, rgba):
+        """Encola un frame (bloquea si el escritor va atrasado: memoria acotada)"""
+        if self._error is not None:
+            raise self._error
+        self._queue.put((index, rgba))
+
+    def Close(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _Run(self):
+        raw = open(self.rawPath, "wb") if self.format == "raw" else None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                if self._error is not None:
+                    continue        # vaciar la cola para que Put() no quede bloqueado
+                index, rgba = item
+                start = time.perf_counter()
+                rgb = np.ascontiguousarray(rgba[::-1, :, :3])
+                if raw is not None:
+                    raw.write(rgb.tobytes())
+                else:
+                    _SavePNG(self.outDir / f"{self.prefix}_{index:05d}.png", rgb)
+                self.writeTime += time.perf_counter() - start
+                self.written += 1
+        except Exception as e:
+            self._error = e
+            while self._queue.get() is not None:
+                pass
+        finally:
+            if raw is not None:
+                raw.close()
+
+
+def _SavePNG(path, rgb):
+    import pygame      # solo image/surfarray: no abre display
+    h, w = rgb.shape[:2]
+    pygame.image.save(pygame.image.frombuffer(rgb.tobytes(), (w, h), "RGB"), str(path))
+
+
+# ------------------------------------------------------------
+# Escena y loop de paso fijo
+# ------------------------------------------------------------
+SKYBOX_FACES = ["skybox/right.jpg", "skybox/left.jpg", "skybox/top.jpg",
+                "skybox/bottom.jpg", "skybox/front.jpg", "skybox/back.jpg"]
+
+
+def BuildScene(rend, modelPath="models/sphere.obj", texturePath="textures/0000.jpg.jpeg", skybox=True):
+    """La escena de RendererOpenGL2025.py (modelo, textura, luz, skybox); devuelve el modelo"""
+    from model import Model
+
+    glDisable(GL_CULL_FACE)
+    rend.pointLight.x, rend.pointLight.y, rend.pointLight.z = 2.0, 2.0, 2.0
+    if skybox:
+        rend.CreateSkybox(SKYBOX_FACES)
+
+    model = Model(modelPath)
+    if texturePath:
+        try:
+            model.AddTexture(texturePath)
+        except Exception as e:
+            print("⚠ Sin textura:", e)
+    model.position = (0.0, -0.5, -4.0)
+    model.scale = (1.8, 1.8, 1.8)
+    model.rotation = (0.0, 180.0, 0.0)
+    rend.scene.append(model)
+
+    # Determinismo: todas las texturas en GPU antes del primer frame
+    rend.assets.Wait()
+    return model
+
+
+def RenderFrames(rend, reader, writer, frames, fps, model=None, spin=30.0, startTime=0.0):
+    """N frames a paso fijo 1/fps (tiempo y rotación de la escena); devuelve stats de tiempo"""
+    stats = {"frames": frames, "render_s": 0.0, "readback_s": 0.0, "wall_s": 0.0}
+    baseRotation = float(model.rotation[1]) if model is not None else 0.0
+    wall = time.perf_counter()
+
+    def emit(ready):
+        for index, rgba in ready:
+            writer.Put(index, rgba)
+
+    for i in range(frames):
+        t = startTime + i / fps
+        rend.elapsedTime = t
+        if model is not None:
+            model.rotation.y = baseRotation + spin * t
+
+        start = time.perf_counter()
+        rend.Render()
+        stats["render_s"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        ready = reader.Request(i)
+        stats["readback_s"] += time.perf_counter() - start
+        emit(ready)
+
+    start = time.perf_counter()
+    ready = reader.Flush()
+    stats["readback_s"] += time.perf_counter() - start
+    emit(ready)
+    writer.Close()
+    stats["wall_s"] = time.perf_counter() - wall
+    stats["write_s"] = writer.writeTime
+    return stats
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Render sin ventana (EGL/OSMesa + FBO) de N frames")
+    ap.add_argument("--vertex", default="vertex_shader", help="nombre en vertexShaders.py")
+    ap.add_argument("--fragment", default="fragment_shader", help="nombre en fragmentShaders.py")
+    ap.add_argument("--frames", type=int, default=120)
+    ap.add_argument("--fps", type=float, default=30.0, help="paso fijo de la animación")
+    ap.add_argument("--size", default="960x540", help="ANCHOxALTO")
+    ap.add_argument("--out", default="render", help="directorio de salida")
+    ap.add_argument("--format", choices=FrameWriter.FORMATS, default="png")
+    ap.add_argument("--model", help="OBJ (por defecto models/sphere.obj del repo)")
+    ap.add_argument("--texture", help="imagen (por defecto textures/0000.jpg.jpeg del repo)")
+    ap.add_argument("--no-skybox", action="store_true")
+    args = ap.parse_args(argv)
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    # Las rutas del usuario se resuelven antes del chdir, como en preview.py
+    modelPath = Path(args.model).resolve() if args.model else ROOT / "models" / "sphere.obj"
+    texturePath = Path(args.texture).resolve() if args.texture else ROOT / "textures" / "0000.jpg.jpeg"
+    outDir = Path(args.out).resolve()
+    os.chdir(ROOT)                                  # rutas relativas del skybox y los shaders
+
+    import vertexShaders
+    import fragmentShaders
+    from gl import Renderer
+
+    vs = getattr(vertexShaders, args.vertex, None)
+    fs = getattr(fragmentShaders, args.fragment, None)
+    if not isinstance(vs, str) or not isinstance(fs, str):
+        ap.error(f"shader desconocido: {args.vertex if not isinstance(vs, str) else args.fragment}")
+
+    context = HeadlessContext(width, height)
+    rend = Renderer(context)
+    rend.SetShaders(vs, fs)
+    if rend.activeProgram is None:
+        return 1
+    model = BuildScene(rend, str(modelPath), str(texturePath), skybox=not args.no_skybox)
+
+    reader = FrameReader(width, height)
+    writer = FrameWriter(str(outDir), args.format)
+    stats = RenderFrames(rend, reader, writer, args.frames, args.fps, model)
+
+    n = stats["frames"]
+    print(f"✓ {n} frames {width}x{height} ({args.vertex} + {args.fragment}) en {stats['wall_s']:.2f} s: "
+          f"{n / max(stats['wall_s'], 1e-9):.1f} fps")
+    print(f"  render {stats['render_s'] / max(n, 1) * 1e3:.1f} ms/frame, "
+          f"lectura {stats['readback_s'] / max(n, 1) * 1e3:.1f} ms/frame, "
+          f"escritura {stats['write_s'] / max(n, 1) * 1e3:.1f} ms/frame (en otro hilo)")
+    if args.format == "raw":
+        print(f"  ffmpeg -f rawvideo -pix_fmt rgb24 -s {width}x{height} -r {args.fps:g} "
+              f"-i {writer.rawPath} video.mp4")
+    else:
+        print(f"  {writer.written} PNG en {writer.outDir}/")
+
+    reader.Delete()
+    rend.assets.Shutdown()
+    context.Close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
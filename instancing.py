@@ -0,0 +1,222 @@
+"""
+Rendering instanciado: muchas copias de la misma malla en un solo draw.
+
+InstancedModel guarda la transformación de cada instancia (posición,
+rotación en grados, escala y color) en arrays NumPy, compone todas las
+matrices en una pasada vectorizada y las sube como atributos de vértice
+con divisor 1 (locations 3-6 = columnas de la matriz, 7 = color). El
+dibujo es un único glDrawElementsInstanced / glDrawArraysInstanced.
+
+Los shaders de vertexShaders.py / fragmentShaders.py se adaptan con
+InstancedVertexShader / InstancedFragmentShader: `modelMatrix` pasa a ser
+el atributo de instancia y `uColor` el color de la instancia, así que el
+cuerpo de cada shader no cambia.
+"""
+
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+
+from model import Model
+from transforms import ComposeModelMatrices, GlmToNumpy, ToColumnMajor
+
+INSTANCE_MATRIX_LOCATION = 3     # ocupa 3, 4, 5 y 6
+INSTANCE_COLOR_LOCATION  = 7
+_INSTANCE_FLOATS = 16 + 3
+
+
+def InstancedVertexShader(source):
+    """Variante instanciada de un vertex shader del repo"""
+    if "uniform mat4 modelMatrix;" not in source:
+        raise ValueError("El vertex shader no declara 'uniform mat4 modelMatrix;'")
+    return source.replace("uniform mat4 modelMatrix;",
+                          f"layout (location={INSTANCE_MATRIX_LOCATION}) in mat4 modelMatrix;\n"
+                          f"layout (location={INSTANCE_COLOR_LOCATION}) in vec3 inInstanceColor;\n"
+                          "flat out vec3 vInstanceColor;", 1) \
+                 .replace("void main() {", "void main() {\n    vInstanceColor = inInstanceColor;", 1)
+
+
+def InstancedFragmentShader(source):
+    """Variante instanciada de un fragment shader: uColor sale de la instancia"""
+    for decl in ("uniform vec3      uColor;", "uniform vec3 uColor;"):
+        if decl in source:
+            return source.replace(decl, "flat in vec3 vInstanceColor;\n#define uColor vInstanceColor", 1)
+    return source
+
+
+class InstancedModel(Model):
+    def __init__(self, objPath: str, useCache: bool = True, compact: bool = False, lods: bool = True,
+                 normalMode: str = "area", creaseAngle: float | None = None, optimize: bool = False):
+        super().__init__(objPath, useCache, compact=compact, lods=lods, normalMode=normalMode,
+                         creaseAngle=creaseAngle, optimize=optimize)
+
+        # Transformaciones por instancia (structure of arrays). Los arrays de
+        # respaldo crecen al doble como el VBO; instancePositions & co. son
+        # vistas de las primeras _count filas.
+        self._positions = np.zeros((0, 3), np.float32)
+        self._rotations = np.zeros((0, 3), np.float32)   # grados
+        self._scales    = np.zeros((0, 3), np.float32)
+        self._colors    = np.zeros((0, 3), np.float32)
+        self._count = 0
+
+        self.instance_count = 0
+        self._capacity = 0
+        self._dirty = True
+        self._boundsDirty = True
+        self._lastParent = None
+        self._instanceData = np.zeros((0, _INSTANCE_FLOATS), np.float32)
+
+        self.instanceVbo = glGenBuffers(1)
+        self._SetupInstanceAttributes()
+
+    # --------------- Instancias ---------------
+    # Vistas (n, 3): se pueden modificar in-place y luego llamar MarkDirty()
+    @property
+    def instancePositions(self):
+        return self._positions[:self._count]
+
+    @property
+    def instanceRotations(self):
+        return self._rotations[:self._count]
+
+    @property
+    def instanceScales(self):
+        return self._scales[:self._count]
+
+    @property
+    def instanceColors(self):
+        return self._colors[:self._count]
+
+    def SetInstances(self, positions, rotations=None, scales=None, colors=None):
+        positions = np.asarray(positions, np.float32).reshape(-1, 3)
+        n = len(positions)
+        self._positions = positions.copy()
+        self._rotations = _Broadcast(rotations, n, 0.0)
+        self._scales    = _Broadcast(scales, n, 1.0)
+        self._colors    = _Broadcast(colors, n, 0.85)
+        self._count = n
+        self.MarkDirty()
+
+    def AddInstance(self, position, rotation=(0.0, 0.0, 0.0), scale=1.0, color=(0.85, 0.85, 0.85)):
+        i = self._count
+        if i == len(self._positions):
+            self._Reserve(max(16, 2 * i))
+        self._positions[i] = _Broadcast(position, 1, 0.0)
+        self._rotations[i] = _Broadcast(rotation, 1, 0.0)
+        self._scales[i]    = _Broadcast(scale, 1, 1.0)
+        self._colors[i]    = _Broadcast(color, 1, 0.85)
+        self._count = i + 1
+        self.MarkDirty()
+        return i
+
+    def MarkDirty(self):
+        """Llamar tras modificar in-place instancePositions/Rotations/Scales/Colors"""
+        self._dirty = True
+        self._boundsDirty = True
+
+    def UpdateBounds(self):
+        """Volumen del slot = unión de las AABB de todas las instancias (espacio del Model)"""
+        if not self._boundsDirty:
+            return
+        n = self._count
+        if n == 0:
+            self._transforms.SetBounds(self._slot, self.aabbMin, self.aabbMax)
+        else:
+            local = ComposeModelMatrices(self.instancePositions, self.instanceRotations, self.instanceScales)
+            basis = local[:, :3, :3]
+            center = (self.aabbMin + self.aabbMax) * 0.5
+            extent = (self.aabbMax - self.aabbMin) * 0.5
+            centers = basis @ center + local[:, :3, 3]
+            extents = np.abs(basis) @ extent
+            self._transforms.SetBounds(self._slot, (centers - extents).min(axis=0),
+                                       (centers + extents).max(axis=0))
+        self._boundsDirty = False
+
+    def UpdateInstances(self):
+        """Recompone y sube las matrices si algo cambió (incluida la transformación del Model)"""
+        parent = self.GetModelMatrix()
+        if not self._dirty and self._lastParent is not None and parent == self._lastParent:
+            return
+
+        n = self._count
+        local = ComposeModelMatrices(self.instancePositions, self.instanceRotations, self.instanceScales)
+        world = np.matmul(GlmToNumpy(parent), local)
+
+        if len(self._instanceData) < n:
+            self._instanceData = np.empty((max(n, 2 * len(self._instanceData)), _INSTANCE_FLOATS), np.float32)
+        data = self._instanceData[:n]
+        data[:, :16] = ToColumnMajor(world)
+        data[:, 16:] = self.instanceColors
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.instanceVbo)
+        if n > self._capacity:
+            # Crece al doble para no reasignar en cada AddInstance
+            self._capacity = max(n, 2 * self._capacity)
+            glBufferData(GL_ARRAY_BUFFER, self._capacity * _INSTANCE_FLOATS * 4, None, GL_DYNAMIC_DRAW)
+        if n > 0:
+            glBufferSubData(GL_ARRAY_BUFFER, 0, data.nbytes, data)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        self.instance_count = n
+        self._lastParent = parent
+        self._dirty = False
+
+    # --------------- Render ---------------
+    def Render(self):
+        glBindVertexArray(self.vao)
+        self.Draw()
+        glBindVertexArray(0)
+
+    def Draw(self):
+        self.UpdateInstances()
+        if self.instance_count == 0:
+            return 0
+        if self.index_count > 0:
+            if self.lodLevel == 0:
+                glDrawElementsInstanced(GL_TRIANGLES, self.index_count, self.index_type, None,
+                                        self.instance_count)
+                return self.index_count // 3 * self.instance_count
+            offset, count, base = self.lods[self.lodLevel]
+            glDrawElementsInstancedBaseVertex(GL_TRIANGLES, count, self.index_type, ctypes.c_void_p(offset),
+                                              self.instance_count, base)
+            return count // 3 * self.instance_count
+        glDrawArraysInstanced(GL_TRIANGLES, 0, self.vertex_count, self.instance_count)
+        return self.vertex_count // 3 * self.instance_count
+
+    # --------------- Interno ---------------
+    def _Reserve(self, capacity):
+        """Agranda los arrays de respaldo conservando las primeras _count filas"""
+        for name in ("_positions", "_rotations", "_scales", "_colors"):
+            old = getattr(self, name)
+            grown = np.zeros((capacity, 3), np.float32)
+            grown[:self._count] = old[:self._count]
+            setattr(self, name, grown)
+
+    def _SetupInstanceAttributes(self):
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instanceVbo)
+
+        stride = _INSTANCE_FLOATS * 4
+        for col in range(4):
+            loc = INSTANCE_MATRIX_LOCATION + col
+            glEnableVertexAttribArray(loc)
+            glVertexAttribPointer(loc, 4, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(col * 16))
+            glVertexAttribDivisor(loc, 1)
+
+        glEnableVertexAttribArray(INSTANCE_COLOR_LOCATION)
+        glVertexAttribPointer(INSTANCE_COLOR_LOCATION, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(64))
+        glVertexAttribDivisor(INSTANCE_COLOR_LOCATION, 1)
+
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+
+def _Broadcast(value, n, default):
+    """None / escalar / (3,) / (n,3) -> (n,3) float32"""
+    if value is None:
+        return np.full((n, 3), default, np.float32)
+    arr = np.asarray(value, np.float32)
+    if arr.ndim == 0:
+        arr = np.full(3, float(arr), np.float32)
+    return np.ascontiguousarray(np.broadcast_to(arr, (n, 3)), dtype=np.float32)
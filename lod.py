@@ -0,0 +1,313 @@
+"""
+Niveles de detalle (LOD): simplificación con quádricas y selección por
+tamaño en pantalla.
+
+Simplify() reduce una malla empaquetada (P [T] [N] interleaved + índices)
+con métricas de error cuadráticas (QEM) sobre una grilla: cada celda
+acumula las quádricas de los triángulos que la tocan y sus vértices se
+funden en el punto que minimiza ese error (Lindstrom, "Out-of-core
+simplification"). Es la variante por agrupamiento de la QEM de Garland y
+Heckbert: no hay colapsos de aristas uno a uno, así que todo es NumPy y
+corre en la carga. La resolución de la grilla se busca cerca de una
+estimación (los triángulos crecen con el cuadrado de la resolución: cada
+nivel parte de la del anterior) y se afina por bisección hasta quedar a
+~6% del número de triángulos pedido. Las pruebas solo cuentan triángulos
+(celdas + degenerados + repetidos, sin resolver las quádricas); el
+agrupamiento completo se hace una vez, con la resolución elegida.
+
+BuildLODs() genera la cadena de niveles y los concatena en un único
+VBO/EBO; cada nivel es (offset en bytes del EBO, índices, vértice base)
+y se dibuja con glDrawElementsBaseVertex.
+
+LODSelector elige el nivel de cada modelo según el diámetro proyectado
+de su esfera envolvente (relativo al alto de la ventana, así no depende
+de la resolución), con histéresis para que no salte de nivel en
+cada frame cerca de un umbral.
+"""
+
+import numpy as np
+
+# Fracción de triángulos del nivel 0 que se pide para cada nivel
+LOD_RATIOS = (1.0, 0.25, 0.0625, 0.015625)
+MIN_TRIANGLES = 16
+
+MAX_RESOLUTION = 1024      # celdas por eje (lado más largo de la AABB)
+PROBE_RESOLUTION = 64      # primera prueba cuando no hay estimación
+RESOLUTION_TOLERANCE = 16  # la bisección para cuando el intervalo es <= res / 16
+
+# Diámetro proyectado (fracción del alto del viewport) por debajo del cual se pasa al nivel i+1
+LOD_SCREEN_SIZES = (0.6, 0.25, 0.1)
+LOD_HYSTERESIS = 0.15
+
+
+# ------------------------------------------------------------
+# Simplificación
+# ------------------------------------------------------------
+def Simplify(vertices, indices, stride, targetTriangles, resolution=None):
+    """(vértices (n*stride,), índices) -> malla con ~targetTriangles triángulos (mismo layout)"""
+    out, idx, _ = _Simplify(vertices, indices, stride, targetTriangles, resolution)
+    return out, idx
+
+
+def BuildLODs(vertices, indices, stride, ratios=LOD_RATIOS):
+    """Nivel 0 + simplificados concatenados -> (vértices, índices, [(offset bytes, count, base)])"""
+    vertices = np.asarray(vertices, np.float32).reshape(-1)
+    indices = np.asarray(indices)
+    levels = [(0, len(indices), 0)]
+    if len(indices) == 0:
+        return vertices, indices, levels
+
+    allVerts, allIndices = [vertices], [indices]
+    vertexCount, indexCount = len(vertices) // stride, len(indices)
+    triangles = len(indices) // 3
+    previous = None     # (resolución, triángulos) del nivel anterior
+    for ratio in ratios[1:]:
+        target = int(triangles * ratio)
+        if target < MIN_TRIANGLES:
+            break
+        # Triángulos ~ res^2: la estimación sale de escalar la resolución del nivel anterior
+        guess = previous[0] * np.sqrt(target / previous[1]) if previous else None
+        v, i, res = _Simplify(vertices, indices, stride, target, guess)
+        if len(i) == 0 or len(i) >= 0.8 * len(allIndices[-1]):
+            break
+        levels.append((indexCount * indices.dtype.itemsize, len(i), vertexCount))
+        allVerts.append(v)
+        allIndices.append(i)
+        vertexCount += len(v) // stride
+        indexCount += len(i)
+        previous = (res, max(len(i) // 3, 1))
+
+    return np.concatenate(allVerts), np.concatenate(allIndices).astype(indices.dtype), levels
+
+
+def _Simplify(vertices, indices, stride, targetTriangles, resolution=None):
+    """Simplify + resolución de grilla elegida (estimación para el nivel siguiente)"""
+    verts = np.asarray(vertices, np.float32).reshape(-1, stride)
+    tris = np.asarray(indices).reshape(-1, 3).astype(np.int64)
+    if len(tris) <= targetTriangles:
+        return verts.reshape(-1), np.asarray(indices), MAX_RESOLUTION
+
+    positions = verts[:, :3].astype(np.float64)
+    quadrics = _FaceQuadrics(positions, tris)
+    lo, hi = positions.min(axis=0), positions.max(axis=0)
+
+    # El conteo no descarta los triángulos dados vuelta, así que es una cota
+    # superior del resultado final: lo que entra en el conteo entra en la malla
+    counts = {}
+
+    def fits(res):
+        if res not in counts:
+            counts[res] = _CountTriangles(positions, tris, lo, hi, res)
+        return counts[res] <= targetTriangles
+
+    if resolution is None:
+        fits(PROBE_RESOLUTION)
+        resolution = PROBE_RESOLUTION * np.sqrt(targetTriangles / max(counts[PROBE_RESOLUTION], 1))
+    res = int(np.clip(round(resolution), 1, MAX_RESOLUTION))
+
+    # Intervalo [low que entra, high que no] alrededor de la estimación, con pasos crecientes
+    step = max(1, res // 8)
+    if fits(res):
+        low, high = res, None
+        while high is None and low < MAX_RESOLUTION:
+            nxt = min(low + step, MAX_RESOLUTION)
+            if fits(nxt):
+                low = nxt
+            else:
+                high = nxt
+            step *= 2
+        if high is None:
+            high = low + 1
+    else:
+        low, high = None, res
+        while low is None:
+            nxt = max(high - step, 1)
+            if fits(nxt) or nxt == 1:
+                low = nxt
+            else:
+                high = nxt
+            step *= 2
+
+    # Bisección hasta la tolerancia: low siempre entra en el presupuesto
+    while high - low > max(1, low // RESOLUTION_TOLERANCE):
+        mid = (low + high) // 2
+        if fits(mid):
+            low = mid
+        else:
+            high = mid
+
+    out, idx = _Cluster(verts, positions, tris, quadrics, lo, hi, low)
+    return out.reshape(-1), idx.astype(np.asarray(indices).dtype), low
+
+
+def _FaceQuadrics(positions, tris):
+    """(m,10) quádricas de plano por triángulo (triángulo superior de la 4x4), pesadas por área"""
+    p0, p1, p2 = positions[tris[:, 0]], positions[tris[:, 1]], positions[tris[:, 2]]
+    n = np.cross(p1 - p0, p2 - p0)
+    area2 = np.linalg.norm(n, axis=1)
+    n = n / np.maximum(area2, 1e-30)[:, None]
+    plane = np.column_stack((n, -(n * p0).sum(axis=1)))
+    a, b, c, d = plane.T
+    w = area2 * 0.5
+    return np.column_stack((a * a, a * b, a * c, a * d, b * b, b * c, b * d, c * c, c * d, d * d)) * w[:, None]
+
+
+def _Cells(positions, lo, hi, res):
+    """(lado de celda, celda (x,y,z) de cada vértice, índice de celda compacto, celdas ocupadas)"""
+    size = max(float((hi - lo).max()), 1e-9) / res
+    grid = np.floor((positions - lo) / size).astype(np.int64)
+    grid = np.clip(grid, 0, res)
+    key = (grid[:, 0] * (res + 1) + grid[:, 1]) * (res + 1) + grid[:, 2]
+    cells, cellOf = np.unique(key, return_inverse=True)
+    return size, grid, cellOf.reshape(-1), len(cells)
+
+
+def _CountTriangles(positions, tris, lo, hi, res):
+    """Triángulos que deja _Cluster con esta resolución, sin contar los que descarta por darse vuelta"""
+    _, _, cellOf, k = _Cells(positions, lo, hi, res)
+    triCells = cellOf[tris]
+    keep = (triCells[:, 0] != triCells[:, 1]) & (triCells[:, 1] != triCells[:, 2]) & \
+           (triCells[:, 0] != triCells[:, 2])
+    return len(np.unique(_TriangleKeys(triCells[keep], k)))
+
+
+def _TriangleKeys(triCells, k):
+    """Clave por triángulo independiente del orden de sus vértices (celdas ordenadas)"""
+    s = np.sort(triCells, axis=1)
+    if k ** 3 < 2 ** 62:
+        return (s[:, 0] * k + s[:, 1]) * k + s[:, 2]
+    return np.unique(s, axis=0, return_inverse=True)[1].reshape(-1)
+
+
+def _Cluster(verts, positions, tris, faceQuadrics, lo, hi, res):
+    """Funde los vértices de cada celda de la grilla en el punto de mínimo error"""
+    size, grid, cellOf, k = _Cells(positions, lo, hi, res)
+
+    # Quádrica de cada celda = suma de las de los triángulos que tocan sus vértices
+    triCells = cellOf[tris]
+    Q = np.empty((k, 10))
+    for j in range(10):
+        Q[:, j] = np.bincount(triCells.reshape(-1), weights=np.repeat(faceQuadrics[:, j], 3), minlength=k)
+
+    # Punto óptimo: A x = -b; si el sistema es casi singular o cae fuera de la celda, el centroide
+    counts = np.bincount(cellOf, minlength=k).astype(np.float64)
+    centroid = np.stack([np.bincount(cellOf, weights=positions[:, a], minlength=k) for a in range(3)],
+                        axis=1) / counts[:, None]
+    A = np.empty((k, 3, 3))
+    A[:, 0, 0], A[:, 0, 1], A[:, 0, 2] = Q[:, 0], Q[:, 1], Q[:, 2]
+    A[:, 1, 0], A[:, 1, 1], A[:, 1, 2] = Q[:, 1], Q[:, 4], Q[:, 5]
+    A[:, 2, 0], A[:, 2, 1], A[:, 2, 2] = Q[:, 2], Q[:, 5], Q[:, 7]
+    b = Q[:, [3, 6, 8]]
+    det = np.linalg.det(A)
+    scale = np.abs(A).sum(axis=(1, 2)) ** 3 + 1e-300
+    solvable = np.abs(det) > 1e-9 * scale
+    point = centroid.copy()
+    if solvable.any():
+        x = np.linalg.solve(A[solvable], -b[solvable][:, :, None])[:, :, 0]
+        cellLo = lo + grid[np.unique(cellOf, return_index=True)[1]][solvable] * size
+        inside = np.all((x >= cellLo - 0.5 * size) & (x <= cellLo + 1.5 * size), axis=1)
+        rows = np.flatnonzero(solvable)[inside]
+        point[rows] = x[inside]
+    point = np.clip(point, lo, hi)      # dentro de la AABB original (la usa el culling)
+
+    # Atributos (UV) del vértice de la celda más cercano al punto
+    dist = ((positions - point[cellOf]) ** 2).sum(axis=1)
+    order = np.lexsort((dist, cellOf))
+    first = order[np.r_[0, np.flatnonzero(np.diff(cellOf[order])) + 1]]
+    out = verts[first].copy()
+    out[:, :3] = point
+
+    # Normales: promedio de la celda (layout de Model.PackObj: las normales son los 3 últimos floats)
+    stride = verts.shape[1]
+    if stride in (6, 8):
+        normals = np.stack([np.bincount(cellOf, weights=verts[:, stride - 3 + a], minlength=k)
+                            for a in range(3)], axis=1)
+        length = np.linalg.norm(normals, axis=1, keepdims=True)
+        out[:, stride - 3:] = np.where(length > 1e-12, normals / np.maximum(length, 1e-12),
+                                       out[:, stride - 3:])
+
+    # Triángulos: fuera los degenerados y los repetidos
+    keep = (triCells[:, 0] != triCells[:, 1]) & (triCells[:, 1] != triCells[:, 2]) & \
+           (triCells[:, 0] != triCells[:, 2])
+    # ... y los que quedan dados vuelta respecto del original (pliegues del agrupamiento)
+    p0, p1, p2 = positions[tris[:, 0]], positions[tris[:, 1]], positions[tris[:, 2]]
+    before = np.cross(p1 - p0, p2 - p0)
+    q0, q1, q2 = point[triCells[:, 0]], point[triCells[:, 1]], point[triCells[:, 2]]
+    after = np.cross(q1 - q0, q2 - q0)
+    keep &= (before * after).sum(axis=1) > 0.0
+    triCells = triCells[keep]
+    if len(triCells):
+        _, unique = np.unique(_TriangleKeys(triCells, k), return_index=True)
+        triCells = triCells[np.sort(unique)]
+
+    # Compactar: solo las celdas que quedan referenciadas
+    used = np.zeros(k, np.bool_)
+    used[triCells.reshape(-1)] = True
+    remap = np.cumsum(used) - 1
+    return out[used], remap[triCells].reshape(-1)
+
+
+# ------------------------------------------------------------
+# Selección por frame
+# ------------------------------------------------------------
+class LODSelector(object):
+    def __init__(self, screenSizes=LOD_SCREEN_SIZES, hysteresis=LOD_HYSTERESIS):
+        self.screenSizes = np.asarray(screenSizes, np.float32)
+        self.hysteresis = hysteresis
+        self.levels = np.zeros(64, np.int64)     # nivel actual por slot del TransformStore
+        self.generations = np.zeros(64, np.int64)  # generación del slot a la que corresponde `levels`
+        self.stats = {"switches": 0}
+
+    def ResetStats(self):
+        for k in self.stats:
+            self.stats[k] = 0
+
+    def Select(self, store, slots, levelCounts, projectionMatrix, viewportHeight):
+        """Nivel por slot (N,) a partir de model-view del store (ya actualizado con la vista)"""
+        slots = np.asarray(slots, np.int64)
+        if not len(slots):
+            return np.zeros(0, np.int64)
+        if slots.max() >= len(self.levels):
+            capacity = max(2 * len(self.levels), int(slots.max()) + 1)
+            for name in ("levels", "generations"):
+                old = getattr(self, name)
+                grown = np.zeros(capacity, np.int64)
+                grown[:len(old)] = old
+                setattr(self, name, grown)
+
+        # Slots liberados y vueltos a ocupar (TransformStore.Free): otro objeto, sin historia
+        generations = store.generations[slots]
+        reused = slots[self.generations[slots] != generations]
+        if len(reused):
+            self.levels[reused] = 0
+            self.generations[reused] = store.generations[reused]
+
+        size = ScreenDiameters(store, slots, projectionMatrix, viewportHeight) / viewportHeight
+
+        # Más grueso solo al bajar claramente del umbral, más fino solo al superarlo claramente
+        coarser = (size[:, None] < self.screenSizes * (1.0 - self.hysteresis)).sum(axis=1)
+        finer = (size[:, None] < self.screenSizes * (1.0 + self.hysteresis)).sum(axis=1)
+        current = self.levels[slots]
+        level = np.where(coarser > current, coarser, np.where(finer < current, finer, current))
+        level = np.minimum(level, np.asarray(levelCounts, np.int64) - 1)
+
+        self.stats["switches"] += int((level != current).sum())
+        self.levels[slots] = level
+        return level
+
+
+def ScreenDiameters(store, slots, projectionMatrix, viewportHeight):
+    """Diámetro en píxeles de la esfera envolvente de cada slot (inf si no tiene volumen)"""
+    modelView = store.modelView[slots]
+    basis = store.matrices[slots, :3, :3]
+    center = np.einsum("nij,nj->ni", modelView[:, :3, :3], store.boundsCenter[slots]) + modelView[:, :3, 3]
+    radius = store.boundsRadius[slots] * np.sqrt((basis * basis).sum(axis=1).max(axis=1))
+
+    # proj[1][1] = cot(fov/2): tamaño proyectado = r * cot / distancia (en NDC, alto 2)
+    focal = float(projectionMatrix[1][1])
+    depth = np.maximum(-center[:, 2], 1e-6)
+    with np.errstate(invalid="ignore"):
+        size = radius * focal / depth * viewportHeight
+    size[~np.isfinite(store.boundsRadius[slots])] = np.inf
+    size[-center[:, 2] <= radius] = np.inf          # la cámara está dentro o muy cerca
+    return size
@@ -0,0 +1,336 @@
+"""
+Caché binaria de mallas ya empaquetadas (vértices interleaved + índices).
+
+Cada OBJ se guarda en <CACHE_DIR>/<hash de la ruta>.mesh con una cabecera
+versionada seguida de los datos crudos, listos para glBufferData:
+
+    [cabecera 512 B][vértices float32][índices uint16/uint32]
+
+Vértices e índices incluyen todos los niveles de detalle (lod.BuildLODs),
+reordenados por meshopt si se optimizó (FLAG_OPTIMIZED); la cabecera
+guarda la tabla (offset en bytes, índices, vértice base) y, con meshopt,
+el ACMR/ATVR del nivel 0 antes y después. Las entradas que escribe
+Model(..., lods=False) llevan solo el nivel 0 (sin FLAG_LODS), y las de
+Model(..., optimize=False) van sin reordenar: sirven para esas cargas y
+`build` las completa.
+
+Invalidación: la entrada vale si la versión coincide, se generó con las
+mismas opciones de normales (normalMode / creaseAngle de Obj) y el
+tamaño/mtime del OBJ no cambiaron; si cambiaron se compara el hash del
+contenido (un touch no obliga a reconstruir). El tamaño total se limita
+con desalojo LRU.
+
+CLI:
+    python meshcache.py build [models/ ...] [--force] [--normal-mode angle] [--crease-angle 60]
+    python meshcache.py stats
+    python meshcache.py clear
+"""
+
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Subir la versión cuando cambie el formato o el empaquetado de Model
+CACHE_VERSION = 7
+MAGIC = b"RMSH"
+
+CACHE_DIR = Path(os.environ.get("RENDERER_MESH_CACHE",
+                                Path(__file__).resolve().parent / ".meshcache"))
+MAX_CACHE_BYTES = int(os.environ.get("RENDERER_MESH_CACHE_MB", "1024")) * 1024 * 1024
+
+FLAG_UV      = 1
+FLAG_NORMALS = 2
+FLAG_LODS    = 4     # la cadena de LODs se construyó (aunque la malla no diera niveles)
+FLAG_OPTIMIZED = 8   # pasó por meshopt (orden de triángulos/vértices + ACMR/ATVR)
+
+HEADER_SIZE = 512
+MAX_LODS = 8
+MESH_STATS = ("acmr_before", "acmr_after", "atvr_before", "atvr_after")
+HEADER_DTYPE = np.dtype([
+    ("magic",        "S4"),
+    ("version",      "<u4"),
+    ("flags",        "<u4"),
+    ("stride",       "<u4"),     # floats por vértice
+    ("vertex_count", "<u8"),
+    ("index_count",  "<u8"),
+    ("index_size",   "<u4"),     # 2 = uint16, 4 = uint32
+    ("src_size",     "<u8"),
+    ("src_mtime_ns", "<i8"),
+    ("src_hash",     "S20"),     # sha1 del OBJ
+    ("bbox_min",     "<f4", 3),
+    ("bbox_max",     "<f4", 3),
+    ("src_path",     "S256"),
+    ("lod_count",    "<u4"),
+    ("lods",         "<u4", (MAX_LODS, 3)),
+    ("mesh_stats",   "<f4", 4),  # ACMR antes/después, ATVR antes/después (meshopt)
+    ("normal_mode",  "S8"),      # opciones de Obj con que se calcularon las normales
+    ("crease_angle", "<f4"),     # NaN = sin ángulo de quiebre
+])
+assert HEADER_DTYPE.itemsize <= HEADER_SIZE
+
+
+class CachedMesh(object):
+    def __init__(self, vertices, indices, has_uv, has_normals, stride, bbox_min, bbox_max, lods=None,
+                 stats=None):
+        self.vertices    = vertices      # float32 plano (memmap)
+        self.indices     = indices       # uint16 / uint32 (memmap)
+        self.has_uv      = has_uv
+        self.has_normals = has_normals
+        self.stride      = stride
+        self.bbox_min    = bbox_min
+        self.bbox_max    = bbox_max
+        self.lods        = lods if lods else [(0, len(indices), 0)]
+        self.stats       = stats or {}
+
+
+# -------------------- API pública ------------------------
+def cache_path(src_path) -> Path:
+    key = hashlib.sha1(str(Path(src_path).resolve()).encode("utf-8")).hexdigest()[:24]
+    return CACHE_DIR / f"{key}.mesh"
+
+
+def load(src_path, requireLods=True, normalMode="area", creaseAngle=None, requireOptimized=False):
+    """Devuelve CachedMesh si hay una entrada válida para src_path (y esas opciones de normales), si no None"""
+    src = Path(src_path)
+    entry = cache_path(src)
+    if not src.exists() or not entry.exists():
+        return None
+
+    try:
+        header = _read_header(entry)
+    except (OSError, ValueError):
+        return None
+    if header is None:
+        return None
+    if requireLods and not int(header["flags"]) & FLAG_LODS:
+        return None
+    if requireOptimized and not int(header["flags"]) & FLAG_OPTIMIZED:
+        return None
+    if not _SameNormals(header, normalMode, creaseAngle):
+        return None
+
+    st = src.stat()
+    if int(header["src_size"]) != st.st_size or int(header["src_mtime_ns"]) != st.st_mtime_ns:
+        # Cambió el mtime/tamaño: solo es inválida si cambió el contenido
+        if header["src_hash"] != _file_hash(src).rstrip(b"\0"):  # numpy recorta los \0 de "S"
+            return None
+        header["src_size"] = st.st_size
+        header["src_mtime_ns"] = st.st_mtime_ns
+        _write_header(entry, header)
+
+    n_floats = int(header["vertex_count"]) * int(header["stride"])
+    n_index  = int(header["index_count"])
+    index_dtype = np.uint16 if int(header["index_size"]) == 2 else np.uint32
+    if entry.stat().st_size < HEADER_SIZE + n_floats * 4 + n_index * np.dtype(index_dtype).itemsize:
+        return None
+
+    vertices = np.memmap(entry, dtype=np.float32, mode="r", offset=HEADER_SIZE, shape=(n_floats,))
+    indices  = np.memmap(entry, dtype=index_dtype, mode="r",
+                         offset=HEADER_SIZE + n_floats * 4, shape=(n_index,)) if n_index else \
+               np.zeros(0, index_dtype)
+
+    _touch(entry)
+    flags = int(header["flags"])
+    return CachedMesh(vertices, indices,
+                      bool(flags & FLAG_UV), bool(flags & FLAG_NORMALS),
+                      int(header["stride"]),
+                      tuple(float(c) for c in header["bbox_min"]),
+                      tuple(float(c) for c in header["bbox_max"]),
+                      [tuple(int(c) for c in row) for row in header["lods"][:int(header["lod_count"])]],
+                      _ReadStats(header))
+
+
+def store(src_path, vertices, indices, has_uv, has_normals, stride, bbox_min, bbox_max, lods=None,
+          stats=None, hasLods=True, normalMode="area", creaseAngle=None, optimized=False):
+    """Escribe la entrada de src_path (atómico) y aplica el límite de tamaño"""
+    src = Path(src_path)
+    st = src.stat()
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32).ravel()
+    indices  = np.ascontiguousarray(indices)
+
+    header = np.zeros(1, HEADER_DTYPE)[0]
+    header["magic"]        = MAGIC
+    header["version"]      = CACHE_VERSION
+    header["flags"]        = (FLAG_UV if has_uv else 0) | (FLAG_NORMALS if has_normals else 0) | \
+                             (FLAG_LODS if hasLods else 0) | (FLAG_OPTIMIZED if optimized else 0)
+    header["stride"]       = stride
+    header["vertex_count"] = len(vertices) // stride
+    header["index_count"]  = len(indices)
+    header["index_size"]   = indices.dtype.itemsize if len(indices) else 4
+    header["src_size"]     = st.st_size
+    header["src_mtime_ns"] = st.st_mtime_ns
+    header["src_hash"]     = _file_hash(src)
+    header["bbox_min"]     = bbox_min
+    header["bbox_max"]     = bbox_max
+    header["src_path"]     = str(src.resolve()).encode("utf-8")[:256]
+    lods = (lods or [(0, len(indices), 0)])[:MAX_LODS]
+    header["lod_count"]    = len(lods)
+    header["lods"][:len(lods)] = lods
+    header["mesh_stats"]   = [(stats or {}).get(k, 0.0) for k in MESH_STATS]
+    header["normal_mode"]  = normalMode.encode("ascii")
+    header["crease_angle"] = np.nan if creaseAngle is None else creaseAngle
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    entry = cache_path(src)
+    tmp = entry.with_suffix(f".tmp{os.getpid()}")
+    with tmp.open("wb") as f:
+        f.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+        vertices.tofile(f)
+        indices.tofile(f)
+    os.replace(tmp, entry)
+
+    evict(MAX_CACHE_BYTES, keep=entry)
+    return entry
+
+
+def evict(max_bytes=MAX_CACHE_BYTES, keep=None):
+    """Borra las entradas menos usadas hasta que el total quepa en max_bytes"""
+    entries = _entries()
+    total = sum(st.st_size for _, st in entries)
+    for path, st in sorted(entries, key=lambda e: e[1].st_mtime_ns):
+        if total <= max_bytes:
+            break
+        if keep is not None and path == keep:
+            continue
+        try:
+            path.unlink()
+            total -= st.st_size
+        except OSError:
+            pass
+    return total
+
+
+def clear():
+    for path, _ in _entries():
+        path.unlink()
+
+
+# -------------------- Internals ------------------------
+def _entries():
+    if not CACHE_DIR.is_dir():
+        return []
+    return [(p, p.stat()) for p in CACHE_DIR.glob("*.mesh")]
+
+
+def _read_header(entry):
+    raw = np.fromfile(entry, dtype=HEADER_DTYPE, count=1)
+    if len(raw) == 0:
+        return None
+    header = raw[0]
+    if header["magic"] != MAGIC or int(header["version"]) != CACHE_VERSION:
+        return None
+    return header
+
+
+def _write_header(entry, header):
+    with open(entry, "r+b") as f:
+        f.write(header.tobytes())
+
+
+def _touch(entry):
+    # El mtime de la entrada es su "último uso" para el LRU (atime no es fiable)
+    try:
+        os.utime(entry, None)
+    except OSError:
+        pass
+
+
+def _file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def _SameNormals(header, normalMode, creaseAngle):
+    """La entrada se generó con el mismo modo de normales y ángulo de quiebre"""
+    if header["normal_mode"] != normalMode.encode("ascii"):
+        return False
+    stored = float(header["crease_angle"])
+    if creaseAngle is None:
+        return stored != stored        # NaN
+    return stored == float(np.float32(creaseAngle))
+
+
+def _ReadStats(header):
+    """ACMR / ATVR de la cabecera ({} si la entrada no pasó por meshopt)"""
+    values = [float(c) for c in header["mesh_stats"]]
+    return dict(zip(MESH_STATS, values)) if any(values) else {}
+
+
+def _FormatStats(stats):
+    if not stats:
+        return "(sin meshopt: correr build)"
+    from meshopt import FormatStats
+    return FormatStats(stats)
+
+
+# -------------------- CLI ------------------------
+def main(argv=None):
+    import argparse
+
+    from obj import NORMAL_MODES, Obj
+
+    ap = argparse.ArgumentParser(description="Caché binaria de mallas OBJ")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="precompilar la caché de los OBJ indicados")
+    b.add_argument("paths", nargs="*", default=["models"])
+    b.add_argument("--force", action="store_true", help="reconstruir aunque la entrada sea válida")
+    b.add_argument("--normal-mode", default="area", choices=NORMAL_MODES,
+                   help="ponderación de las normales calculadas (como Model(normalMode=...))")
+    b.add_argument("--crease-angle", type=float, default=None,
+                   help="ángulo de quiebre en grados (como Model(creaseAngle=...))")
+    sub.add_parser("stats", help="listar entradas")
+    sub.add_parser("clear", help="borrar toda la caché")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "clear":
+        clear()
+        print(f"✓ Caché vaciada ({CACHE_DIR})")
+        return 0
+
+    if args.cmd == "stats":
+        entries = sorted(_entries(), key=lambda e: -e[1].st_mtime_ns)
+        total = 0
+        for path, st in entries:
+            header = _read_header(path)
+            if header is not None:
+                src = header["src_path"].decode("utf-8", "ignore")
+                src += "  " + _FormatStats(_ReadStats(header))
+            else:
+                src = "(versión vieja)"
+            print(f"{st.st_size / 2**20:9.2f} MB  {path.name}  {src}")
+            total += st.st_size
+        print(f"{len(entries)} entradas, {total / 2**20:.2f} MB / {MAX_CACHE_BYTES / 2**20:.0f} MB")
+        return 0
+
+    from model import Model
+    from lod import BuildLODs
+    from meshopt import OptimizeMesh
+
+    files = []
+    for p in map(Path, args.paths):
+        files.extend(sorted(p.rglob("*.obj")) if p.is_dir() else [p])
+
+    for f in files:
+        normals = {"normalMode": args.normal_mode, "creaseAngle": args.crease_angle}
+        cached = None if args.force else load(f, requireOptimized=True, **normals)
+        if cached is not None:
+            print(f"= {f} (al día)")
+            continue
+        objFile = Obj(str(f), args.normal_mode, args.crease_angle)
+        data, indices, has_uv, has_normals, stride = Model.PackObj(objFile)
+        data, indices, lods = BuildLODs(data, indices, stride)
+        data, indices, stats = OptimizeMesh(data, indices, stride, lods, stats=True)
+        entry = store(f, data, indices, has_uv, has_normals, stride,
+                      objFile.bbox_min, objFile.bbox_max, lods, stats, optimized=True, **normals)
+        print(f"✓ {f} -> {entry.name} ({entry.stat().st_size / 2**20:.2f} MB)  {_FormatStats(stats)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
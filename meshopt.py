@@ -0,0 +1,189 @@
+"""
+Optimización de mallas para la GPU (se corre al cargar / al llenar la caché).
+
+Tres pasadas sobre el buffer de índices de cada nivel de detalle:
+
+1. Tipsify (Sander, Nehab y Barczak, "Fast triangle reordering for vertex
+   locality and reduced overdraw", 2007): reordena los triángulos en
+   abanicos alrededor de vértices que siguen en la caché post-transform,
+   así cada vértice se sombrea cerca de una vez (importa con los vertex
+   shaders pesados: twist, jelly, explode).
+2. Overdraw: los saltos de Tipsify parten la malla en clusters; se dibujan
+   primero los que miran hacia afuera del centro del objeto, que suelen
+   tapar a los demás (early-Z descarta más fragmentos).
+3. Fetch: los vértices se renumeran en el orden en que se usan, para que
+   las lecturas del VBO sean casi secuenciales.
+
+ACMR = vértices transformados / triángulos, ATVR = vértices transformados /
+vértices únicos (1.0 es el óptimo), con una caché FIFO de CACHE_SIZE.
+Tipsify y la simulación de la caché recorren cada índice en Python, así
+que la pasada no corre en cada carga: la corren `meshcache.py build` y
+Model(..., optimize=True), que informan el ACMR / ATVR del nivel 0.
+"""
+
+from collections import deque
+
+import numpy as np
+
+CACHE_SIZE = 16
+
+
+def OptimizeMesh(vertices, indices, stride, lods=None, cacheSize=CACHE_SIZE, stats=False):
+    """Optimiza cada nivel (offset bytes, índices, vértice base) -> (vértices, índices, stats)
+
+    stats=True agrega ACMR / ATVR antes y después del nivel 0; si no, el dict queda vacío.
+    """
+    verts = np.array(vertices, np.float32).reshape(-1, stride)
+    indices = np.array(indices)
+    if lods is None:
+        lods = [(0, len(indices), 0)]
+
+    measured = {}
+    bases = [base for _, _, base in lods] + [len(verts)]
+    for level, (offset, count, base) in enumerate(lods):
+        if count < 3:
+            continue
+        first = offset // indices.dtype.itemsize
+        local = indices[first:first + count].astype(np.int64)
+        vertexCount = bases[level + 1] - base
+        positions = verts[base:base + vertexCount, :3]
+
+        measure = stats and level == 0
+        if measure:
+            measured["acmr_before"], measured["atvr_before"] = CacheStats(local, cacheSize)
+        tris, clusters = Tipsify(local, vertexCount, cacheSize)
+        tris = OptimizeOverdraw(tris, clusters, positions)
+        perm, tris = OptimizeVertexFetch(tris, vertexCount)
+        if measure:
+            measured["acmr_after"], measured["atvr_after"] = CacheStats(tris, cacheSize)
+
+        verts[base:base + vertexCount] = verts[base:base + vertexCount][perm]
+        indices[first:first + count] = tris
+    return verts.reshape(-1), indices, measured
+
+
+# ------------------------------------------------------------
+# Pasadas
+# ------------------------------------------------------------
+def Tipsify(indices, vertexCount, cacheSize=CACHE_SIZE):
+    """Índices reordenados + inicio (en triángulos) de cada cluster"""
+    tris = np.asarray(indices, np.int64).reshape(-1, 3)
+    triCount = len(tris)
+
+    # Triángulos de cada vértice (CSR)
+    corners = tris.reshape(-1)
+    order = np.argsort(corners, kind="stable")
+    adjacency = (order // 3).tolist()
+    starts = np.concatenate(([0], np.cumsum(np.bincount(corners, minlength=vertexCount)))).tolist()
+
+    live = np.bincount(corners, minlength=vertexCount).tolist()
+    stamp = [0] * vertexCount
+    emitted = [False] * triCount
+    triList = tris.tolist()
+    deadEnd = []
+    output = []
+    clusters = [0]
+
+    time = cacheSize + 1
+    cursor = 0
+    fan = 0 if vertexCount else -1
+    while fan >= 0:
+        candidates = []
+        for t in adjacency[starts[fan]:starts[fan + 1]]:
+            if emitted[t]:
+                continue
+            output.append(t)
+            for v in triList[t]:
+                deadEnd.append(v)
+                candidates.append(v)
+                live[v] -= 1
+                if time - stamp[v] > cacheSize:
+                    stamp[v] = time
+                    time += 1
+            emitted[t] = True
+
+        # Próximo abanico: el candidato que más tiempo va a seguir en la caché
+        fan, best = -1, -1
+        for v in candidates:
+            if live[v] > 0:
+                priority = time - stamp[v] if time - stamp[v] + 2 * live[v] <= cacheSize else 0
+                if priority > best:
+                    fan, best = v, priority
+        if fan < 0:
+            # Callejón sin salida: vértice reciente con triángulos pendientes, o el siguiente libre
+            while deadEnd:
+                v = deadEnd.pop()
+                if live[v] > 0:
+                    fan = v
+                    break
+            else:
+                while cursor < vertexCount and live[cursor] == 0:
+                    cursor += 1
+                fan = cursor if cursor < vertexCount else -1
+            if fan >= 0 and len(output) < triCount:
+                clusters.append(len(output))
+
+    return tris[output].reshape(-1), np.asarray(clusters, np.int64)
+
+
+def OptimizeOverdraw(indices, clusters, positions):
+    """Ordena los clusters de triángulos: primero los que miran hacia afuera del centro"""
+    tris = np.asarray(indices, np.int64).reshape(-1, 3)
+    if len(clusters) < 2:
+        return tris.reshape(-1)
+
+    p = np.asarray(positions, np.float64)
+    p0, p1, p2 = p[tris[:, 0]], p[tris[:, 1]], p[tris[:, 2]]
+    normal = np.cross(p1 - p0, p2 - p0)                 # |n| = 2 * área
+    area = np.linalg.norm(normal, axis=1)
+    center = (p0 + p1 + p2) / 3.0
+    meshCenter = (center * area[:, None]).sum(axis=0) / max(area.sum(), 1e-30)
+
+    # Centro y normal (pesados por área) de cada cluster
+    clusterArea = np.add.reduceat(area, clusters)
+    clusterCenter = np.add.reduceat(center * area[:, None], clusters) / np.maximum(clusterArea, 1e-30)[:, None]
+    clusterNormal = np.add.reduceat(normal, clusters)
+    clusterNormal /= np.maximum(np.linalg.norm(clusterNormal, axis=1), 1e-30)[:, None]
+    facing = ((clusterCenter - meshCenter) * clusterNormal).sum(axis=1)
+
+    ends = np.append(clusters[1:], len(tris))
+    order = np.argsort(-facing, kind="stable")
+    return np.concatenate([tris[clusters[c]:ends[c]] for c in order]).reshape(-1)
+
+
+def OptimizeVertexFetch(indices, vertexCount):
+    """(perm, índices): vértices en orden de primer uso (perm[nuevo] = viejo; los no usados al final)"""
+    indices = np.asarray(indices, np.int64)
+    used, firstUse = np.unique(indices, return_index=True)
+    perm = used[np.argsort(firstUse, kind="stable")]
+    unused = np.setdiff1d(np.arange(vertexCount), used, assume_unique=True)
+    perm = np.concatenate((perm, unused))
+    remap = np.empty(vertexCount, np.int64)
+    remap[perm] = np.arange(vertexCount)
+    return perm, remap[indices]
+
+
+# ------------------------------------------------------------
+# Métricas
+# ------------------------------------------------------------
+def FormatStats(stats):
+    """'ACMR a -> b  ATVR c -> d' de OptimizeMesh(..., stats=True)"""
+    return (f"ACMR {stats['acmr_before']:.2f} -> {stats['acmr_after']:.2f}  "
+            f"ATVR {stats['atvr_before']:.2f} -> {stats['atvr_after']:.2f}")
+
+
+def CacheStats(indices, cacheSize=CACHE_SIZE):
+    """(ACMR, ATVR) simulando una caché FIFO post-transform de cacheSize vértices"""
+    indices = np.asarray(indices).reshape(-1)
+    if len(indices) == 0:
+        return 0.0, 0.0
+    cache, inCache = deque(), set()
+    misses = 0
+    for v in indices.tolist():
+        if v not in inCache:
+            misses += 1
+            cache.append(v)
+            inCache.add(v)
+            if len(cache) > cacheSize:
+                inCache.discard(cache.popleft())
+    return misses / (len(indices) // 3), misses / len(np.unique(indices))
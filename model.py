@@ -1,27 +1,42 @@
 from __future__ import annotations
 
-import pygame
 from OpenGL.GL import *
 import glm
 import numpy as np
 import ctypes
+import os
+import weakref
 
 from obj import Obj
+import lod
+import meshopt
+import texturemanager
+import vertexformat
+from transforms import scene_transforms
+import meshcache
+import streaming
 
 
 class Model(object):
-    def __init__(self, objPath: str):
-        # Transformaciones
-        self.position = glm.vec3(0.0, 0.0, -5.0)
-        self.rotation = glm.vec3(0.0, 0.0, 0.0)  # Euler (pitch, yaw, roll) en radianes
-        self.scale    = glm.vec3(1.0, 1.0, 1.0)
-
-        # Texturas (el renderer espera una lista)
+    def __init__(self, objPath: str, useCache: bool = True, transforms=None, compact: bool = False,
+                 stream: bool = False, lods: bool = True, normalMode: str = "area",
+                 creaseAngle: float | None = None, optimize: bool = False):
+        self.name = os.path.splitext(os.path.basename(objPath))[0]
+
+        # Transformaciones: viven en un TransformStore compartido (position /
+        # rotation / scale son vistas a su fila). Rotación Euler en grados.
+        self._transforms = transforms if transforms is not None else scene_transforms
+        self._slot = self._transforms.Allocate(position=(0.0, 0.0, -5.0))
+        weakref.finalize(self, self._transforms.Free, self._slot)
+        self._matrix = None
+        self._matrixVersion = -1
+
+        # Texturas (el renderer espera una lista). Cada Acquire queda anotado
+        # en _textureRefs y se suelta al destruirse el modelo.
         self.textureId = None
-        self.textures: list[int] = []
-
-        # Cargar OBJ (parser ya triangula y expande)
-        self.objFile = Obj(objPath)
+        self.textures: list[texturemanager.TextureHandle] = []
+        self._textureRefs = []
+        weakref.finalize(self, texturemanager.ReleaseHandles, self._textureRefs)
 
         # GPU buffers
         self.vao = 0
@@ -29,24 +44,132 @@ class Model(object):
         self.ebo = 0
         self.vertex_count = 0
         self.index_count  = 0
+        self.index_type   = GL_UNSIGNED_INT
+
+        # Niveles de detalle en el mismo VBO/EBO: (offset bytes EBO, índices, vértice base)
+        self.lods = []
+        self.lodLevel = 0
+        self.meshStats = {}      # ACMR / ATVR antes y después de meshopt (si se optimizó)
 
         self._has_uv = False
         self._has_normals = False
 
-        self._BuildBuffers()
+        # Formato de vértice: float32 (32 B) o compacto (16 B, ver vertexformat.py).
+        # La posición compacta se decodifica en el shader con escala y centro de la AABB.
+        self.compact = compact
+        self.positionScale = glm.vec3(1.0)
+        self.positionBias = glm.vec3(0.0)
+        self.vertexFormatReport = None
+        self.vertexStride = 0    # bytes por vértice en el VBO
+
+        # Normales calculadas (OBJ sin `vn`): ponderación de Obj y ángulo de
+        # quiebre opcional; también forman parte de la validez de la caché.
+        normals = {"normalMode": normalMode, "creaseAngle": creaseAngle}
+
+        # Streaming (streaming.py): el OBJ se parsea por partes en segundo plano y
+        # los meshlets se agregan al VBO entre frames; se dibuja lo que ya llegó.
+        # Sin caché, LODs ni meshopt (no hay malla completa en memoria), ni
+        # creaseAngle (partir vértices necesita la adyacencia completa).
+        self.stream = None
+        if stream:
+            if creaseAngle is not None:
+                raise ValueError("creaseAngle no está soportado con stream=True")
+            self.objFile = None
+            self._has_uv = self._has_normals = True     # el stream siempre emite P T N
+            self.stream = streaming.GetStreamer().Open(self, objPath, normalMode=normalMode)
+            self._SetLocalBounds((0.0, 0.0, 0.0), (0.0, 0.0, 0.0))    # la AABB llega con la cabecera
+            self._BuildBuffers(np.zeros(0, np.float32), np.zeros(0, np.uint32), 8)
+            return
+
+        # Caché binaria: un arranque en caliente no vuelve a parsear el OBJ.
+        # lods=False no simplifica al cargar (mallas densas): usa los LODs de la
+        # caché si `meshcache.py build` ya los generó, si no dibuja solo el nivel 0.
+        # optimize=True corre meshopt al cargar (Tipsify y la simulación de la
+        # caché son lazos en Python); si no, se usa el orden de la caché si
+        # `build` ya la optimizó, o el del archivo.
+        cached = meshcache.load(objPath, requireLods=lods, requireOptimized=optimize,
+                                **normals) if useCache else None
+        if cached is not None:
+            print(f"✓ Malla desde caché: {objPath}")
+            self.objFile = None
+            data, indices = cached.vertices, cached.indices
+            self._has_uv, self._has_normals = cached.has_uv, cached.has_normals
+            stride = cached.stride
+            bbox_min, bbox_max = cached.bbox_min, cached.bbox_max
+            self.lods = cached.lods
+            self.meshStats = cached.stats
+        else:
+            # Cargar OBJ (parser ya triangula y deduplica vértices)
+            self.objFile = Obj(objPath, normalMode, creaseAngle)
+            data, indices, self._has_uv, self._has_normals, stride = Model.PackObj(self.objFile)
+            bbox_min, bbox_max = self.objFile.bbox_min, self.objFile.bbox_max
+            # LODs simplificados (QEM) a continuación del nivel 0
+            if lods:
+                data, indices, self.lods = lod.BuildLODs(data, indices, stride)
+            # Orden de triángulos/vértices para la caché post-transform, early-Z y fetch
+            if optimize:
+                data, indices, self.meshStats = meshopt.OptimizeMesh(data, indices, stride,
+                                                                     self.lods or None, stats=True)
+                print(f"✓ Malla optimizada: {meshopt.FormatStats(self.meshStats)}")
+            if useCache:
+                try:
+                    meshcache.store(objPath, data, indices, self._has_uv, self._has_normals, stride,
+                                    self.objFile.bbox_min, self.objFile.bbox_max, self.lods,
+                                    self.meshStats, hasLods=lods, optimized=optimize, **normals)
+                except OSError as e:
+                    print("⚠ No se pudo escribir la caché de malla:", e)
+
+        # Volumen local (AABB + esfera) para el frustum culling del Renderer
+        self._SetLocalBounds(bbox_min, bbox_max)
+
+        self._BuildBuffers(data, indices, stride)
 
     # --------------- Matrices ---------------
     def GetModel(self):
         return self.GetModelMatrix()
 
     def GetModelMatrix(self):
-        # M = T * Rz * Ry * Rx * S  (recibe rotación en grados)
-        T  = glm.translate(glm.mat4(1.0), self.position)
-        Rx = glm.rotate(glm.mat4(1.0), glm.radians(self.rotation.x), glm.vec3(1, 0, 0))
-        Ry = glm.rotate(glm.mat4(1.0), glm.radians(self.rotation.y), glm.vec3(0, 1, 0))
-        Rz = glm.rotate(glm.mat4(1.0), glm.radians(self.rotation.z), glm.vec3(0, 0, 1))
-        S  = glm.scale(glm.mat4(1.0), self.scale)
-        return T * Rz * Ry * Rx * S
+        # M = T * Rz * Ry * Rx * S  (rotación en grados), compuesta por el store
+        store, slot = self._transforms, self._slot
+        if store.dirty[slot]:
+            store.Update()      # recompone de una vez todos los slots sucios
+        version = store.versions[slot]
+        if version != self._matrixVersion:
+            self._matrix = glm.mat4(store.matrices[slot])
+            self._matrixVersion = version
+        return self._matrix
+
+    def GetModelViewMatrix(self):
+        """Válida tras TransformStore.Update(viewMatrix) (el Renderer lo hace por frame)"""
+        return glm.mat4(self._transforms.modelView[self._slot])
+
+    def GetNormalMatrix(self):
+        return glm.mat3(self._transforms.normalMatrices[self._slot])
+
+    # Vistas al store: model.rotation.y += 30 marca el slot como sucio
+    @property
+    def position(self):
+        return self._transforms.View(self._slot, "positions")
+
+    @position.setter
+    def position(self, value):
+        self._transforms.Write("positions", self._slot, value)
+
+    @property
+    def rotation(self):
+        return self._transforms.View(self._slot, "rotations")
+
+    @rotation.setter
+    def rotation(self, value):
+        self._transforms.Write("rotations", self._slot, value)
+
+    @property
+    def scale(self):
+        return self._transforms.View(self._slot, "scales")
+
+    @scale.setter
+    def scale(self, value):
+        self._transforms.Write("scales", self._slot, value)
 
     def SetScale(self, s):
         if isinstance(s, (int, float)):
@@ -62,83 +185,140 @@ class Model(object):
 
     # --------------- Texturas ---------------
     def AddTexture(self, path: str):
-        surf = pygame.image.load(path)
-        surf = pygame.transform.flip(surf, False, True)  # flip vertical para coords de OpenGL
-
-        img_data = pygame.image.tostring(surf, "RGBA", True)
-        w, h = surf.get_size()
-
-        self.textureId = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, self.textureId)
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, w, h, 0, GL_RGBA, GL_UNSIGNED_BYTE, img_data)
-        glGenerateMipmap(GL_TEXTURE_2D)
-
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
+        # Textura compartida (misma ruta o mismo contenido -> mismo handle) en
+        # una capa de un GL_TEXTURE_2D_ARRAY. La decodificación va en segundo
+        # plano; hasta que llega, el handle apunta a un texel gris.
+        self.textureId = texturemanager.GetManager().Acquire(path)
+        self._textureRefs.append(self.textureId)
 
         # compatibilidad con Renderer (usa model.textures[0])
         if self.textureId not in self.textures:
             self.textures.append(self.textureId)
 
-        glBindTexture(GL_TEXTURE_2D, 0)
-
     # --------------- Render ---------------
     def Render(self):
         # El Renderer ya activa shader, setea matrices y texturas si existen.
         glBindVertexArray(self.vao)
-        if self.index_count > 0:
-            glDrawElements(GL_TRIANGLES, self.index_count, GL_UNSIGNED_INT, None)
-        else:
-            glDrawArrays(GL_TRIANGLES, 0, self.vertex_count)
+        self.Draw()
         glBindVertexArray(0)
 
-    # --------------- Interno: buffers ---------------
-    def _BuildBuffers(self):
-        # Datos EXPANDIDOS del parser
-        verts_orig = self.objFile.vertices
-        pos_exp    = list(self.objFile.positions)
-        uv_exp     = list(self.objFile.uvs)
-        nrm_exp    = list(self.objFile.norms)
+    def Draw(self):
+        """Solo el draw call (VAO ya ligado, nivel `lodLevel`); devuelve los triángulos dibujados"""
+        if self.index_count > 0:
+            if self.lodLevel == 0:
+                glDrawElements(GL_TRIANGLES, self.index_count, self.index_type, None)
+                return self.index_count // 3
+            offset, count, base = self.lods[self.lodLevel]
+            glDrawElementsBaseVertex(GL_TRIANGLES, count, self.index_type, ctypes.c_void_p(offset), base)
+            return count // 3
+        glDrawArrays(GL_TRIANGLES, 0, self.vertex_count)
+        return self.vertex_count // 3
 
-        self._has_uv      = len(uv_exp)  == len(pos_exp) and len(uv_exp)  > 0
-        self._has_normals = len(nrm_exp) == len(pos_exp) and len(nrm_exp) > 0
+    # --------------- Interno: buffers ---------------
+    @staticmethod
+    def PackObj(objFile):
+        """Centra/escala y empaqueta P [T] [N] -> (data, indices, has_uv, has_normals, stride)"""
+        # Vértices únicos + índices del parser (arrays float32 contiguos)
+        positions = objFile.positions
+        uvs       = objFile.uvs
+        normals   = objFile.norms
+        indices   = objFile.indices
+
+        has_uv      = len(uvs)     == len(positions) and len(uvs)     > 0
+        has_normals = len(normals) == len(positions) and len(normals) > 0
 
         # Centrar y escalar por AABB de vértices originales
-        positions_np = np.array(verts_orig, dtype=np.float32) if len(verts_orig) > 0 else np.zeros((1,3), np.float32)
-        bb_min = positions_np.min(axis=0)
-        bb_max = positions_np.max(axis=0)
+        center, scale_factor = Model.Normalization(objFile.bbox_min, objFile.bbox_max)
+
+        # Empaquetar interleaved P [T] [N] directo en el buffer final (sin copias intermedias)
+        vertex_stride_floats = 3 + (2 if has_uv else 0) + (3 if has_normals else 0)
+        packed = np.empty((len(positions), vertex_stride_floats), np.float32)
+
+        pos = packed[:, 0:3]
+        np.subtract(positions, center, out=pos)
+        pos *= scale_factor
+
+        offset = 3
+        if has_uv:
+            packed[:, offset:offset + 2] = uvs
+            offset += 2
+        if has_normals:
+            packed[:, offset:offset + 3] = normals
+
+        return packed.reshape(-1), indices, has_uv, has_normals, vertex_stride_floats
+
+    @staticmethod
+    def Normalization(bbox_min, bbox_max):
+        """(centro, factor) con que PackObj lleva la AABB del OBJ a 1.5 unidades centrada en 0"""
+        bb_min = np.array(bbox_min, np.float32)
+        bb_max = np.array(bbox_max, np.float32)
+        if np.any(bb_min > bb_max):          # OBJ sin vértices
+            bb_min = bb_max = np.zeros(3, np.float32)
         center = (bb_min + bb_max) * 0.5
-        extent = (bb_max - bb_min)
-        largest = float(max(extent[0], extent[1], extent[2], 1e-6))
+        largest = float(max(*(bb_max - bb_min), 1e-6))
 
         desired = 1.5
-        scale_factor = desired / largest
-
-        pos_centered = []
-        for (px, py, pz) in pos_exp:
-            cx = (px - center[0]) * scale_factor
-            cy = (py - center[1]) * scale_factor
-            cz = (pz - center[2]) * scale_factor
-            pos_centered.append((cx, cy, cz))
-
-        # Empaquetar interleaved: P [T] [N]
-        vertex_stride_floats = 3 + (2 if self._has_uv else 0) + (3 if self._has_normals else 0)
-        packed = []
-        for i in range(len(pos_centered)):
-            px, py, pz = pos_centered[i]
-            packed.extend([px, py, pz])
-            if self._has_uv:
-                u, v = uv_exp[i]
-                packed.extend([u, v])
-            if self._has_normals:
-                nx, ny, nz = nrm_exp[i]
-                packed.extend([nx, ny, nz])
-
-        data = np.array(packed, dtype=np.float32)
-        self.vertex_count = len(pos_centered)
-        self.index_count = 0
+        return center, np.float32(desired / largest)
+
+    # --------------- Interno: streaming ---------------
+    def _BeginStream(self, bbox_min, bbox_max, vertexCount):
+        """Cabecera del stream: AABB definitiva y VBO reservado para `vertexCount` vértices"""
+        self._SetLocalBounds(bbox_min, bbox_max)
+        if self.compact:
+            packed = vertexformat.PackCompact(np.zeros(0, np.float32), 8, True, True,
+                                              self.aabbMin, self.aabbMax)
+            self.positionScale = glm.vec3(*packed.scale.tolist())
+            self.positionBias = glm.vec3(*packed.bias.tolist())
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, vertexCount * self.vertexStride, None, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.vertex_count = 0
+
+    def _AppendVertices(self, vertices):
+        """Sube un meshlet (float32 P T N, ya centrado y escalado) detrás de lo ya cargado"""
+        data = vertices
+        if self.compact:
+            data = vertexformat.PackCompact(vertices, 8, True, True, self.aabbMin, self.aabbMax).data
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferSubData(GL_ARRAY_BUFFER, self.vertex_count * self.vertexStride, data.nbytes, data)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.vertex_count += len(vertices)
+        return data.nbytes
+
+    def _SetLocalBounds(self, bbox_min, bbox_max):
+        # AABB del OBJ -> espacio de modelo (ya centrado y escalado como el VBO)
+        center, scale_factor = Model.Normalization(bbox_min, bbox_max)
+        self.aabbMin = (np.array(bbox_min, np.float32) - center) * scale_factor
+        self.aabbMax = (np.array(bbox_max, np.float32) - center) * scale_factor
+        if np.any(self.aabbMin > self.aabbMax):
+            self.aabbMin = self.aabbMax = np.zeros(3, np.float32)
+        self.sphereCenter = (self.aabbMin + self.aabbMax) * 0.5
+        self.sphereRadius = float(np.linalg.norm(self.aabbMax - self.sphereCenter))
+        self._transforms.SetBounds(self._slot, self.aabbMin, self.aabbMax)
+
+    def _BuildBuffers(self, data, indices, vertex_stride_floats):
+        self.vertex_count = len(data) // vertex_stride_floats
+        self.index_count = len(indices)
+        if self.lods:
+            self.index_count = self.lods[0][1]      # el resto del EBO son los LODs
+        else:
+            self.lods = [(0, self.index_count, 0)]
+        self.index_type = GL_UNSIGNED_SHORT if indices.dtype == np.uint16 else GL_UNSIGNED_INT
+
+        # Layout de atributos: (location, componentes, tipo, normalizado, offset)
+        if self.compact:
+            packed = vertexformat.PackCompact(data, vertex_stride_floats, self._has_uv, self._has_normals,
+                                              self.aabbMin, self.aabbMax)
+            data, attributes, stride_bytes = packed.data, packed.attributes, packed.stride
+            self.positionScale = glm.vec3(*packed.scale.tolist())
+            self.positionBias = glm.vec3(*packed.bias.tolist())
+            if self.stream is None:      # con streaming el VBO todavía está vacío
+                self.vertexFormatReport = packed.report
+                print("✓ Vértices compactos:", vertexformat.FormatReport(packed.report))
+        else:
+            attributes = vertexformat.FloatAttributes(vertex_stride_floats, self._has_uv, self._has_normals)
+            stride_bytes = vertex_stride_floats * 4
+        self.vertexStride = stride_bytes
 
         # Subir a GPU
         self.vao = glGenVertexArrays(1)
@@ -148,29 +328,27 @@ class Model(object):
         glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
         glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
 
-        stride_bytes = vertex_stride_floats * 4
-
-        # location 0: position
-        glEnableVertexAttribArray(0)
-        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, stride_bytes, ctypes.c_void_p(0))
-
-        offset = 3 * 4
-        # location 1: texcoord
-        if self._has_uv:
-            glEnableVertexAttribArray(1)
-            glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, stride_bytes, ctypes.c_void_p(offset))
-            offset += 2 * 4
+        # El EBO queda ligado al VAO
+        if self.index_count > 0:
+            self.ebo = glGenBuffers(1)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
 
-        # location 2: normal
-        if self._has_normals:
-            glEnableVertexAttribArray(2)
-            glVertexAttribPointer(2, 3, GL_FLOAT, GL_FALSE, stride_bytes, ctypes.c_void_p(offset))
+        # location 0: position, 1: texcoord, 2: normal
+        for location, size, gl_type, normalized, offset in attributes:
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, size, gl_type, GL_TRUE if normalized else GL_FALSE,
+                                  stride_bytes, ctypes.c_void_p(offset))
 
         glBindVertexArray(0)
         glBindBuffer(GL_ARRAY_BUFFER, 0)
 
         # Info útil en consola
+        if self.stream is not None:
+            return      # streaming.py informa al terminar
         try:
-            print(f"Model: vertices={self.vertex_count}, has_uv={self._has_uv}, has_normals={self._has_normals}")
+            print(f"Model: vertices={self.vertex_count}, indices={self.index_count}, "
+                  f"has_uv={self._has_uv}, has_normals={self._has_normals}, "
+                  f"lods={[count // 3 for _, count, _ in self.lods]}")
         except Exception:
             pass
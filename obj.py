@@ -1,36 +1,61 @@
+from __future__ import annotations
+
 from pathlib import Path
-import math
+
+import numpy as np
+
+
+# Bytes relevantes para clasificar líneas (<= espacio cuenta como separador)
+_SPACE = ord(" ")
+_NL    = ord("\n")
+_SLASH = ord("/")
+_HASH  = ord("#")
+
+
+# Bytes de texto por bloque al parsear (el pico del parseo escala con esto, no con el archivo)
+CHUNK_BYTES = 1 << 18
+
+# Triángulos por bloque al acumular normales calculadas
+NORMAL_BLOCK = 1 << 14
+
+# Modos de ponderación para normales calculadas
+NORMAL_MODES = ("uniform", "area", "angle")
+
 
 class Obj:
-    def __init__(self, filename: str):
-        self.vertices   = []  # list[tuple[float,float,float]]
-        self.texCoords  = []  # list[tuple[float,float]]
-        self.normals    = []  # list[tuple[float,float,float]]
-        self.faces      = []  # list[list[tuple(vi,ti,ni)]]
-
-        self._positions = []  # expanded
-        self._uvs       = []  # expanded
-        self._normals   = []  # expanded
+    def __init__(self, filename: str, normalMode: str = "area", creaseAngle: float | None = None):
+        self.vertices   = np.zeros((0, 3), np.float32)  # (V,3)
+        self.texCoords  = np.zeros((0, 2), np.float32)  # (T,2)
+        self.normals    = np.zeros((0, 3), np.float32)  # (N,3)
+        self.faces      = np.zeros((0, 3, 3), np.int32) # (F,3,[vi,ti,ni]) 0-based, -1 = ausente
+
+        self._positions = np.zeros((0, 3), np.float32)  # por vértice único
+        self._uvs       = np.zeros((0, 2), np.float32)  # por vértice único
+        self._normals   = np.zeros((0, 3), np.float32)  # por vértice único
+        self._indices   = np.zeros(0, np.uint16)        # 3 por triángulo (uint16 / uint32)
         self._bbox_min  = [ 1e9,  1e9,  1e9]
         self._bbox_max  = [-1e9, -1e9, -1e9]
 
         self._load(filename)
-        
+
         # Si no hay normales, calcularlas
         if len(self.normals) == 0:
             print("⚠ Archivo OBJ sin normales, calculando...")
-            self._compute_normals()
+            self._compute_normals(normalMode, creaseAngle)
             print(f"✓ {len(self.normals)} normales calculadas")
-        
+
         self._expand()
 
     # --------------- API pública para Model ----------------
+    # positions/uvs/norms son vértices únicos; positions[indices] da la sopa de triángulos
     @property
     def positions(self): return self._positions
     @property
     def uvs(self):       return self._uvs
     @property
     def norms(self):     return self._normals
+    @property
+    def indices(self):   return self._indices
 
     @property
     def bbox_min(self):  return tuple(self._bbox_min)
@@ -43,170 +68,392 @@ class Obj:
         if not p.exists():
             raise FileNotFoundError(f"OBJ no encontrado: {filename}")
 
-        with p.open("r", encoding="utf-8", errors="ignore") as f:
-            for raw in f:
-                if not raw or raw.startswith("#"): 
-                    continue
-                line = raw.strip()
-                if not line:
-                    continue
-
-                parts = line.split()
-                tag = parts[0]
-
-                if tag == "v" and len(parts) >= 4:
-                    x, y, z = map(float, parts[1:4])
-                    self.vertices.append((x, y, z))
-                    self._bbox_min[0] = min(self._bbox_min[0], x)
-                    self._bbox_min[1] = min(self._bbox_min[1], y)
-                    self._bbox_min[2] = min(self._bbox_min[2], z)
-                    self._bbox_max[0] = max(self._bbox_max[0], x)
-                    self._bbox_max[1] = max(self._bbox_max[1], y)
-                    self._bbox_max[2] = max(self._bbox_max[2], z)
-
-                elif tag == "vt":
-                    if len(parts) >= 3:
-                        u, v = map(float, parts[1:3])
-                    elif len(parts) == 2:
-                        u, v = float(parts[1]), 0.0
-                    else:
-                        continue
-                    self.texCoords.append((u, v))
-
-                elif tag == "vn" and len(parts) >= 4:
-                    nx, ny, nz = map(float, parts[1:4])
-                    self.normals.append((nx, ny, nz))
-
-                elif tag == "f":
-                    face = []
-                    for comp in parts[1:]:
-                        # soporta: v / v/t / v//n / v/t/n
-                        v_idx, t_idx, n_idx = None, None, None
-                        if "//" in comp:             # v//n
-                            v_str, n_str = comp.split("//")
-                            v_idx = int(v_str)
-                            n_idx = int(n_str)
-                        else:
-                            trio = comp.split("/")
-                            if len(trio) == 1:
-                                v_idx = int(trio[0])
-                            elif len(trio) == 2:
-                                v_idx = int(trio[0])
-                                t_idx = int(trio[1]) if trio[1] else None
-                            elif len(trio) == 3:
-                                v_idx = int(trio[0])
-                                t_idx = int(trio[1]) if trio[1] else None
-                                n_idx = int(trio[2]) if trio[2] else None
-                        face.append((v_idx, t_idx, n_idx))
-                    # Triangulamos si es quad o polígono convexo simple
-                    if len(face) == 3:
-                        self.faces.append(face)
-                    elif len(face) >= 4:
-                        v0 = face[0]
-                        for i in range(1, len(face) - 1):
-                            self.faces.append([v0, face[i], face[i+1]])
-
-    def _compute_normals(self):
-        """Calcular normales por vértice (promedio de normales de caras)"""
-        # Inicializar acumuladores de normales para cada vértice
-        vertex_normals = [[0.0, 0.0, 0.0] for _ in range(len(self.vertices))]
-        vertex_counts = [0] * len(self.vertices)
-        
-        # Para cada cara (triángulo)
-        for face in self.faces:
-            # Obtener índices de vértices (convertir de 1-based a 0-based)
-            v0_idx = face[0][0] - 1 if face[0][0] > 0 else len(self.vertices) + face[0][0]
-            v1_idx = face[1][0] - 1 if face[1][0] > 0 else len(self.vertices) + face[1][0]
-            v2_idx = face[2][0] - 1 if face[2][0] > 0 else len(self.vertices) + face[2][0]
-            
-            # Obtener posiciones de los vértices
-            if not (0 <= v0_idx < len(self.vertices) and 
-                    0 <= v1_idx < len(self.vertices) and 
-                    0 <= v2_idx < len(self.vertices)):
-                continue
-                
-            v0 = self.vertices[v0_idx]
-            v1 = self.vertices[v1_idx]
-            v2 = self.vertices[v2_idx]
-            
-            # Calcular dos vectores del triángulo
-            edge1 = (v1[0] - v0[0], v1[1] - v0[1], v1[2] - v0[2])
-            edge2 = (v2[0] - v0[0], v2[1] - v0[1], v2[2] - v0[2])
-            
-            # Producto cruz para obtener la normal de la cara
-            nx = edge1[1] * edge2[2] - edge1[2] * edge2[1]
-            ny = edge1[2] * edge2[0] - edge1[0] * edge2[2]
-            nz = edge1[0] * edge2[1] - edge1[1] * edge2[0]
-            
-            # Normalizar
-            length = math.sqrt(nx*nx + ny*ny + nz*nz)
-            if length > 1e-8:
-                nx /= length
-                ny /= length
-                nz /= length
-            else:
-                nx, ny, nz = 0.0, 0.0, 1.0
-            
-            # Acumular esta normal para cada vértice del triángulo
-            for v_idx in [v0_idx, v1_idx, v2_idx]:
-                vertex_normals[v_idx][0] += nx
-                vertex_normals[v_idx][1] += ny
-                vertex_normals[v_idx][2] += nz
-                vertex_counts[v_idx] += 1
-        
-        # Promediar y normalizar
-        for i in range(len(self.vertices)):
-            if vertex_counts[i] > 0:
-                nx = vertex_normals[i][0] / vertex_counts[i]
-                ny = vertex_normals[i][1] / vertex_counts[i]
-                nz = vertex_normals[i][2] / vertex_counts[i]
-                
-                length = math.sqrt(nx*nx + ny*ny + nz*nz)
-                if length > 1e-8:
-                    nx /= length
-                    ny /= length
-                    nz /= length
-                else:
-                    nx, ny, nz = 0.0, 0.0, 1.0
-                    
-                self.normals.append((nx, ny, nz))
-            else:
-                self.normals.append((0.0, 0.0, 1.0))
-        
-        # Actualizar las caras para que hagan referencia a las normales calculadas
-        for face in self.faces:
-            for i in range(len(face)):
-                v_idx, t_idx, n_idx = face[i]
-                # Convertir índice de vértice a índice de normal (1-based)
-                if v_idx > 0:
-                    n_idx = v_idx
-                else:
-                    n_idx = len(self.vertices) + v_idx + 1
-                face[i] = (v_idx, t_idx, n_idx)
-
-    def _fetch(self, arr, idx, default):
-        if idx is None: return default
-        # OBJ es 1-based y soporta negativos
-        if idx > 0:  j = idx - 1
-        else:        j = len(arr) + idx
-        if 0 <= j < len(arr): return arr[j]
-        return default
+        # Por bloques cortados en fin de línea: el texto y las tablas por
+        # línea nunca están enteros en memoria, solo lo ya parseado
+        parts = {"v": [], "vt": [], "vn": [], "f": []}
+        before = np.zeros(3, np.int64)          # v / vt / vn declarados antes del bloque
+        for buf in read_chunks(p, CHUNK_BYTES):
+            lines = classify_lines(buf)
+            starts, ends, is_v, is_vt, is_vn, is_f = lines
+
+            # v x y z [w] / vt u [v] [w] (v ausente = 0.0) / vn x y z
+            parts["v"].append(parse_floats(buf, starts[is_v], ends[is_v], 1, 3, 3))
+            parts["vt"].append(parse_floats(buf, starts[is_vt], ends[is_vt], 2, 2, 1))
+            parts["vn"].append(parse_floats(buf, starts[is_vn], ends[is_vn], 2, 3, 3))
+
+            # f: soporta v / v/t / v//n / v/t/n, índices negativos y n-gonos
+            parts["f"].append(parse_faces(buf, lines, before))
+            before += (len(parts["v"][-1]), len(parts["vt"][-1]), len(parts["vn"][-1]))
+
+        self.vertices  = _concat(parts.pop("v"), (0, 3), np.float32)
+        self.texCoords = _concat(parts.pop("vt"), (0, 2), np.float32)
+        self.normals   = _concat(parts.pop("vn"), (0, 3), np.float32)
+        self.faces     = _concat(parts.pop("f"), (0, 3, 3), np.int32)
+        if len(self.vertices) > 0:
+            self._bbox_min = [float(c) for c in self.vertices.min(axis=0)]
+            self._bbox_max = [float(c) for c in self.vertices.max(axis=0)]
+
+        # Referencias hacia adelante valen si el elemento existe en el archivo
+        clamp_refs(self.faces, (len(self.vertices), len(self.texCoords), len(self.normals)))
+
+    def _compute_normals(self, mode: str = "area", crease_angle: float | None = None):
+        """
+        Calcular normales por vértice sumando las normales de sus caras.
+
+        mode: "uniform" (promedio simple), "area" (pondera por área del
+        triángulo) o "angle" (pondera por el ángulo de la esquina).
+        crease_angle (grados): si se da, una cara solo suaviza con las caras
+        vecinas cuya normal difiere menos que ese ángulo; los vértices sobre
+        aristas duras se duplican con una normal por lado.
+        """
+        if mode not in NORMAL_MODES:
+            raise ValueError(f"Modo de normales desconocido: {mode} (usar {NORMAL_MODES})")
+
+        n_verts = len(self.vertices)
+        vi = self.faces[:, :, 0]
+
+        # Solo triángulos con los tres vértices válidos
+        valid = np.all(vi >= 0, axis=1)
+        tri = vi[valid]
+
+        if crease_angle is None:
+            # Sin pliegues cada vértice suma lo de sus caras: por bloques de
+            # triángulos, así los temporales float64 no escalan con la malla
+            acc = np.zeros((n_verts, 3))
+            for i in range(0, len(tri), NORMAL_BLOCK):
+                block = tri[i:i + NORMAL_BLOCK]
+                _, contrib = _corner_contrib(self.vertices[block].astype(np.float64), mode)
+                acc += scatter_add(block.ravel(), contrib, n_verts)
+            self.normals = normalize(acc).astype(np.float32)
+            # Las caras referencian la normal con el mismo índice que el vértice
+            self.faces[:, :, 2] = self.faces[:, :, 0]
+            return
+
+        face_n, contrib = _corner_contrib(self.vertices[tri].astype(np.float64), mode)
+        corner_v = tri.ravel()
+        corner_f = np.repeat(np.arange(len(tri)), 3)
+
+        # Pares (esquina, esquina vecina) que comparten vértice
+        order = np.argsort(corner_v, kind="stable")
+        counts = np.bincount(corner_v, minlength=n_verts)
+        group_start = np.cumsum(counts) - counts
+        deg = counts[corner_v[order]]
+        ii = np.repeat(np.arange(len(order)), deg)
+        jj = group_start[corner_v[order]][ii] + (np.arange(len(ii)) - np.repeat(np.cumsum(deg) - deg, deg))
+        ci, cj = order[ii], order[jj]
+
+        # Solo suavizan las caras dentro del ángulo de pliegue (la propia siempre)
+        fi, fj = corner_f[ci], corner_f[cj]
+        smooth = (np.einsum("ij,ij->i", face_n[fi], face_n[fj]) >= np.cos(np.radians(crease_angle))) | (fi == fj)
+        corner_n = normalize(scatter_add(ci[smooth], contrib[cj[smooth]], len(corner_v)))
+
+        # Una normal por combinación (vértice, normal) distinta: cada esquina
+        # apunta a la primera esquina vecina suave con exactamente la misma normal
+        # (los pares vienen agrupados por ci y con cj creciente; cj == ci siempre está)
+        cand = np.flatnonzero(smooth & (cj <= ci))
+        cand = cand[np.all(corner_n[ci[cand]] == corner_n[cj[cand]], axis=1)]
+        first = cand[np.concatenate(([True], ii[cand][1:] != ii[cand][:-1]))]
+        rep = np.empty(len(corner_v), np.int64)
+        rep[ci[first]] = cj[first]
+
+        is_rep = rep == np.arange(len(corner_v))
+        slot = np.cumsum(is_rep) - 1
+        self.normals = corner_n[is_rep].astype(np.float32)
+
+        self.faces[:, :, 2] = -1
+        self.faces[valid, :, 2] = slot[rep].reshape(-1, 3)
 
     def _expand(self):
-        has_uv = len(self.texCoords) > 0
-        has_n  = len(self.normals)  > 0
-
-        for tri in self.faces:
-            for (vi, ti, ni) in tri:
-                px, py, pz = self._fetch(self.vertices, vi, (0.0,0.0,0.0))
-                self._positions.append((px,py,pz))
-                if has_uv:
-                    u, v = self._fetch(self.texCoords, ti, (0.0,0.0))
-                else:
-                    u, v = 0.0, 0.0
-                self._uvs.append((u, v))
-                if has_n:
-                    nx, ny, nz = self._fetch(self.normals, ni, (0.0,0.0,1.0))
-                else:
-                    nx, ny, nz = (0.0,0.0,1.0)
-                self._normals.append((nx,ny,nz))
\ No newline at end of file
+        """Deduplica las esquinas (vi, ti, ni) en vértices únicos + buffer de índices"""
+        corners = self.faces.reshape(-1, 3)
+        unique, inverse = _unique_rows(corners)
+
+        index_dtype = np.uint16 if len(unique) <= 0xFFFF else np.uint32
+        self._indices   = inverse.astype(index_dtype)
+        self._positions = _gather(self.vertices,  unique[:, 0], (0.0, 0.0, 0.0))
+        self._uvs       = _gather(self.texCoords, unique[:, 1], (0.0, 0.0))
+        self._normals   = _gather(self.normals,   unique[:, 2], (0.0, 0.0, 1.0))
+
+
+# ------------------ API de parseo -------------------
+# Parsers vectorizados por bloque de texto; Obj y streaming.py los usan igual.
+def read_chunks(path, chunk_bytes=CHUNK_BYTES):
+    """Bloques de ~chunk_bytes del archivo cortados después de un '\\n' (uint8)"""
+    with open(path, "rb") as f:
+        tail = b""
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+            data = tail + block
+            cut = data.rfind(b"\n") + 1
+            tail = data[cut:]
+            if cut:
+                yield np.frombuffer(data[:cut], np.uint8)
+        if tail.strip():
+            yield np.frombuffer(tail + b"\n", np.uint8)
+
+
+def classify_lines(buf):
+    """
+    (starts, ends, is_v, is_vt, is_vn, is_f) de un buffer que termina en '\\n'.
+    starts saltea la indentación y ends corta la línea en el primer '#'
+    (comentario al final), así que buf[starts:ends] es solo el contenido.
+    """
+    ends   = np.flatnonzero(buf == _NL)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+
+    # Indentación: avanzar el inicio de las líneas que empiezan con blancos
+    ind = np.flatnonzero((buf[starts] <= _SPACE) & (buf[starts] != _NL))
+    while len(ind):
+        starts[ind] += 1
+        b = buf[starts[ind]]
+        ind = ind[(b <= _SPACE) & (b != _NL)]
+
+    # Comentarios: la línea termina en su primer '#'
+    hashes = np.flatnonzero(buf == _HASH)
+    if len(hashes):
+        line = np.searchsorted(ends, hashes)
+        first = np.concatenate(([True], line[1:] != line[:-1]))
+        ends = ends.copy()
+        ends[line[first]] = hashes[first]
+
+    # Los 3 primeros bytes de cada línea deciden el tag (v / vt / vn / f)
+    pad = np.concatenate((buf, np.full(3, _NL, np.uint8)))
+    b0, b1, b2 = pad[starts], pad[starts + 1], pad[starts + 2]
+    ws1 = b1 <= _SPACE
+    ws2 = b2 <= _SPACE
+
+    is_v  = (b0 == ord("v")) & ws1
+    is_vt = (b0 == ord("v")) & (b1 == ord("t")) & ws2
+    is_vn = (b0 == ord("v")) & (b1 == ord("n")) & ws2
+    is_f  = (b0 == ord("f")) & ws1
+    return starts, ends, is_v, is_vt, is_vn, is_f
+
+
+def _ragged_gather(buf, starts, ends, tag_len):
+    """Concatena las líneas buf[starts[i]:ends[i]+1] borrando su tag inicial"""
+    lengths = ends - starts + 1
+    line_ends = np.cumsum(lengths) - 1          # posición del '\n' de cada línea en el body
+    total = int(line_ends[-1]) + 1
+    # Bloques contiguos (lo normal: todas las 'v' juntas) se copian sin índice por byte
+    if total == int(ends[-1]) - int(starts[0]) + 1:
+        body = buf[starts[0]:ends[-1] + 1].copy()
+    else:
+        offsets = line_ends + 1 - lengths
+        body = buf[np.arange(total) - np.repeat(offsets - starts, lengths)]
+    line_starts = line_ends + 1 - lengths
+    for k in range(tag_len):
+        body[line_starts + k] = _SPACE
+    body[line_ends] = _NL                       # líneas cortadas en '#'
+    return body, line_ends
+
+
+def _token_starts(word):
+    """Posiciones donde empieza una corrida de bytes `word`"""
+    prev = np.concatenate(([False], word[:-1]))
+    return np.flatnonzero(word & ~prev)
+
+
+def parse_floats(buf, starts, ends, tag_len, width, min_width):
+    """Parsea las primeras `width` columnas numéricas de cada línea"""
+    if len(starts) == 0:
+        return np.zeros((0, width), np.float32)
+
+    body, line_ends = _ragged_gather(buf, starts, ends, tag_len)
+    values = np.fromstring(body.tobytes(), dtype=np.float32, sep=" ")
+
+    tok_line = np.searchsorted(line_ends, _token_starts(body > _SPACE))
+    per_line = np.bincount(tok_line, minlength=len(starts))
+    if len(values) != len(tok_line) or np.any(per_line < min_width):
+        raise ValueError("OBJ mal formado: coordenadas inválidas")
+
+    # Caso común: todas las líneas tienen exactamente `width` valores
+    if np.all(per_line == width):
+        return values.reshape(-1, width)
+
+    # Líneas con columnas de más (w, colores) o de menos (vt u)
+    rank = np.arange(len(tok_line)) - np.repeat(np.cumsum(per_line) - per_line, per_line)
+    keep = rank < width
+
+    out = np.zeros((len(starts), width), np.float32)
+    out[tok_line[keep], rank[keep]] = values[keep]
+    return out
+
+
+def _parse_face_refs(buf, starts, ends):
+    """Devuelve (refs (K,3) con índices OBJ crudos, 0 = ausente; vértices por polígono)"""
+    if len(starts) == 0:
+        return np.zeros((0, 3), np.int64), np.zeros(0, np.int64)
+
+    body, line_ends = _ragged_gather(buf, starts, ends, 1)
+    slash = body == _SLASH
+    word  = body > _SPACE
+
+    # Cada token "v/t/n" es un vértice; cada corrida de dígitos, un campo
+    vert_pos  = _token_starts(word)
+    field_pos = _token_starts(word & ~slash)
+    slash_pos = np.flatnonzero(slash)
+
+    # Componente del campo = barras entre el inicio del vértice y el campo
+    field_vert = np.searchsorted(vert_pos, field_pos, side="right") - 1
+    comp = (np.searchsorted(slash_pos, field_pos)
+            - np.searchsorted(slash_pos, vert_pos)[field_vert])
+
+    text = np.where(slash, np.uint8(_SPACE), body).tobytes()
+    values = np.fromstring(text, dtype=np.int64, sep=" ")
+    if len(values) != len(field_pos) or np.any(comp > 2):
+        raise ValueError("OBJ mal formado: referencia de cara inválida")
+
+    refs = np.zeros((len(vert_pos), 3), np.int64)
+    refs[field_vert, comp] = values
+
+    poly_sizes = np.bincount(np.searchsorted(line_ends, vert_pos), minlength=len(starts))
+    return refs, poly_sizes
+
+
+def parse_faces(buf, lines, before):
+    """
+    Triángulos (K,3,3) int32 [vi, ti, ni] 0-based de las líneas f de un
+    bloque (`lines` = classify_lines(buf)); -1 = ausente. Los índices
+    negativos son relativos a lo declarado antes de cada línea: `before`
+    cuenta los v / vt / vn de los bloques anteriores. No se valida contra
+    el total del archivo (ver clamp_refs).
+    """
+    starts, ends, is_v, is_vt, is_vn, is_f = lines
+    face_lines = np.flatnonzero(is_f)
+    if len(face_lines) == 0:
+        return np.zeros((0, 3, 3), np.int32)
+
+    refs, poly_sizes = _parse_face_refs(buf, starts[is_f], ends[is_f])
+    prior = np.stack([before[k] + np.searchsorted(np.flatnonzero(mask), face_lines)
+                      for k, mask in enumerate((is_v, is_vt, is_vn))], axis=1)
+    prior = np.repeat(prior, poly_sizes, axis=0)
+    refs = np.where(refs > 0, refs - 1, np.where(refs < 0, prior + refs, -1))
+    # Fuera de rango de int32 no puede ser válido
+    refs[(refs < 0) | (refs > np.iinfo(np.int32).max)] = -1
+    return _triangulate(refs, poly_sizes)
+
+
+def clamp_refs(corners, counts):
+    """Marca -1 (en el lugar) los índices [vi, ti, ni] de `corners` (..., 3) >= counts"""
+    for k in range(3):
+        col = corners[..., k]
+        col[col >= counts[k]] = -1
+
+
+def count_face_vertices(buf, starts, ends):
+    """Vértices de cada línea f (tokens después del tag), sin parsear los índices"""
+    if len(starts) == 0:
+        return np.zeros(0, np.int64)
+    body, line_ends = _ragged_gather(buf, starts, ends, 1)
+    tokens = _token_starts(body > _SPACE)
+    return np.bincount(np.searchsorted(line_ends, tokens), minlength=len(starts))
+
+
+def _triangulate(refs, poly_sizes):
+    """Triangulación en abanico de cada polígono (se descartan los de < 3 vértices)"""
+    offsets = np.cumsum(poly_sizes) - poly_sizes
+    ntri = np.maximum(poly_sizes - 2, 0)
+    first = np.repeat(offsets, ntri)
+    step  = np.arange(int(ntri.sum())) - np.repeat(np.cumsum(ntri) - ntri, ntri) + 1
+    corners = np.stack((first, first + step, first + step + 1), axis=1)
+    return refs[corners].astype(np.int32)
+
+
+def scatter_add(idx, values, n):
+    """Suma filas de values (K,3) en out[idx] (bincount es mucho más rápido que add.at)"""
+    return np.stack([np.bincount(idx, weights=values[:, k], minlength=n) for k in range(3)], axis=1)
+
+
+def normalize(v):
+    """Normaliza filas; las nulas quedan en (0, 0, 1)"""
+    length = np.linalg.norm(v, axis=1, keepdims=True)
+    return np.where(length > 1e-12, v / np.maximum(length, 1e-12), (0.0, 0.0, 1.0))
+
+
+# ------------------ Helpers vectorizados -------------------
+def _concat(parts, empty_shape, dtype):
+    """np.concatenate que suelta cada parte apenas la copia"""
+    total = sum(len(a) for a in parts)
+    if total == 0:
+        return np.zeros(empty_shape, dtype)
+    out = np.empty((total,) + tuple(empty_shape[1:]), dtype)
+    pos = 0
+    while parts:
+        a = parts.pop(0)
+        out[pos:pos + len(a)] = a
+        pos += len(a)
+    return out
+
+
+def _unique_rows(rows):
+    """Filas únicas en orden de primera aparición + índice de cada fila original"""
+    span = rows.max(axis=0).astype(np.int64) + 2 if len(rows) else np.ones(3, np.int64)
+    if int(span[0]) * int(span[1]) * int(span[2]) >= 2**62:
+        _, first, inverse = np.unique(rows, axis=0, return_index=True, return_inverse=True)
+        order = np.argsort(first, kind="stable")
+        remap = np.empty_like(order)
+        remap[order] = np.arange(len(order))
+        return rows[first[order]], remap[inverse.ravel()]
+
+    # (vi, ti, ni) empaquetado en una sola clave int64 (+1 para que -1 quepa),
+    # armada en el lugar para no copiar las filas enteras a int64
+    keys = rows[:, 0].astype(np.int64)
+    for k in (1, 2):
+        keys += 1
+        keys *= span[k]
+        keys += rows[:, k]
+    keys += 1
+
+    # Orden estable: el primero de cada grupo es su primera aparición
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    new = np.empty(len(keys), bool)
+    new[:1] = True
+    np.not_equal(keys[1:], keys[:-1], out=new[1:])
+    del keys
+    first = order[new]
+
+    # Número de grupo de cada fila, con los grupos en orden de archivo
+    # (mejor localidad que el orden de la clave)
+    rank = np.empty(len(first), np.int64)
+    rank[np.argsort(first)] = np.arange(len(first))
+    group = np.cumsum(new)
+    group -= 1
+    del new
+    inverse = np.empty(len(order), np.int64)
+    inverse[order] = rank[group]
+    return rows[np.sort(first)], inverse
+
+
+def _corner_contrib(p, mode):
+    """
+    (normal de cada cara (M,3), aporte ponderado de cada esquina (M*3,3))
+    para triángulos p (M,3,3) float64 según `mode` (NORMAL_MODES).
+    """
+    # Producto cruz por cara: dirección = normal, módulo = 2 * área
+    face_cross = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+    area2 = np.linalg.norm(face_cross, axis=1)
+    face_n = face_cross / np.maximum(area2, 1e-30)[:, None]
+    face_n[area2 <= 1e-12] = 0.0                        # degeneradas no aportan
+
+    # Peso de cada esquina (M,3)
+    if mode == "uniform":
+        weights = np.ones(p.shape[:2])
+    elif mode == "area":
+        weights = np.repeat(area2[:, None], 3, axis=1)
+    else:
+        e1 = np.roll(p, -1, axis=1) - p
+        e2 = np.roll(p, -2, axis=1) - p
+        cos_a = np.einsum("mki,mki->mk", e1, e2)
+        sin_a = np.linalg.norm(np.cross(e1, e2), axis=2)
+        weights = np.arctan2(sin_a, cos_a)
+
+    return face_n, np.repeat(face_n, 3, axis=0) * weights.reshape(-1, 1)
+
+
+def _gather(arr, idx, default):
+    """arr[idx] con `default` donde idx == -1 (la fila extra queda en la posición -1)"""
+    table = np.vstack((arr, np.asarray(default, np.float32)[None, :]))
+    return table[idx]
@@ -0,0 +1,229 @@
+"""
+Previews de todas las combinaciones malla x vertex shader x fragment shader
+(las listas `vertex_shaders` / `fragment_shaders` del selector), en paralelo.
+
+    python preview.py [mallas.obj ...] [--vertex Twist Jelly] [--fragment Toon Fire]
+                      [--workers N] [--size 256x256] [--time 1.3] [--out previews]
+
+Las combinaciones se reparten en un ProcessPoolExecutor; cada proceso
+abre su propio contexto headless (EGL + FBO, ver headless.py) una sola
+vez y entre trabajos conserva las mallas ya cargadas y los programas ya
+enlazados (la ShaderCache del Renderer; los binarios en disco también se
+comparten entre procesos). Los trabajos van ordenados por malla para que
+cada proceso cargue pocas.
+
+Con más de un proceso cada llvmpipe usa un solo hilo (LP_NUM_THREADS=1,
+salvo que ya esté exportado): el paralelismo viene de los procesos y así
+no compiten por los mismos núcleos.
+
+Salida: un PNG por combinación (<out>/<malla>/<vertex>_<fragment>.png),
+una hoja de contactos por malla (filas = vertex, columnas = fragment) y
+timings.json con los tiempos de cada imagen. Los pares que no compilan no
+generan PNG: quedan con "error" en timings.json y marcados en la hoja.
+"""
+
+import headless  # noqa: F401  (antes que OpenGL: elige la plataforma EGL)
+
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent
+
+LABEL_HEIGHT = 18
+GAP = 2
+
+
+# ------------------------------------------------------------
+# Proceso de trabajo (un contexto y un Renderer por proceso)
+# ------------------------------------------------------------
+_worker = None
+
+
+class _Worker(object):
+    def __init__(self, width, height, texturePath, skybox):
+        from gl import Renderer
+
+        os.chdir(ROOT)
+        self.context = headless.HeadlessContext(width, height)
+        self.rend = Renderer(self.context)
+        self.reader = headless.FrameReader(width, height, buffers=1)
+        self.texturePath = texturePath
+        self.skybox = skybox
+        self.models = {}            # malla -> Model (se reusa entre trabajos)
+
+    def Model(self, meshPath):
+        model = self.models.get(meshPath)
+        if model is None:
+            model = headless.BuildScene(self.rend, meshPath, self.texturePath,
+                                        skybox=self.skybox and not self.models)
+            self.models[meshPath] = model
+        self.rend.scene = [model]
+        return model
+
+    def Render(self, job):
+        meshPath, vname, fname, t, outPath = job
+        import fragmentShaders
+        import vertexShaders
+        from OpenGL.GL import glFinish
+
+        start = time.perf_counter()
+        self.Model(meshPath)
+        loaded = time.perf_counter()
+
+        misses = self.rend.shaderCache.stats["misses"]
+        self.rend.SetShaders(dict(vertexShaders.vertex_shaders)[vname],
+                             dict(fragmentShaders.fragment_shaders)[fname])
+        compiled = self.rend.shaderCache.stats["misses"] != misses
+        linked = time.perf_counter()
+
+        # Si el par no compila no hay nada que dibujar: sin PNG, la celda queda marcada
+        if self.rend.activeProgram is None:
+            timing = {"mesh": meshPath, "vertex": vname, "fragment": fname, "png": None,
+                      "worker": os.getpid(), "compiled": False, "error": "los shaders no compilan",
+                      "load_ms": (loaded - start) * 1e3, "shader_ms": (linked - loaded) * 1e3,
+                      "total_ms": (linked - start) * 1e3}
+            return timing, None
+
+        self.rend.elapsedTime = t
+        self.rend.Render()
+        glFinish()
+        drawn = time.perf_counter()
+        (_, rgba), = self.reader.Request() + self.reader.Flush()
+        rgb = np.ascontiguousarray(rgba[::-1, :, :3])
+        read = time.perf_counter()
+
+        Path(outPath).parent.mkdir(parents=True, exist_ok=True)
+        headless._SavePNG(outPath, rgb)
+        end = time.perf_counter()
+
+        timing = {"mesh": meshPath, "vertex": vname, "fragment": fname, "png": str(outPath),
+                  "worker": os.getpid(), "compiled": compiled,
+                  "load_ms": (loaded - start) * 1e3, "shader_ms": (linked - loaded) * 1e3,
+                  "render_ms": (drawn - linked) * 1e3, "readback_ms": (read - drawn) * 1e3,
+                  "write_ms": (end - read) * 1e3, "total_ms": (end - start) * 1e3}
+        return timing, rgb
+
+
+def _InitWorker(width, height, texturePath, skybox, singleThreaded):
+    global _worker
+    if singleThreaded:
+        os.environ.setdefault("LP_NUM_THREADS", "1")
+    _worker = _Worker(width, height, texturePath, skybox)
+
+
+def _RunJob(job):
+    return _worker.Render(job)
+
+
+# ------------------------------------------------------------
+# Hoja de contactos
+# ------------------------------------------------------------
+def ContactSheet(images, rows, cols, path, size):
+    """images[(fila, columna)] = rgb (h, w, 3) o None (falló); rows/cols = etiquetas; size = (w, h)"""
+    import pygame
+
+    w, h = size
+    pygame.font.init()
+    font = pygame.font.Font(None, LABEL_HEIGHT)
+    labelWidth = max(font.size(r)[0] for r in rows) + 2 * GAP
+
+    sheet = pygame.Surface((labelWidth + len(cols) * (w + GAP) + GAP,
+                            LABEL_HEIGHT + len(rows) * (h + GAP) + GAP))
+    sheet.fill((24, 24, 28))
+    for j, name in enumerate(cols):
+        sheet.blit(font.render(name, True, (230, 230, 230)), (labelWidth + GAP + j * (w + GAP), 2))
+    for i, name in enumerate(rows):
+        y = LABEL_HEIGHT + GAP + i * (h + GAP)
+        sheet.blit(font.render(name, True, (230, 230, 230)), (GAP, y + h // 2 - LABEL_HEIGHT // 3))
+        for j in range(len(cols)):
+            x = labelWidth + GAP + j * (w + GAP)
+            if (i, j) not in images:
+                continue
+            rgb = images[(i, j)]
+            if rgb is not None:
+                sheet.blit(pygame.image.frombuffer(rgb.tobytes(), (w, h), "RGB"), (x, y))
+            else:
+                sheet.fill((90, 24, 28), (x, y, w, h))
+                label = font.render("no compila", True, (240, 200, 200))
+                sheet.blit(label, (x + (w - label.get_width()) // 2, y + (h - label.get_height()) // 2))
+    pygame.image.save(sheet, str(path))
+
+
+def main(argv=None):
+    import argparse
+
+    import fragmentShaders
+    import vertexShaders
+
+    vertexNames = [name for name, _ in vertexShaders.vertex_shaders]
+    fragmentNames = [name for name, _ in fragmentShaders.fragment_shaders]
+
+    ap = argparse.ArgumentParser(description="Previews de todas las combinaciones de shaders")
+    ap.add_argument("meshes", nargs="*", help="OBJ (por defecto models/*.obj)")
+    ap.add_argument("--vertex", nargs="+", choices=vertexNames, default=vertexNames)
+    ap.add_argument("--fragment", nargs="+", choices=fragmentNames, default=fragmentNames)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--size", default="256x256", help="ANCHOxALTO de cada preview")
+    ap.add_argument("--time", type=float, default=1.3, help="uTime de las animaciones")
+    ap.add_argument("--texture", default="textures/0000.jpg.jpeg")
+    ap.add_argument("--no-skybox", action="store_true")
+    ap.add_argument("--out", default="previews")
+    args = ap.parse_args(argv)
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    meshes = [str(Path(m).resolve()) for m in args.meshes] or sorted(str(p) for p in (ROOT / "models").glob("*.obj"))
+    out = Path(args.out).resolve()
+    os.chdir(ROOT)
+
+    # Ordenados por malla: cada proceso toma tandas seguidas y carga pocas mallas
+    jobs = [(mesh, v, f, args.time, str(out / Path(mesh).stem / f"{v}_{f}.png"))
+            for mesh in meshes for v in args.vertex for f in args.fragment]
+    workers = max(1, min(args.workers, len(jobs)))
+    chunk = max(1, len(jobs) // (workers * 4))
+    print(f"{len(jobs)} previews ({len(meshes)} mallas x {len(args.vertex)} vertex x "
+          f"{len(args.fragment)} fragment) con {workers} procesos")
+
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_InitWorker,
+                             initargs=(width, height, args.texture, not args.no_skybox, workers > 1)) as pool:
+        for timing, rgb in pool.map(_RunJob, jobs, chunksize=chunk):
+            results.append((timing, rgb))
+    wall = time.perf_counter() - start
+
+    # Una hoja de contactos por malla
+    for mesh in meshes:
+        images = {(args.vertex.index(t["vertex"]), args.fragment.index(t["fragment"])): rgb
+                  for t, rgb in results if t["mesh"] == mesh}
+        sheet = out / f"sheet_{Path(mesh).stem}.png"
+        ContactSheet(images, args.vertex, args.fragment, sheet, (width, height))
+        print(f"✓ Hoja de contactos: {sheet}")
+
+    timings = [t for t, _ in results]
+    failed = [t for t in timings if "error" in t]
+    for t in failed:
+        print(f"✗ {Path(t['mesh']).stem}: {t['vertex']} + {t['fragment']}: {t['error']}")
+    busy = sum(t["total_ms"] for t in timings) / 1e3
+    done = len(timings) - len(failed)
+    summary = {"images": done, "failed": len(failed), "workers": workers, "size": [width, height],
+               "wall_s": wall, "busy_s": busy, "images_per_s": done / max(wall, 1e-9)}
+    (out / "timings.json").write_text(json.dumps({"summary": summary, "images": timings}, indent=2))
+
+    render = np.array([t["render_ms"] for t in timings if "error" not in t] or [0.0])
+    print(f"✓ {summary['images']} imágenes en {wall:.1f} s ({summary['images_per_s']:.1f}/s), "
+          f"trabajo {busy:.1f} s en {workers} procesos -> x{busy / max(wall, 1e-9):.2f}")
+    print(f"  render: mediana {np.median(render):.1f} ms, máx {render.max():.1f} ms; "
+          f"detalle en {out / 'timings.json'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,435 @@
+"""
+Perfilado por frame: tiempos de CPU por fase, tiempos de GPU con queries
+GL_TIME_ELAPSED y contadores del Renderer (draws, binds, uniforms).
+
+    prof = rend.profiler
+    prof.BeginFrame()
+    with prof.Scope("input"):
+        ...eventos...
+    rend.Render()                   # fases camera, assets, transforms, skybox, scene (+ GPU)
+    with prof.Scope("flip"):
+        pygame.display.flip()
+    prof.EndFrame(rend.frameStats)
+
+Si nadie llama BeginFrame(), Renderer.Render() abre y cierra el frame solo.
+
+Viene apagado (`enabled` y `perDraw` en False): medir cada fase y cada
+draw cuesta frame time, así que lo prende quien lo va a mirar (el script
+principal con `P`/`T` o `--profile`).
+
+Todo va a buffers NumPy de tamaño fijo (anillo): `frames` guarda un
+registro por frame (CPU total, GPU total, fases, contadores) y `events`
+los intervalos sueltos (cada draw, cada fase) para exportar a Chrome
+trace (chrome://tracing o https://ui.perfetto.dev).
+
+Las queries de GPU van en un anillo de QUERY_FRAMES frames: el resultado
+del frame N se pide recién cuando GL_QUERY_RESULT_AVAILABLE dice que está,
+unos frames después, así leerlo nunca frena el pipeline. Si el anillo da
+la vuelta sin resultado, ese frame queda sin tiempo de GPU (NaN).
+"""
+
+import ctypes
+import json
+import os
+import time
+from contextlib import nullcontext
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL.shaders import compileProgram, compileShader
+
+FRAME_CAPACITY = 1024
+EVENT_CAPACITY = 65536
+QUERY_FRAMES = 4
+
+# Fases con columna propia en `frames` (el resto solo queda en `events`)
+PHASES = ("input", "camera", "assets", "transforms", "skybox", "scene", "overlay", "flip")
+GPU_PHASES = ("skybox", "scene")
+COUNTERS = ("draws", "triangles", "program_binds", "texture_binds", "vao_binds",
+            "uniform_uploads", "culled")
+
+_MAX_VALID_NS = 10e9     # llvmpipe devuelve basura en la primera query del contexto
+
+_CPU_TRACK, _GPU_TRACK = 1, 2
+
+
+class FrameProfiler(object):
+    def __init__(self, capacity=FRAME_CAPACITY, eventCapacity=EVENT_CAPACITY, gpu=True):
+        self.enabled = False            # apagado: BeginFrame/Scope no hacen nada
+        self.gpu = gpu                  # queries GL_TIME_ELAPSED (necesita contexto GL)
+        self.perDraw = False            # un evento por draw en la traza (lo más caro)
+
+        dtype = [("frame", "<i8"), ("start_ms", "<f8"), ("cpu_ms", "<f4"), ("gpu_ms", "<f4"),
+                 ("phase_ms", "<f4", len(PHASES)), ("gpu_phase_ms", "<f4", len(GPU_PHASES))]
+        dtype += [(name, "<i8") for name in COUNTERS]
+        self.frames = np.zeros(capacity, dtype)
+        self.frames["frame"] = -1
+        self.events = np.zeros(eventCapacity, [("name", "<i4"), ("track", "<i1"), ("frame", "<i8"),
+                                                ("start_us", "<f8"), ("dur_us", "<f4")])
+        self.frames_recorded = 0
+        self.events_recorded = 0
+        self.names = []
+        self._nameIds = {}
+
+        self.frame = -1
+        self.inFrame = False
+        self._origin = time.perf_counter()
+        self._frameStart = 0.0
+        self._row = None
+
+        self._queries = None            # (QUERY_FRAMES, len(GPU_PHASES)) ids, al primer uso
+        self._queryFrame = np.full(QUERY_FRAMES, -1, np.int64)
+        self._queryUsed = np.zeros((QUERY_FRAMES, len(GPU_PHASES)), np.bool_)
+        self._queryStart = np.zeros((QUERY_FRAMES, len(GPU_PHASES)), np.float64)
+        self.stats = {"gpu_dropped": 0}
+
+    # -------------------- Frame ------------------------
+    def BeginFrame(self):
+        if not self.enabled:
+            return
+        if self.inFrame:
+            self.EndFrame()
+        self.frame += 1
+        self.inFrame = True
+        self._frameStart = time.perf_counter()
+
+        row = self.frames[self.frame % len(self.frames)]
+        row["frame"] = self.frame
+        row["start_ms"] = (self._frameStart - self._origin) * 1e3
+        row["gpu_ms"] = np.nan
+        row["phase_ms"] = 0.0
+        row["gpu_phase_ms"] = np.nan
+        for name in COUNTERS:
+            row[name] = 0
+        self._row = row
+
+        if self.gpu:
+            self._ReclaimQueries(self.frame % QUERY_FRAMES)
+
+    def EndFrame(self, stats=None):
+        """Cierra el frame; `stats` = Renderer.frameStats (contadores de draws/binds/uniforms)"""
+        if not self.inFrame:
+            return
+        end = time.perf_counter()
+        row = self._row
+        row["cpu_ms"] = (end - self._frameStart) * 1e3
+        if stats:
+            for name in COUNTERS:
+                row[name] = stats.get(name, 0)
+        self._Event("frame", _CPU_TRACK, self._frameStart, end)
+        self.inFrame = False
+        self.frames_recorded += 1
+        if self.gpu:
+            self._CollectQueries(wait=False)
+
+    def Scope(self, name, gpu=False):
+        """with prof.Scope("skybox", gpu=True): ... (CPU siempre; GPU si la fase está en GPU_PHASES)"""
+        if not self.enabled or not self.inFrame:
+            return nullcontext()
+        return _Scope(self, name, gpu and self.gpu and name in GPU_PHASES)
+
+    def Draw(self, name, start, end):
+        """Evento de un draw (lo llama RenderQueue.Submit con perf_counter antes/después)"""
+        if self.inFrame and self.perDraw:
+            self._Event(name, _CPU_TRACK, start, end)
+
+    # -------------------- Resultados ------------------------
+    def Recent(self, count=None):
+        """Registros de los últimos `count` frames cerrados, en orden"""
+        done = self.frames[(self.frames["frame"] >= 0) & (self.frames["frame"] < self.frame + (not self.inFrame))]
+        done = np.sort(done, order="frame")
+        return done if count is None else done[-count:]
+
+    def Summary(self, count=None):
+        """p50 / p95 / p99 (ms) de frame CPU, GPU y cada fase, más contadores medios"""
+        frames = self.Recent(count)
+        summary = {"frames": len(frames)}
+        if not len(frames):
+            return summary
+        summary["cpu_ms"] = _Percentiles(frames["cpu_ms"])
+        summary["gpu_ms"] = _Percentiles(frames["gpu_ms"])
+        summary["fps"] = 1e3 / max(float(np.median(frames["cpu_ms"])), 1e-6)
+        summary["phases"] = {name: _Percentiles(frames["phase_ms"][:, i]) for i, name in enumerate(PHASES)
+                             if frames["phase_ms"][:, i].any()}
+        summary["gpu_phases"] = {name: _Percentiles(frames["gpu_phase_ms"][:, i])
+                                 for i, name in enumerate(GPU_PHASES)}
+        summary["counters"] = {name: float(frames[name].mean()) for name in COUNTERS}
+        return summary
+
+    def Report(self, count=None):
+        s = self.Summary(count)
+        if not s["frames"]:
+            print("Perfil: sin frames")
+            return
+        print(f"Perfil ({s['frames']} frames, {s['fps']:.1f} fps por CPU):")
+        print("  " + _FormatPercentiles("frame CPU", s["cpu_ms"]))
+        print("  " + _FormatPercentiles("frame GPU", s["gpu_ms"]))
+        for name, p in s["phases"].items():
+            print("  " + _FormatPercentiles(name, p))
+        for name, p in s["gpu_phases"].items():
+            print("  " + _FormatPercentiles(f"{name} (GPU)", p))
+        print("  " + ", ".join(f"{k} {v:.0f}" for k, v in s["counters"].items()))
+
+    def ExportChromeTrace(self, path):
+        """JSON de Chrome trace (eventos 'X' en µs; pista 1 = CPU, 2 = GPU)"""
+        self._CollectQueries(wait=True)
+        count = min(self.events_recorded, len(self.events))
+        events = np.sort(self.events[:count], order="start_us") if count else self.events[:0]
+        pid = os.getpid()
+        trace = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": _CPU_TRACK, "args": {"name": "CPU"}},
+                 {"name": "thread_name", "ph": "M", "pid": pid, "tid": _GPU_TRACK,
+                  "args": {"name": "GPU (inicio alineado con la CPU)"}}]
+        for e in events.tolist():
+            name, track, frame, start, dur = e
+            trace.append({"name": self.names[name], "cat": "gpu" if track == _GPU_TRACK else "cpu",
+                          "ph": "X", "pid": pid, "tid": int(track), "ts": round(start, 3),
+                          "dur": round(float(dur), 3), "args": {"frame": int(frame)}})
+        for f in self.Recent().tolist():
+            record = dict(zip(self.frames.dtype.names, f))
+            trace.append({"name": "counters", "ph": "C", "pid": pid, "ts": round(record["start_ms"] * 1e3, 3),
+                          "args": {name: int(record[name]) for name in COUNTERS}})
+        with open(path, "w") as fp:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, fp)
+        print(f"✓ Traza exportada: {path} ({len(trace)} eventos)")
+
+    def Delete(self):
+        if self._queries is not None:
+            glDeleteQueries(self._queries.size, self._queries.reshape(-1))
+            self._queries = None
+
+    # -------------------- Interno ------------------------
+    def _NameId(self, name):
+        nid = self._nameIds.get(name)
+        if nid is None:
+            nid = self._nameIds[name] = len(self.names)
+            self.names.append(name)
+        return nid
+
+    def _Event(self, name, track, start, end):
+        e = self.events[self.events_recorded % len(self.events)]
+        e["name"] = self._NameId(name)
+        e["track"] = track
+        e["frame"] = self.frame
+        e["start_us"] = (start - self._origin) * 1e6
+        e["dur_us"] = (end - start) * 1e6
+        self.events_recorded += 1
+
+    def _EndScope(self, name, start, end):
+        self._Event(name, _CPU_TRACK, start, end)
+        if name in PHASES:
+            self._row["phase_ms"][PHASES.index(name)] += (end - start) * 1e3
+
+    def _BeginQuery(self, phase, start):
+        if self._queries is None:
+            ids = np.atleast_1d(glGenQueries(QUERY_FRAMES * len(GPU_PHASES)))
+            self._queries = np.asarray(ids, np.uint32).reshape(QUERY_FRAMES, len(GPU_PHASES))
+        slot = self.frame % QUERY_FRAMES
+        self._queryFrame[slot] = self.frame
+        self._queryUsed[slot, phase] = True
+        self._queryStart[slot, phase] = start
+        glBeginQuery(GL_TIME_ELAPSED, int(self._queries[slot, phase]))
+
+    def _ReclaimQueries(self, slot):
+        """Antes de reusar el slot: si su frame sigue sin resultado, se descarta"""
+        if self._queryFrame[slot] < 0:
+            return
+        if not self._CollectSlot(slot, wait=False):
+            self.stats["gpu_dropped"] += 1
+            self._queryFrame[slot] = -1
+            self._queryUsed[slot] = False
+
+    def _CollectQueries(self, wait):
+        for slot in np.argsort(self._queryFrame).tolist():
+            frame = self._queryFrame[slot]
+            if frame < 0 or (frame == self.frame and self.inFrame):
+                continue
+            if not self._CollectSlot(slot, wait) and not wait:
+                break       # los más nuevos tampoco van a estar
+
+    def _CollectSlot(self, slot, wait):
+        used = np.flatnonzero(self._queryUsed[slot]).tolist()
+        if used and not wait:
+            available = GLint()
+            glGetQueryObjectiv(int(self._queries[slot, used[-1]]), GL_QUERY_RESULT_AVAILABLE,
+                               ctypes.byref(available))
+            if not available.value:
+                return False
+
+        frame = int(self._queryFrame[slot])
+        row = self.frames[frame % len(self.frames)]
+        valid = row["frame"] == frame
+        total = 0.0
+        for phase in used:
+            elapsed = GLuint64()
+            glGetQueryObjectui64v(int(self._queries[slot, phase]), GL_QUERY_RESULT, ctypes.byref(elapsed))
+            ns = float(elapsed.value) if elapsed.value < _MAX_VALID_NS else np.nan
+            total += ns
+            if valid:
+                row["gpu_phase_ms"][phase] = ns * 1e-6
+            if ns == ns:
+                start = self._queryStart[slot, phase]
+                self._Event(GPU_PHASES[phase], _GPU_TRACK, start, start + ns * 1e-9)
+        if valid and used:
+            row["gpu_ms"] = total * 1e-6
+        self._queryFrame[slot] = -1
+        self._queryUsed[slot] = False
+        return True
+
+
+class _Scope(object):
+    __slots__ = ("profiler", "name", "phase", "start")
+
+    def __init__(self, profiler, name, gpu):
+        self.profiler = profiler
+        self.name = name
+        self.phase = GPU_PHASES.index(name) if gpu else -1
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        if self.phase >= 0:
+            self.profiler._BeginQuery(self.phase, self.start)
+        return self
+
+    def __exit__(self, *exc):
+        if self.phase >= 0:
+            glEndQuery(GL_TIME_ELAPSED)
+        self.profiler._EndScope(self.name, self.start, time.perf_counter())
+        return False
+
+
+def _Percentiles(values):
+    values = np.asarray(values, np.float64)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return {"p50": np.nan, "p95": np.nan, "p99": np.nan, "max": np.nan}
+    p50, p95, p99 = np.percentile(values, (50, 95, 99))
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(values.max())}
+
+
+def _FormatPercentiles(label, p):
+    return (f"{label:<16} p50 {p['p50']:7.2f} ms  p95 {p['p95']:7.2f} ms  "
+            f"p99 {p['p99']:7.2f} ms  máx {p['max']:7.2f} ms")
+
+
+# ------------------------------------------------------------
+# Overlay en pantalla
+# ------------------------------------------------------------
+_OVERLAY_VS = """
+#version 330 core
+uniform vec4 uRect;     // x0, y0, x1, y1 en NDC
+out vec2 uv;
+void main() {
+    vec2 corner = vec2(gl_VertexID & 1, gl_VertexID >> 1);
+    uv = vec2(corner.x, 1.0 - corner.y);
+    gl_Position = vec4(mix(uRect.xy, uRect.zw, corner), 0.0, 1.0);
+}
+"""
+
+_OVERLAY_FS = """
+#version 330 core
+uniform sampler2D uOverlay;
+in vec2 uv;
+out vec4 outColor;
+void main() {
+    outColor = texture(uOverlay, uv);
+}
+"""
+
+
+class ProfilerOverlay(object):
+    """Panel con percentiles, contadores y gráfico de frame time; la textura se rehace cada `interval` s"""
+
+    def __init__(self, profiler, width=320, height=170, interval=0.25):
+        import pygame
+
+        pygame.font.init()
+        self.profiler = profiler
+        self.width, self.height = width, height
+        self.interval = interval
+        self.font = pygame.font.Font(None, 16)
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self._lastUpdate = -np.inf
+
+        self.program = compileProgram(compileShader(_OVERLAY_VS, GL_VERTEX_SHADER),
+                                      compileShader(_OVERLAY_FS, GL_FRAGMENT_SHADER))
+        self.rectLoc = glGetUniformLocation(self.program, "uRect")
+        self.vao = glGenVertexArrays(1)
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA8, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+    def Render(self, viewportWidth, viewportHeight, margin=8):
+        now = time.perf_counter()
+        if now - self._lastUpdate >= self.interval:
+            self._Redraw()
+            self._lastUpdate = now
+
+        # Esquina superior izquierda, en píxeles -> NDC
+        x0 = -1.0 + 2.0 * margin / viewportWidth
+        y1 = 1.0 - 2.0 * margin / viewportHeight
+        x1 = x0 + 2.0 * self.width / viewportWidth
+        y0 = y1 - 2.0 * self.height / viewportHeight
+
+        depthTest = glIsEnabled(GL_DEPTH_TEST)
+        glDisable(GL_DEPTH_TEST)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glUseProgram(self.program)
+        glUniform4f(self.rectLoc, x0, y0, x1, y1)
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glBindVertexArray(self.vao)
+        glDrawArrays(GL_TRIANGLE_STRIP, 0, 4)
+        glBindVertexArray(0)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_BLEND)
+        if depthTest:
+            glEnable(GL_DEPTH_TEST)
+
+    def Delete(self):
+        glDeleteProgram(self.program)
+        glDeleteTextures(1, [self.texture])
+        glDeleteVertexArrays(1, [self.vao])
+
+    def _Redraw(self):
+        import pygame
+
+        surf = self.surface
+        surf.fill((16, 16, 20, 200))
+        frames = self.profiler.Recent(240)
+        s = self.profiler.Summary(240)
+        white, grey = (235, 235, 235), (160, 160, 170)
+
+        lines = []
+        if s["frames"]:
+            cpu, gpu, c = s["cpu_ms"], s["gpu_ms"], s["counters"]
+            lines.append((f"{s['fps']:5.1f} fps   CPU p50 {cpu['p50']:.1f}  p95 {cpu['p95']:.1f}  "
+                          f"p99 {cpu['p99']:.1f} ms", white))
+            lines.append((f"GPU p50 {gpu['p50']:.2f}  p95 {gpu['p95']:.2f}  p99 {gpu['p99']:.2f} ms", white))
+            lines.append((f"draws {c['draws']:.0f}  tris {c['triangles']:.0f}  binds "
+                          f"{c['program_binds'] + c['texture_binds'] + c['vao_binds']:.0f}  "
+                          f"uniforms {c['uniform_uploads']:.0f}", grey))
+            phases = [f"{k} {v['p50']:.1f}" for k, v in s["phases"].items()]
+            for i in range(0, len(phases), 4):
+                lines.append(("  ".join(phases[i:i + 4]), grey))
+        for i, (text, color) in enumerate(lines):
+            surf.blit(self.font.render(text, True, color), (6, 4 + 14 * i))
+
+        # Gráfico de frame time (CPU blanco, GPU verde) con línea de 16.7 ms
+        top, bottom = 4 + 14 * len(lines) + 6, self.height - 6
+        if len(frames) > 1:
+            scale = max(33.3, float(np.nanmax(frames["cpu_ms"])))
+            xs = np.linspace(6, self.width - 6, len(frames))
+            for values, color in ((frames["cpu_ms"], white), (frames["gpu_ms"], (90, 220, 120))):
+                ys = bottom - np.nan_to_num(values) / scale * (bottom - top)
+                pygame.draw.lines(surf, color, False, np.column_stack((xs, ys)).tolist())
+            target = bottom - 16.7 / scale * (bottom - top)
+            pygame.draw.line(surf, (200, 120, 60), (6, target), (self.width - 6, target))
+
+        pixels = pygame.image.tostring(surf, "RGBA", False)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE, pixels)
+        glBindTexture(GL_TEXTURE_2D, 0)
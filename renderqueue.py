@@ -0,0 +1,128 @@
+"""
+Cola de render: ordena los draws del frame para cambiar de estado lo menos
+posible y emite solo los cambios necesarios.
+
+Cada modelo recibe una clave de 64 bits
+
+    [programa 8][array de textura 16][VAO 16][profundidad 24]
+
+y el orden sale de un np.argsort estable sobre todas las claves. Dentro de
+un mismo estado los objetos van de adelante hacia atrás (profundidad en
+espacio de vista del TransformStore), así el early-Z descarta fragmentos
+tapados. Todos los modelos del repo son opacos.
+"""
+
+import time
+
+import numpy as np
+from OpenGL.GL import *
+
+DEFAULT_COLOR = (0.85, 0.85, 0.85)
+
+_DEPTH_BITS = 24
+_VAO_SHIFT, _TEXTURE_SHIFT, _PROGRAM_SHIFT = 24, 40, 56
+
+
+class RenderQueue(object):
+    def __init__(self):
+        self.models = []
+        self.programSlots = np.zeros(0, np.int64)
+        self.stats = {"draws": 0, "triangles": 0, "program_binds": 0, "texture_binds": 0, "vao_binds": 0}
+
+    def ResetStats(self):
+        for k in self.stats:
+            self.stats[k] = 0
+
+    # -------------------- Orden ------------------------
+    def Build(self, models, programSlots, transforms):
+        """Ordena `models` (programSlots[i] = índice de programa) por estado y profundidad"""
+        n = len(models)
+        if n == 0:
+            self.models, self.programSlots = [], np.zeros(0, np.int64)
+            return self.models
+
+        programSlots = np.asarray(programSlots, np.int64)
+        textures = np.fromiter((_TextureArray(m) for m in models), np.int64, n)
+        vaos = np.fromiter((m.vao for m in models), np.int64, n)
+        slots = np.fromiter((m._slot for m in models), np.int64, n)
+
+        # Rango denso para que ids GL grandes entren en sus bits
+        textureRank = np.unique(textures, return_inverse=True)[1].reshape(-1).astype(np.uint64)
+        vaoRank = np.unique(vaos, return_inverse=True)[1].reshape(-1).astype(np.uint64)
+
+        # Distancia a la cámara (-z en espacio de vista), cuantizada al rango del frame
+        depth = -transforms.modelView[slots, 2, 3]
+        near = depth.min()
+        span = max(float(depth.max() - near), 1e-6)
+        depthKey = ((depth - near) * ((1 << _DEPTH_BITS) - 1) / span).astype(np.uint64)
+
+        keys = (programSlots.astype(np.uint64) << np.uint64(_PROGRAM_SHIFT)) \
+             | (textureRank << np.uint64(_TEXTURE_SHIFT)) \
+             | (vaoRank << np.uint64(_VAO_SHIFT)) \
+             | depthKey
+        order = np.argsort(keys, kind="stable")
+
+        self.models = [models[i] for i in order]
+        self.programSlots = programSlots[order]
+        return self.models
+
+    # -------------------- Emisión ------------------------
+    def Submit(self, programs, profiler=None):
+        """Dibuja en el orden de Build(); programs[slot] es un ShaderProgram (o None para omitir)"""
+        stats = self.stats
+        currentProgram = currentArray = currentVao = None
+        # Evento por draw en la traza del profiler (tiempo de CPU de emitir el draw)
+        timeDraws = profiler is not None and profiler.perDraw and profiler.inFrame
+
+        for model, slot in zip(self.models, self.programSlots.tolist()):
+            prog = programs[slot]
+            if prog is None:
+                continue
+
+            if prog is not currentProgram:
+                prog.Use()
+                currentProgram = prog
+                stats["program_binds"] += 1
+                # Color base (si no hay textura) y unidad de textura: fijos por programa
+                prog.SetVec3("uColor", DEFAULT_COLOR)
+                prog.SetInt("uTexture0", 0)
+
+            if slot == 0:
+                prog.SetMat4("modelMatrix", model.GetModelMatrix())
+            # Decodificación de posiciones compactas (1 y 0 en modelos float32: no se re-suben)
+            prog.SetVec3("uPositionScale", model.positionScale)
+            prog.SetVec3("uPositionBias", model.positionBias)
+
+            # Textura (solo si hay UVs): capa de un array, se re-liga solo si cambia el array
+            has_tex = (len(model.textures) > 0) and getattr(model, "_has_uv", False)
+            prog.SetBool("uHasTexture", has_tex)
+            if has_tex:
+                handle = model.textures[0]
+                if handle.array != currentArray:
+                    glActiveTexture(GL_TEXTURE0)
+                    glBindTexture(GL_TEXTURE_2D_ARRAY, handle.array)
+                    currentArray = handle.array
+                    stats["texture_binds"] += 1
+                prog.SetFloat("uTextureLayer", handle.layer)
+
+            if model.vao != currentVao:
+                glBindVertexArray(model.vao)
+                currentVao = model.vao
+                stats["vao_binds"] += 1
+
+            if timeDraws:
+                start = time.perf_counter()
+                stats["triangles"] += model.Draw()
+                profiler.Draw(model.name, start, time.perf_counter())
+            else:
+                stats["triangles"] += model.Draw()
+            stats["draws"] += 1
+
+        if currentVao is not None:
+            glBindVertexArray(0)
+
+
+def _TextureArray(model):
+    if model.textures and getattr(model, "_has_uv", False):
+        return model.textures[0].array
+    return 0
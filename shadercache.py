@@ -0,0 +1,255 @@
+"""
+Caché de programas GLSL para cambiar de shader sin recompilar.
+
+Los programas se indexan por (hash del vertex, hash del fragment) en un
+LRU; al desalojar uno se llama glDeleteProgram. Si el driver soporta
+program binaries (GL 4.1 / ARB_get_program_binary) cada programa enlazado
+se guarda también en disco y los arranques siguientes lo cargan con
+glProgramBinary en vez de compilar.
+
+El contexto GL pertenece al hilo principal, así que el "warm-up" de todas
+las combinaciones no usa otro hilo: WarmUp() encola los pares y Update()
+compila los que quepan en un presupuesto de tiempo por frame. El
+presupuesto se comprueba antes de compilar, con una estimación de cuánto
+tarda cada programa (medida en los anteriores); si uno solo no cabe en un
+frame, el presupuesto no usado se acumula hasta que alcance. Las fuentes y
+pares que fallan se recuerdan y no se vuelven a intentar.
+"""
+
+import ctypes
+import hashlib
+import os
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL.shaders import ShaderCompilationError, compileShader
+from OpenGL.error import GLError
+
+from shaderprogram import ShaderProgram
+
+SHADER_CACHE_DIR = Path(os.environ.get("RENDERER_SHADER_CACHE",
+                                       Path(__file__).resolve().parent / ".shadercache"))
+
+
+class ShaderCache(object):
+    def __init__(self, capacity: int = 128, diskCache: bool = True):
+        self.capacity = capacity
+        self.programs = OrderedDict()      # (hash_vs, hash_fs) -> ShaderProgram
+        self._pending = deque()
+        self._failed = set()               # fuentes o pares que no compilan: el warm-up no los reintenta
+        self._credit = 0.0                 # presupuesto de warm-up acumulado entre frames
+        self._estimate = {"disk": None, "compile": None}   # segundos por programa (media móvil)
+        self.stats = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0, "warmed": 0}
+
+        # Solo se persiste si el driver expone al menos un formato binario
+        self.diskDir = None
+        if diskCache:
+            try:
+                if glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS) > 0:
+                    self.diskDir = SHADER_CACHE_DIR
+            except Exception:
+                pass
+
+        # Un cambio de driver invalida los binarios guardados
+        driver = b"|".join(glGetString(e) or b"" for e in (GL_VENDOR, GL_RENDERER, GL_VERSION))
+        self._driverTag = hashlib.sha1(driver).hexdigest()[:16]
+
+    # -------------------- API pública ------------------------
+    def Get(self, vertex_source, fragment_source):
+        """ShaderProgram enlazado para el par de fuentes (compila solo si no está en caché)"""
+        key = (_Hash(vertex_source), _Hash(fragment_source))
+        prog = self.programs.get(key)
+        if prog is not None:
+            self.programs.move_to_end(key)
+            self.stats["hits"] += 1
+            return prog
+
+        self.stats["misses"] += 1
+        prog = ShaderProgram(self._Build(key, vertex_source, fragment_source))
+        self._Insert(key, prog)
+        return prog
+
+    def WarmUp(self, pairs):
+        """Encola pares (vertex, fragment) para precompilarlos con Update()"""
+        self._pending.extend(pairs)
+
+    def Update(self, budget: float = 0.004):
+        """Compila pares pendientes sin pasarse de `budget` segundos por frame; devuelve cuántos faltan"""
+        if not self._pending:
+            self._credit = 0.0
+            return 0
+
+        start = time.perf_counter()
+        self._credit += budget
+        while self._pending:
+            vs, fs = self._pending[0]
+            key = (_Hash(vs), _Hash(fs))
+            if key in self.programs or self._IsBad(key):
+                self._pending.popleft()
+                continue
+
+            # Comprobar antes de compilar: si no cabe, esperar al próximo frame
+            kind = "disk" if self._HasBinary(key) else "compile"
+            spent = time.perf_counter() - start
+            if spent + self._Estimate(kind, budget) > self._credit:
+                break
+            self._pending.popleft()
+
+            t0 = time.perf_counter()
+            try:
+                prog = ShaderProgram(self._Build(key, vs, fs))
+            except RuntimeError as e:
+                self._failed.add(_FailedKey(key, e))
+                print("✗ Warm-up de shader falló (no se reintenta):", e)
+                continue
+            finally:
+                self._Measure(kind, time.perf_counter() - t0)
+            # Los precompilados entran como "menos recientes": no desalojan al activo
+            self._Insert(key, prog)
+            self.programs.move_to_end(key, last=False)
+            self.stats["warmed"] += 1
+
+        # Lo gastado sale del crédito; lo que sobra se guarda solo si hace falta
+        # para un programa que no cabe en un frame
+        estimate = self._Estimate("compile", budget)
+        carry = estimate if estimate > budget else 0.0
+        self._credit = max(0.0, min(self._credit - (time.perf_counter() - start), carry))
+        return len(self._pending)
+
+    def Clear(self):
+        for prog in self.programs.values():
+            prog.Delete()
+        self.programs.clear()
+        self._pending.clear()
+        self._failed.clear()
+        self._credit = 0.0
+
+    # -------------------- Internals ------------------------
+    def _Insert(self, key, prog):
+        self.programs[key] = prog
+        while len(self.programs) > self.capacity:
+            _, old = self.programs.popitem(last=False)
+            old.Delete()
+            self.stats["evictions"] += 1
+
+    def _IsBad(self, key):
+        return key in self._failed or ("vs", key[0]) in self._failed or ("fs", key[1]) in self._failed
+
+    def _Estimate(self, kind, budget):
+        # Sin medidas todavía se supone que un programa ocupa medio frame
+        estimate = self._estimate[kind]
+        return 0.5 * budget if estimate is None else estimate
+
+    def _Measure(self, kind, seconds):
+        estimate = self._estimate[kind]
+        self._estimate[kind] = seconds if estimate is None else 0.8 * estimate + 0.2 * seconds
+
+    def _BinaryPath(self, key):
+        if self.diskDir is None:
+            return None
+        return self.diskDir / f"{key[0][:16]}_{key[1][:16]}_{self._driverTag}.bin"
+
+    def _HasBinary(self, key):
+        path = self._BinaryPath(key)
+        return path is not None and path.exists()
+
+    def _Build(self, key, vertex_source, fragment_source):
+        path = self._BinaryPath(key)
+        if path is not None:
+            program = _LoadBinary(path)
+            if program:
+                self.stats["disk_hits"] += 1
+                return program
+
+        program = _CompileAndLink(vertex_source, fragment_source, retrievable=path is not None)
+        if path is not None:
+            try:
+                _SaveBinary(program, path)
+            except OSError as e:
+                print("⚠ No se pudo guardar el binario del shader:", e)
+        return program
+
+
+def _Hash(source):
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+
+def _FailedKey(key, error):
+    """Hash de la fuente que no compila (falla con cualquier pareja) o el par si falló el enlace"""
+    if isinstance(error, ShaderCompilationError):
+        stage = error.args[2] if len(error.args) > 2 else None
+        if stage == GL_VERTEX_SHADER:
+            return ("vs", key[0])
+        if stage == GL_FRAGMENT_SHADER:
+            return ("fs", key[1])
+    return key
+
+
+def _CompileAndLink(vertex_source, fragment_source, retrievable=False):
+    vs = compileShader(vertex_source, GL_VERTEX_SHADER)
+    fs = compileShader(fragment_source, GL_FRAGMENT_SHADER)
+
+    program = glCreateProgram()
+    glAttachShader(program, vs)
+    glAttachShader(program, fs)
+    if retrievable:
+        glProgramParameteri(program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
+    glLinkProgram(program)
+
+    glDetachShader(program, vs)
+    glDetachShader(program, fs)
+    glDeleteShader(vs)
+    glDeleteShader(fs)
+
+    if glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+        log = glGetProgramInfoLog(program)
+        glDeleteProgram(program)
+        raise RuntimeError(f"Error enlazando programa: {log}")
+    return program
+
+
+def _SaveBinary(program, path):
+    length = glGetProgramiv(program, GL_PROGRAM_BINARY_LENGTH)
+    if length <= 0:
+        return
+    data = np.empty(length, np.uint8)
+    written = GLsizei()
+    fmt = GLenum()
+    glGetProgramBinary(program, length, ctypes.byref(written), ctypes.byref(fmt),
+                       data.ctypes.data_as(ctypes.c_void_p))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".tmp{os.getpid()}")
+    with tmp.open("wb") as f:
+        f.write(np.uint32(fmt.value).tobytes())
+        f.write(data[:written.value].tobytes())
+    os.replace(tmp, path)
+
+
+def _LoadBinary(path):
+    """Programa desde disco, o 0 si no existe o el driver lo rechaza"""
+    if not path.exists():
+        return 0
+    raw = np.fromfile(path, dtype=np.uint8)
+    if len(raw) <= 4:
+        return 0
+    fmt = int(raw[:4].view(np.uint32)[0])
+    blob = np.ascontiguousarray(raw[4:])
+
+    program = glCreateProgram()
+    try:
+        glProgramBinary(program, fmt, blob.ctypes.data_as(ctypes.c_void_p), len(blob))
+        ok = glGetProgramiv(program, GL_LINK_STATUS) == GL_TRUE
+    except GLError:
+        ok = False
+    if not ok:
+        glDeleteProgram(program)
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        return 0
+    return program
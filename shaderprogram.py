@@ -0,0 +1,97 @@
+"""
+Envoltorio de un programa GLSL: cachea las locations de los uniforms
+(una sola introspección con glGetActiveUniform al crear el programa) y
+recuerda el último valor subido a cada uno para no repetir glUniform*
+cuando no cambió. Los contadores de `stats` permiten ver cuántas
+llamadas GL se ahorran por frame.
+"""
+
+import copy
+
+from OpenGL.GL import *
+import glm
+
+from framedata import BindFrameBlock
+
+
+class ShaderProgram(object):
+    def __init__(self, program):
+        self.program = program
+        self.locations = {}     # nombre -> location
+        self._values = {}       # location -> último valor subido
+
+        self.stats = {"uploads": 0, "skipped": 0, "lookups_saved": 0}
+
+        # Cámara/luz/tiempo llegan por el UBO compartido, no como uniforms sueltos
+        BindFrameBlock(program)
+
+        count = glGetProgramiv(program, GL_ACTIVE_UNIFORMS)
+        for i in range(count):
+            name, size, utype = glGetActiveUniform(program, i)
+            name = name.decode() if isinstance(name, bytes) else name
+            loc = glGetUniformLocation(program, name)
+            if loc == -1:          # miembros de uniform blocks
+                continue
+            if name.endswith("[0]"):
+                name = name[:-3]
+            self.locations[name] = loc
+
+    def Use(self):
+        glUseProgram(self.program)
+
+    def Delete(self):
+        if self.program:
+            glDeleteProgram(self.program)
+        self.program = 0
+        self.locations.clear()
+        self._values.clear()
+
+    def HasUniform(self, name):
+        return name in self.locations
+
+    def ResetStats(self):
+        for k in self.stats:
+            self.stats[k] = 0
+
+    # ---------------- Setters (requieren Use() antes) ----------------
+    def SetFloat(self, name, value):
+        loc = self._Dirty(name, float(value))
+        if loc is not None:
+            glUniform1f(loc, value)
+
+    def SetInt(self, name, value):
+        loc = self._Dirty(name, int(value))
+        if loc is not None:
+            glUniform1i(loc, value)
+
+    def SetBool(self, name, value):
+        self.SetInt(name, GL_TRUE if value else GL_FALSE)
+
+    def SetVec3(self, name, value):
+        loc = self._Dirty(name, glm.vec3(value))
+        if loc is not None:
+            glUniform3f(loc, value[0], value[1], value[2])
+
+    def SetMat4(self, name, value):
+        loc = self._Dirty(name, value)
+        if loc is not None:
+            glUniformMatrix4fv(loc, 1, GL_FALSE, glm.value_ptr(value))
+
+    # ---------------- Interno ----------------
+    def _Dirty(self, name, value):
+        """Location a subir, o None si el uniform no existe o ya tiene ese valor"""
+        loc = self.locations.get(name, -1)
+        if loc == -1:
+            return None
+        # Solo ahorra un glGetUniformLocation si la location cacheada es válida
+        self.stats["lookups_saved"] += 1
+
+        last = self._values.get(loc)
+        if last is not None and last == value:
+            self.stats["skipped"] += 1
+            return None
+
+        # Copia: vec3/mat4 de glm se suelen mutar in-place (p. ej. pointLight.x += ...)
+        self._values[loc] = copy.copy(value)
+        self.stats["uploads"] += 1
+        return loc
@@ -3,17 +3,17 @@ from numpy import array, float32
 import glm
 from OpenGL.GL import * 
 from OpenGL.GL.shaders import compileProgram, compileShader
-import pygame
+
+import assets
+from shaderprogram import ShaderProgram
+from framedata import frame_uniforms
 
 
 skybox_vertex_shader = '''
 #version 450 core
-
+''' + frame_uniforms + '''
 layout (location = 0) in vec3 inPosition;
 
-uniform mat4 viewMatrix;
-uniform mat4 projectionMatrix;
-
 
 out vec3 texCoords;
 
@@ -27,6 +27,28 @@ void main()
 '''
 
 
+# Variante "fullscreen": un solo triángulo que cubre la pantalla en el far
+# plane (z = w -> profundidad 1.0). Con GL_LEQUAL solo pasan los píxeles
+# que ningún modelo tapó, así que el cielo se sombrea una vez por píxel
+# visible. La dirección de vista sale de la inversa de proj * rot(view).
+skybox_fullscreen_vertex_shader = '''
+#version 450 core
+''' + frame_uniforms + '''
+
+out vec3 texCoords;
+
+void main()
+{
+    vec2 ndc = vec2((gl_VertexID << 1) & 2, gl_VertexID & 2) * 2.0 - 1.0;
+    mat4 invViewProj = inverse(projectionMatrix * mat4(mat3(viewMatrix)));
+    vec4 world = invViewProj * vec4(ndc, 1.0, 1.0);
+    texCoords = world.xyz / world.w;
+    gl_Position = vec4(ndc, 1.0, 1.0);
+}
+
+'''
+
+
 skybox_fragment_shader = '''
 #version 450 core
 
@@ -45,9 +67,12 @@ void main()
 
 
 class Skybox(object):
-	def __init__(self, textureList):
+	def __init__(self, textureList, fullscreen = False):
 		self.cameraRef = None
 		
+		# fullscreen = True: triángulo único dibujado después de los modelos
+		self.fullscreen = fullscreen
+		
 		skyboxVertices = [-1.0,  1.0, -1.0,
 						  -1.0, -1.0, -1.0,
 						   1.0, -1.0, -1.0,
@@ -91,61 +116,19 @@ class Skybox(object):
 						   1.0, -1.0,  1.0 ]
 		
 		self.vertexBuffer = array(skyboxVertices, dtype = float32 )
-		self.VBO = glGenBuffers(1)
 		
-		self.shaders = compileProgram(compileShader(skybox_vertex_shader, GL_VERTEX_SHADER),
-									  compileShader(skybox_fragment_shader, GL_FRAGMENT_SHADER) )
-		
-		self.texture = glGenTextures(1)
-		glBindTexture(GL_TEXTURE_CUBE_MAP, self.texture)
-		
-		for i in range(len(textureList)):
-			texture = pygame.image.load(textureList[i])
-			textureData = pygame.image.tostring(texture, "RGB", False)
-			
-			glTexImage2D(GL_TEXTURE_CUBE_MAP_POSITIVE_X + i,
-						 0,
-						 GL_RGB,
-						 texture.get_width(),
-						 texture.get_height(),
-						 0,
-						 GL_RGB,
-						 GL_UNSIGNED_BYTE,
-						 textureData)
-			
-		glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-		glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-		glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
-		glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
-		glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_R, GL_CLAMP_TO_EDGE)
-		
-
-	def Render(self):
-		if self.shaders == None:
-			return
-		
-		glUseProgram(self.shaders)
-		
-		if self.cameraRef is not None:
-			glUniformMatrix4fv( glGetUniformLocation(self.shaders, "viewMatrix"),
-								1, GL_FALSE, glm.value_ptr( self.cameraRef.viewMatrix) )
-			
-			glUniformMatrix4fv( glGetUniformLocation(self.shaders, "projectionMatrix"),
-								1, GL_FALSE, glm.value_ptr( self.cameraRef.projectionMatrix) )
-		
-		glDepthMask(GL_FALSE)
-		
-		glBindTexture(GL_TEXTURE_CUBE_MAP, self.texture)
+		# Geometría subida una sola vez; el VAO recuerda el formato del atributo
+		self.VAO = glGenVertexArrays(1)
+		glBindVertexArray(self.VAO)
 		
+		self.VBO = glGenBuffers(1)
 		glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
-		
 		glBufferData(GL_ARRAY_BUFFER,
 					 self.vertexBuffer.nbytes,
 					 self.vertexBuffer,
 					 GL_STATIC_DRAW)
 		
 		glEnableVertexAttribArray(0)
-		
 		glVertexAttribPointer(0,
 							  3,
 							  GL_FLOAT,
@@ -153,10 +136,48 @@ class Skybox(object):
 							  4 * 3,
 							  ctypes.c_void_p(0) )
 		
+		# El triángulo fullscreen no tiene atributos (usa gl_VertexID)
+		self.emptyVAO = glGenVertexArrays(1)
+		
+		glBindVertexArray(0)
+		glBindBuffer(GL_ARRAY_BUFFER, 0)
+		
+		self.shaders = compileProgram(compileShader(skybox_vertex_shader, GL_VERTEX_SHADER),
+									  compileShader(skybox_fragment_shader, GL_FRAGMENT_SHADER) )
+		self.cubeProgram = ShaderProgram(self.shaders)
+		
+		self.fullscreenShaders = compileProgram(compileShader(skybox_fullscreen_vertex_shader, GL_VERTEX_SHADER),
+												compileShader(skybox_fragment_shader, GL_FRAGMENT_SHADER) )
+		self.fullscreenProgram = ShaderProgram(self.fullscreenShaders)
+		
+		# Caras decodificadas en segundo plano (assets.AssetLoader)
+		self.texture = assets.GetLoader().LoadCubemap(textureList)
+		
+
+	@property
+	def program(self):
+		return self.fullscreenProgram if self.fullscreen else self.cubeProgram
+	
+	def Render(self):
+		if self.shaders == None:
+			return
+		
+		# view/projection llegan por el UBO por frame (framedata.FrameUniforms)
+		self.program.Use()
+		
+		glDepthMask(GL_FALSE)
+		
+		glBindTexture(GL_TEXTURE_CUBE_MAP, self.texture)
 		
-		glDrawArrays(GL_TRIANGLES, 0, 36)
+		if self.fullscreen:
+			# Va después de los modelos: el depth test (LEQUAL a 1.0) descarta lo tapado
+			glBindVertexArray(self.emptyVAO)
+			glDrawArrays(GL_TRIANGLES, 0, 3)
+		else:
+			glBindVertexArray(self.VAO)
+			glDrawArrays(GL_TRIANGLES, 0, 36)
 		
-		glDisableVertexAttribArray(0)
+		glBindVertexArray(0)
 
 		glDepthMask(GL_TRUE)
 		
@@ -0,0 +1,374 @@
+"""
+Carga por partes (streaming) de OBJ grandes: Model(path, stream=True).
+
+El archivo se lee en bloques de `chunkBytes` cortados en fin de línea y
+cada bloque pasa por la API de parseo de obj.py (read_chunks,
+classify_lines, parse_floats, parse_faces), la misma que usa Obj. El
+generador Meshlets() (sin GL; Model lo recorre desde un hilo) hace:
+
+    1. escaneo: cuenta triángulos, calcula la AABB y vuelca v / vt / vn a
+       tablas float32 en disco (np.memmap en un directorio temporal);
+    2. solo si el OBJ no trae normales: acumula normales por vértice
+       (ponderadas como Obj según `normalMode`; sin creaseAngle) en otra
+       tabla en disco;
+    3. caras: cada bloque se triangula, se resuelven los índices contra
+       las tablas y se empaqueta como sopa de triángulos P T N (sin EBO),
+       en meshlets de `meshletTriangles` triángulos.
+
+La cabecera (AABB y cantidad total de vértices) y los meshlets pasan al
+hilo del contexto GL por una cola acotada. Update() -- llamado una vez
+por frame desde el Renderer, con presupuesto de tiempo -- reserva el VBO
+con su tamaño final al llegar la cabecera y después copia cada meshlet
+con glBufferSubData detrás del anterior; Model.Draw dibuja los vértices
+que ya están. La memoria del proceso depende del tamaño de bloque y de la
+cola, no del archivo (las tablas en disco las pagina el sistema).
+"""
+
+import contextlib
+import queue
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from obj import (NORMAL_MODES, clamp_refs, classify_lines, count_face_vertices, normalize, parse_faces,
+                 parse_floats, read_chunks, scatter_add)
+
+CHUNK_BYTES       = 1 << 20        # bytes de texto OBJ por bloque (el pico de memoria escala con esto)
+MESHLET_TRIANGLES = 32768          # triángulos por glBufferSubData
+QUEUE_SIZE        = 4              # meshlets listos esperando subida
+
+_VERTEX_FLOATS = 8                 # P T N
+
+
+class StreamHeader(object):
+    """Lo que hace falta para reservar el VBO antes del primer meshlet"""
+
+    def __init__(self, triangles, bbox_min, bbox_max, nbytes, scan_ms):
+        self.triangles = triangles
+        self.vertex_count = triangles * 3
+        self.bbox_min = bbox_min
+        self.bbox_max = bbox_max
+        self.bytes = nbytes
+        self.scan_ms = scan_ms
+
+
+# ------------------------------------------------------------
+# Pipeline de parseo (sin GL)
+# ------------------------------------------------------------
+def Meshlets(path, chunkBytes=CHUNK_BYTES, meshletTriangles=MESHLET_TRIANGLES, cancel=None,
+             normalMode="area"):
+    """
+    Genera un StreamHeader y después arrays float32 (3 * meshletTriangles, 8)
+    P T N ya centrados y escalados como Model.PackObj (el último puede ser
+    más corto). `cancel`: threading.Event opcional, se revisa por bloque.
+    `normalMode`: ponderación de las normales calculadas (obj.NORMAL_MODES).
+    """
+    if normalMode not in NORMAL_MODES:
+        raise ValueError(f"Modo de normales desconocido: {normalMode} (usar {NORMAL_MODES})")
+    chunks = lambda: _Chunks(path, chunkBytes, cancel)
+    with tempfile.TemporaryDirectory(prefix="meshstream") as tmp:
+        tmp = Path(tmp)
+        start = time.perf_counter()
+        tables, counts, triangles, bbox, nbytes = _Scan(chunks, tmp)
+        if counts[0] > 0:
+            bbox_min, bbox_max = tuple(bbox[0].tolist()), tuple(bbox[1].tolist())
+        else:
+            bbox_min, bbox_max = (1e9, 1e9, 1e9), (-1e9, -1e9, -1e9)
+        yield StreamHeader(triangles, bbox_min, bbox_max, nbytes, (time.perf_counter() - start) * 1e3)
+
+        smooth = counts[2] == 0
+        if smooth:
+            print(f"⚠ {Path(path).name} sin normales, calculando por bloques...")
+            tables["vn"] = _SmoothNormals(chunks, tmp, tables["v"], counts, chunkBytes, normalMode)
+            counts[2] = len(tables["vn"])
+
+        # Misma normalización que Model.PackObj
+        from model import Model
+        center, scale = Model.Normalization(bbox_min, bbox_max)
+
+        carry = np.zeros((0, _VERTEX_FLOATS), np.float32)
+        size = meshletTriangles * 3
+        for corners in _FaceChunks(chunks, counts, smooth):
+            verts = np.empty((len(corners), _VERTEX_FLOATS), np.float32)
+            pos = verts[:, 0:3]
+            np.subtract(_Take(tables["v"], corners[:, 0], (0.0, 0.0, 0.0)), center, out=pos)
+            pos *= scale
+            verts[:, 3:5] = _Take(tables["vt"], corners[:, 1], (0.0, 0.0))
+            verts[:, 5:8] = _Take(tables["vn"], corners[:, 2], (0.0, 0.0, 1.0))
+
+            # Meshlets de tamaño fijo; el resto espera al bloque siguiente
+            if len(carry):
+                verts = np.concatenate((carry, verts))
+            cut = len(verts) - len(verts) % size
+            for i in range(0, cut, size):
+                yield verts[i:i + size]
+            carry = verts[cut:].copy()
+        if len(carry):
+            yield carry
+        del tables      # los memmap se cierran antes de borrar el directorio
+
+
+def _Chunks(path, chunkBytes, cancel):
+    for buf in read_chunks(path, chunkBytes):
+        if cancel is not None and cancel.is_set():
+            raise _Cancelled()
+        yield buf, classify_lines(buf)
+
+
+def _Scan(chunks, tmp):
+    """Pasada 1: tablas v / vt / vn a disco, triángulos totales y AABB"""
+    specs = {"v": (1, 3, 3), "vt": (2, 2, 1), "vn": (2, 3, 3)}
+    files = {tag: open(tmp / f"{tag}.f32", "wb") for tag in specs}
+    counts = [0, 0, 0]
+    triangles = 0
+    nbytes = 0
+    bbox = np.array([[1e9] * 3, [-1e9] * 3], np.float32)
+    try:
+        for buf, (starts, ends, is_v, is_vt, is_vn, is_f) in chunks():
+            nbytes += len(buf)
+            for k, (tag, mask) in enumerate((("v", is_v), ("vt", is_vt), ("vn", is_vn))):
+                tag_len, width, min_width = specs[tag]
+                rows = parse_floats(buf, starts[mask], ends[mask], tag_len, width, min_width)
+                files[tag].write(rows.tobytes())
+                counts[k] += len(rows)
+                if tag == "v" and len(rows):
+                    np.minimum(bbox[0], rows.min(axis=0), out=bbox[0])
+                    np.maximum(bbox[1], rows.max(axis=0), out=bbox[1])
+            sizes = count_face_vertices(buf, starts[is_f], ends[is_f])
+            triangles += int(np.maximum(sizes - 2, 0).sum())
+    finally:
+        for f in files.values():
+            f.close()
+
+    tables = {tag: _OpenTable(tmp / f"{tag}.f32", specs[tag][1], n)
+              for tag, n in zip(specs, counts)}
+    return tables, counts, triangles, bbox, nbytes
+
+
+def _FaceChunks(chunks, counts, smooth):
+    """Pasada de caras: (K, 3) esquinas [vi, ti, ni] ya resueltas por bloque"""
+    before = np.zeros(3, np.int64)      # v / vt / vn declarados antes del bloque
+    for buf, lines in chunks():
+        _, _, is_v, is_vt, is_vn, is_f = lines
+        if is_f.any():
+            # Igual que Obj._load, con los índices negativos relativos a todo el archivo
+            corners = parse_faces(buf, lines, before).reshape(-1, 3)
+            clamp_refs(corners, counts)
+            if smooth:
+                corners[:, 2] = corners[:, 0]
+            yield corners
+        before += (int(is_v.sum()), int(is_vt.sum()), int(is_vn.sum()))
+
+
+def _SmoothNormals(chunks, tmp, positions, counts, chunkBytes, mode="area"):
+    """Normales por vértice con los pesos de Obj._compute_normals (`mode`), acumuladas en disco por bloque"""
+    acc = np.lib.format.open_memmap(tmp / "vn_acc.npy", "w+", np.float64, (len(positions), 3))
+    for corners in _FaceChunks(chunks, [counts[0], counts[1], 0], False):
+        tri = corners[:, 0].reshape(-1, 3)
+        tri = tri[np.all(tri >= 0, axis=1)]
+        if not len(tri):
+            continue
+        p = positions[tri.ravel()].astype(np.float64).reshape(-1, 3, 3)
+        face_cross = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+        area2 = np.linalg.norm(face_cross, axis=1)
+        face_cross[area2 <= 1e-12] = 0.0
+
+        # Aporte de cada esquina (M*3, 3): "area" usa el producto cruz tal cual
+        if mode == "area":
+            contrib = np.repeat(face_cross, 3, axis=0)
+        else:
+            face_n = face_cross / np.maximum(area2, 1e-30)[:, None]
+            if mode == "uniform":
+                weights = np.ones(tri.shape)
+            else:
+                e1 = np.roll(p, -1, axis=1) - p
+                e2 = np.roll(p, -2, axis=1) - p
+                weights = np.arctan2(np.linalg.norm(np.cross(e1, e2), axis=2),
+                                     np.einsum("mki,mki->mk", e1, e2))
+            contrib = np.repeat(face_n, 3, axis=0) * weights.reshape(-1, 1)
+
+        # Solo se tocan las filas de los vértices de este bloque
+        touched, local = np.unique(tri.ravel(), return_inverse=True)
+        acc[touched] += scatter_add(local.ravel(), contrib, len(touched))
+
+    normals = _OpenTable(tmp / "vn.f32", 3, len(positions), mode="w+")
+    step = max(1, chunkBytes // 24)
+    for i in range(0, len(positions), step):
+        normals[i:i + step] = normalize(acc[i:i + step])
+    normals.flush()
+    del acc
+    return normals
+
+
+# ------------------------------------------------------------
+# Subida a GL
+# ------------------------------------------------------------
+class MeshStream(object):
+    """Un OBJ en carga: hilo que recorre Meshlets() + cola acotada hacia el Model"""
+
+    def __init__(self, model, path, chunkBytes=CHUNK_BYTES, meshletTriangles=MESHLET_TRIANGLES,
+                 queueSize=QUEUE_SIZE, normalMode="area"):
+        if normalMode not in NORMAL_MODES:
+            raise ValueError(f"Modo de normales desconocido: {normalMode} (usar {NORMAL_MODES})")
+        self.model = model
+        self.path = str(path)
+        self.header = None
+        self.done = False
+        self.error = None
+        self.stats = {"meshlets": 0, "triangles": 0, "upload_ms": 0.0, "ready_ms": 0.0}
+
+        self._queue = queue.Queue(maxsize=queueSize)
+        self._cancel = threading.Event()
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._Run, args=(chunkBytes, meshletTriangles, normalMode),
+                                        name="meshstream", daemon=True)
+        self._thread.start()
+
+    @property
+    def progress(self):
+        """Fracción de triángulos ya subidos (0 hasta que llega la cabecera)"""
+        if self.done:
+            return 1.0
+        if self.header is None or self.header.triangles == 0:
+            return 0.0
+        return self.stats["triangles"] / self.header.triangles
+
+    def Cancel(self):
+        self._cancel.set()
+
+    def Step(self, block=False):
+        """Procesa un elemento de la cola (hilo GL); False si no había nada listo"""
+        try:
+            kind, item = self._queue.get(block=block)
+        except queue.Empty:
+            return False
+
+        start = time.perf_counter()
+        if kind == "header":
+            self.header = item
+            self.model._BeginStream(item.bbox_min, item.bbox_max, item.vertex_count)
+        elif kind == "meshlet":
+            self.model._AppendVertices(item)
+            self.stats["meshlets"] += 1
+            self.stats["triangles"] += len(item) // 3
+        elif kind == "error":
+            self.error = item
+            self.done = True
+        else:
+            self.done = True
+            self.stats["ready_ms"] = (time.perf_counter() - self._start) * 1e3
+        self.stats["upload_ms"] += (time.perf_counter() - start) * 1e3
+        return True
+
+    # -------------------- Hilo de parseo ------------------------
+    def _Put(self, kind, item):
+        while not self._cancel.is_set():
+            try:
+                self._queue.put((kind, item), timeout=0.1)
+                return
+            except queue.Full:
+                pass
+        raise _Cancelled()
+
+    def _Run(self, chunkBytes, meshletTriangles, normalMode):
+        try:
+            with contextlib.closing(Meshlets(self.path, chunkBytes, meshletTriangles, self._cancel,
+                                             normalMode)) as items:
+                for item in items:
+                    self._Put("header" if isinstance(item, StreamHeader) else "meshlet", item)
+            self._Put("done", None)
+        except _Cancelled:
+            pass
+        except Exception as e:
+            try:
+                self._Put("error", e)
+            except _Cancelled:
+                pass
+
+
+class MeshStreamer(object):
+    """Streams activos; Update() los avanza desde el hilo GL con presupuesto por frame"""
+
+    def __init__(self, uploadBudget: float = 0.004):
+        self.uploadBudget = uploadBudget
+        self._streams = []
+
+    def Open(self, model, path, **options):
+        if not Path(path).exists():
+            raise FileNotFoundError(f"OBJ no encontrado: {path}")
+        stream = MeshStream(model, path, **options)
+        self._streams.append(stream)
+        return stream
+
+    def Update(self, budget=None):
+        """Sube meshlets listos hasta gastar `budget` segundos; devuelve cuántos streams faltan"""
+        budget = self.uploadBudget if budget is None else budget
+        start = time.perf_counter()
+        for stream in list(self._streams):
+            while time.perf_counter() - start < budget and stream.Step():
+                if stream.done:
+                    self._Finish(stream)
+                    break
+        return len(self._streams)
+
+    def Wait(self):
+        """Bloquea hasta que todos los streams estén completos en GPU"""
+        while self._streams:
+            stream = self._streams[0]
+            while not stream.done:
+                stream.Step(block=True)
+            self._Finish(stream)
+
+    def Pending(self):
+        return len(self._streams)
+
+    def Shutdown(self):
+        for stream in self._streams:
+            stream.Cancel()
+        self._streams = []
+
+    def _Finish(self, stream):
+        self._streams.remove(stream)
+        name = Path(stream.path).name
+        if stream.error is not None:
+            print(f"✗ Error en streaming de {name}:", stream.error)
+            return
+        s = stream.stats
+        print(f"✓ Malla por streaming: {name} ({s['triangles']} triángulos en {s['meshlets']} meshlets, "
+              f"{stream.header.bytes / 2**20:.1f} MB, lista a los {s['ready_ms']:.0f} ms)")
+
+
+class _Cancelled(Exception):
+    pass
+
+
+# ------------------ Helpers ----------------------
+def _OpenTable(path, width, rows, mode="r"):
+    if rows == 0:
+        return np.zeros((0, width), np.float32)
+    return np.memmap(path, np.float32, mode, shape=(rows, width))
+
+
+def _Take(table, idx, default):
+    """table[idx] con `default` donde idx == -1 (sin copiar la tabla, que puede ser un memmap)"""
+    out = np.empty((len(idx), len(default)), np.float32)
+    valid = idx >= 0
+    if valid.all():
+        out[:] = table[idx]
+    else:
+        out[valid] = table[idx[valid]]
+        out[~valid] = default
+    return out
+
+
+_default_streamer = None
+
+
+def GetStreamer():
+    global _default_streamer
+    if _default_streamer is None:
+        _default_streamer = MeshStreamer()
+    return _default_streamer
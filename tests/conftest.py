@@ -0,0 +1,67 @@
+"""
+Fixtures comunes de las pruebas.
+
+Las pruebas que necesitan GL piden el fixture gl_context: crea un contexto
+EGL sin ventana (GL 4.5 compatibility) con un FBO pequeño. Si la máquina no
+tiene EGL, esas pruebas se saltan.
+"""
+import ctypes
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+
+def _CreateContext(width, height):
+    from OpenGL import EGL
+    from OpenGL.GL import (glGenFramebuffers, glBindFramebuffer, glGenRenderbuffers, glBindRenderbuffer,
+                           glRenderbufferStorage, glFramebufferRenderbuffer, glCheckFramebufferStatus,
+                           glGenVertexArrays, glBindVertexArray, GL_FRAMEBUFFER, GL_RENDERBUFFER, GL_RGBA8,
+                           GL_DEPTH24_STENCIL8, GL_COLOR_ATTACHMENT0, GL_DEPTH_STENCIL_ATTACHMENT,
+                           GL_FRAMEBUFFER_COMPLETE)
+
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    if not EGL.eglInitialize(display, None, None):
+        raise RuntimeError("eglInitialize falló")
+    attrs = (EGL.EGLint * 5)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                             EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT, EGL.EGL_NONE)
+    config, count = EGL.EGLConfig(), EGL.EGLint()
+    EGL.eglChooseConfig(display, attrs, ctypes.pointer(config), 1, ctypes.pointer(count))
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    ctxAttrs = (EGL.EGLint * 7)(EGL.EGL_CONTEXT_MAJOR_VERSION, 4, EGL.EGL_CONTEXT_MINOR_VERSION, 5,
+                                EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK,
+                                EGL.EGL_CONTEXT_OPENGL_COMPATIBILITY_PROFILE_BIT, EGL.EGL_NONE)
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, ctxAttrs)
+    if not context or not EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context):
+        raise RuntimeError("no se pudo crear el contexto EGL")
+
+    fbo = glGenFramebuffers(1)
+    glBindFramebuffer(GL_FRAMEBUFFER, fbo)
+    for fmt, attachment in ((GL_RGBA8, GL_COLOR_ATTACHMENT0), (GL_DEPTH24_STENCIL8, GL_DEPTH_STENCIL_ATTACHMENT)):
+        rb = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, rb)
+        glRenderbufferStorage(GL_RENDERBUFFER, fmt, width, height)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, attachment, GL_RENDERBUFFER, rb)
+    if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+        raise RuntimeError("FBO incompleto")
+    glBindVertexArray(glGenVertexArrays(1))
+
+
+@pytest.fixture(scope="session")
+def gl_context():
+    try:
+        _CreateContext(320, 240)
+    except Exception as e:
+        pytest.skip(f"sin contexto GL: {e}")
+    # Los modelos usan rutas relativas al repo (models/, textures/)
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    yield
+    os.chdir(cwd)
@@ -0,0 +1,65 @@
+import numpy as np
+from OpenGL.GL import *
+
+from assets import AssetLoader
+
+FACES = ["skybox/right.jpg", "skybox/left.jpg", "skybox/top.jpg",
+         "skybox/bottom.jpg", "skybox/front.jpg", "skybox/back.jpg"]
+
+
+def _Size(bindTarget, texture, target):
+    glBindTexture(bindTarget, texture)
+    size = (glGetTexLevelParameteriv(target, 0, GL_TEXTURE_WIDTH),
+            glGetTexLevelParameteriv(target, 0, GL_TEXTURE_HEIGHT))
+    glBindTexture(bindTarget, 0)
+    return size
+
+
+def _Drain(loader, check):
+    """Paso a paso: `check` se llama entre pasos mientras quede algo pendiente"""
+    while loader._jobs:
+        job = loader._jobs[0]
+        while not job.Step():
+            check()
+        loader._Finish(job)
+        if loader._jobs:
+            check()
+
+
+def test_texture2d_keeps_placeholder_until_complete(gl_context):
+    loader = AssetLoader(workers=1)
+    loader.useCompressed = False
+    texture = loader.LoadTexture2D("textures/0000.jpg.jpeg")
+
+    def check():
+        assert _Size(GL_TEXTURE_2D, texture, GL_TEXTURE_2D) == (1, 1)
+
+    _Drain(loader, check)
+    w, h = _Size(GL_TEXTURE_2D, texture, GL_TEXTURE_2D)
+    assert (w, h) != (1, 1)
+
+    glBindTexture(GL_TEXTURE_2D, texture)
+    pixels = np.frombuffer(glGetTexImage(GL_TEXTURE_2D, 0, GL_RGBA, GL_UNSIGNED_BYTE), np.uint8)
+    top = glGetTexLevelParameteriv(GL_TEXTURE_2D, int(np.log2(max(w, h))), GL_TEXTURE_WIDTH)
+    glBindTexture(GL_TEXTURE_2D, 0)
+    assert pixels.any()
+    assert top == 1                         # cadena de mips completa
+    assert glGetError() == GL_NO_ERROR
+    loader.Shutdown()
+
+
+def test_cubemap_swaps_all_faces_at_once(gl_context):
+    loader = AssetLoader(workers=1)
+    loader.useCompressed = False
+    texture = loader.LoadCubemap(FACES)
+    first = GL_TEXTURE_CUBE_MAP_POSITIVE_X
+
+    def check():
+        sizes = {_Size(GL_TEXTURE_CUBE_MAP, texture, first + i) for i in range(6)}
+        assert sizes == {(1, 1)}
+
+    _Drain(loader, check)
+    sizes = {_Size(GL_TEXTURE_CUBE_MAP, texture, first + i) for i in range(6)}
+    assert len(sizes) == 1 and sizes != {(1, 1)}
+    assert glGetError() == GL_NO_ERROR
+    loader.Shutdown()
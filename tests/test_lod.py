@@ -0,0 +1,65 @@
+import math
+
+import glm
+
+from lod import LODSelector, LOD_SCREEN_SIZES
+from transforms import TransformStore
+
+LEVELS = len(LOD_SCREEN_SIZES) + 1
+PROJECTION = glm.perspective(glm.radians(60.0), 16 / 9, 0.1, 1000.0)
+RADIUS = math.sqrt(3.0)                 # esfera de la AABB (-1, 1)
+
+
+def _Depth(screenFraction):
+    """Distancia a la que la esfera ocupa `screenFraction` del alto de la pantalla"""
+    return RADIUS * PROJECTION[1][1] / screenFraction
+
+
+def _Place(store, slot, screenFraction):
+    store.positions[slot] = (0.0, 0.0, -_Depth(screenFraction))
+    store.SetBounds(slot, (-1.0, -1.0, -1.0), (1.0, 1.0, 1.0))
+    store.MarkDirty(slot)
+    store.Update(glm.mat4(1.0))
+
+
+def _Select(selector, store, slots):
+    return selector.Select(store, slots, [LEVELS] * len(slots), PROJECTION, 720)
+
+
+def test_smaller_on_screen_gets_coarser_level():
+    store = TransformStore()
+    slots = [store.Allocate() for _ in range(4)]
+    for slot, fraction in zip(slots, (0.9, 0.4, 0.15, 0.05)):
+        _Place(store, slot, fraction)
+    assert list(_Select(LODSelector(), store, slots)) == [0, 1, 2, 3]
+
+
+def test_hysteresis_keeps_level_near_threshold():
+    selector = LODSelector()
+    store = TransformStore()
+    slot = store.Allocate()
+    threshold = LOD_SCREEN_SIZES[0]
+
+    _Place(store, slot, threshold * 0.5)
+    assert _Select(selector, store, [slot])[0] == 1
+
+    # Dentro de la banda de histéresis no cambia; fuera sí
+    _Place(store, slot, threshold * (1.0 + 0.5 * selector.hysteresis))
+    assert _Select(selector, store, [slot])[0] == 1
+    _Place(store, slot, threshold * (1.0 + 2.0 * selector.hysteresis))
+    assert _Select(selector, store, [slot])[0] == 0
+
+
+def test_freed_slot_starts_without_history():
+    selector = LODSelector()
+    store = TransformStore()
+    slot = store.Allocate()
+    _Place(store, slot, 0.05)
+    assert _Select(selector, store, [slot])[0] == LEVELS - 1
+
+    # Otro objeto en el mismo slot, dentro de la banda de histéresis del
+    # primer umbral: sin historia queda en 0 (con la del anterior sería 1)
+    store.Free(slot)
+    assert store.Allocate() == slot
+    _Place(store, slot, LOD_SCREEN_SIZES[0] * (1.0 - 0.5 * selector.hysteresis))
+    assert _Select(selector, store, [slot])[0] == 0
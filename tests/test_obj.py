@@ -0,0 +1,84 @@
+import numpy as np
+
+import obj
+from obj import Obj
+
+# Un quad (n-gono) y un triángulo con índices negativos; las esquinas
+# 2/2/1 y 3/3/1 se repiten en los dos polígonos
+CUBE_CORNER = """\
+v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+vt 0 0
+vt 1 0
+vt 1 1
+vt 0 1
+vn 0 0 1
+f 1/1/1 2/2/1 3/3/1 4/4/1
+v 2 1 0
+f -4/2/1 -1/3/1 -3/3/1
+"""
+
+
+def _Write(tmp_path, text, name="mesh.obj"):
+    path = tmp_path / name
+    path.write_text(text)
+    return path
+
+
+def _Soup(mesh):
+    """(F,3) triángulos como filas (x, y, z, u, v, nx, ny, nz) desde las tablas crudas"""
+    corners = mesh.faces.reshape(-1, 3)
+    return np.hstack([mesh.vertices[corners[:, 0]], mesh.texCoords[corners[:, 1]],
+                      mesh.normals[corners[:, 2]]])
+
+
+def test_indices_rebuild_triangle_soup(tmp_path):
+    mesh = Obj(str(_Write(tmp_path, CUBE_CORNER)))
+    assert mesh.faces.shape == (3, 3, 3)        # quad -> 2 triángulos + 1
+    assert mesh.indices.dtype == np.uint16
+    assert len(mesh.indices) == 9
+
+    soup = np.hstack([mesh.positions[mesh.indices], mesh.uvs[mesh.indices], mesh.norms[mesh.indices]])
+    np.testing.assert_array_equal(soup, _Soup(mesh))
+
+    # Esquinas iguales (v, vt, vn) comparten vértice: de las 7 quedan 5
+    rows = np.hstack([mesh.positions, mesh.uvs, mesh.norms])
+    assert len(np.unique(rows, axis=0)) == len(rows) == 5
+    assert mesh.bbox_min == (0.0, 0.0, 0.0) and mesh.bbox_max == (2.0, 1.0, 0.0)
+
+
+def test_missing_normals_are_computed_per_unique_vertex(tmp_path):
+    mesh = Obj(str(_Write(tmp_path, "v 0 0 0\nv 1 0 0\nv 0 1 0\nv 1 1 0\nf 1 2 3\nf 2 4 3\n")))
+    assert len(mesh.positions) == 4
+    np.testing.assert_allclose(mesh.norms, np.tile([0.0, 0.0, 1.0], (4, 1)), atol=1e-6)
+    np.testing.assert_array_equal(mesh.uvs, np.zeros((4, 2), np.float32))
+
+
+def test_large_meshes_use_uint32_indices(tmp_path):
+    n = 260                                     # 67600 vértices únicos > 0xFFFF
+    y, x = np.mgrid[:n, :n]
+    lines = [f"v {i} {j} 0" for i, j in zip(x.ravel(), y.ravel())]
+    quads = (y[:-1, :-1] * n + x[:-1, :-1] + 1).ravel()
+    lines += [f"f {a} {a + 1} {a + n + 1} {a + n}" for a in quads]
+    mesh = Obj(str(_Write(tmp_path, "\n".join(lines) + "\n")))
+
+    assert mesh.indices.dtype == np.uint32
+    assert len(mesh.positions) == n * n
+    np.testing.assert_array_equal(mesh.positions[mesh.indices], mesh.vertices[mesh.faces[:, :, 0].ravel()])
+
+
+def test_parse_api_matches_obj_across_chunks(tmp_path):
+    path = _Write(tmp_path, CUBE_CORNER)
+    faces, before = [], np.zeros(3, np.int64)
+    # Bloques chicos: la cara con índices negativos cae en otro bloque que sus vértices
+    for buf in obj.read_chunks(path, chunk_bytes=16):
+        lines = obj.classify_lines(buf)
+        starts, ends, is_v, is_vt, is_vn, is_f = lines
+        faces.append(obj.parse_faces(buf, lines, before))
+        before += (is_v.sum(), is_vt.sum(), is_vn.sum())
+    faces = np.concatenate(faces)
+    obj.clamp_refs(faces, tuple(before))
+
+    np.testing.assert_array_equal(faces, Obj(str(path)).faces)
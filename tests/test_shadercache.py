@@ -0,0 +1,70 @@
+from OpenGL.GL import glIsProgram
+
+from shadercache import ShaderCache
+
+VERTEX = """
+#version 330 core
+layout (location = 0) in vec3 position;
+void main() { gl_Position = vec4(position * %s, 1.0); }
+"""
+
+FRAGMENT = """
+#version 330 core
+out vec4 outColor;
+void main() { outColor = vec4(1.0); }
+"""
+
+
+def test_bad_sources_are_not_retried(gl_context, capsys):
+    cache = ShaderCache(diskCache=False)
+    cache.WarmUp([("bad", FRAGMENT), ("bad", FRAGMENT), (VERTEX % "1.0", "bad")])
+    while cache.Update(budget=1.0):
+        pass
+    assert cache.stats["warmed"] == 0
+    assert capsys.readouterr().out.count("✗") == 2
+
+
+def test_update_waits_for_budget(gl_context):
+    cache = ShaderCache(diskCache=False)
+    cache.WarmUp([(VERTEX % f"{i}.0", FRAGMENT) for i in range(1, 4)])
+
+    # Sin presupuesto no se compila nada
+    assert cache.Update(budget=0.0) == 3
+    assert cache.stats["warmed"] == 0
+
+    while cache.Update(budget=1.0):
+        pass
+    assert cache.stats["warmed"] == 3
+
+
+def test_lookups_saved_counts_only_valid_locations(gl_context):
+    cache = ShaderCache(diskCache=False)
+    fragment = FRAGMENT.replace("void main", "uniform float uScale;\nvoid main").replace("vec4(1.0)", "vec4(uScale)")
+    prog = cache.Get(VERTEX % "1.0", fragment)
+    prog.Use()
+    prog.stats.update(uploads=0, skipped=0, lookups_saved=0)
+
+    prog.SetFloat("uScale", 2.0)
+    prog.SetFloat("uScale", 2.0)
+    prog.SetFloat("uMissing", 1.0)
+    assert prog.stats == {"uploads": 1, "skipped": 1, "lookups_saved": 2}
+
+
+def test_eviction_deletes_least_recently_used_program(gl_context):
+    cache = ShaderCache(capacity=2, diskCache=False)
+    first = cache.Get(VERTEX % "1.0", FRAGMENT)
+    second = cache.Get(VERTEX % "2.0", FRAGMENT)
+    firstId, secondId = first.program, second.program
+
+    # Usar el primero lo vuelve el más reciente: el que sale es el segundo
+    assert cache.Get(VERTEX % "1.0", FRAGMENT) is first
+    third = cache.Get(VERTEX % "3.0", FRAGMENT)
+    thirdId = third.program
+
+    assert cache.stats["evictions"] == 1
+    assert list(cache.programs.values()) == [first, third]
+    assert glIsProgram(firstId) and not glIsProgram(secondId)
+
+    cache.Clear()
+    assert not glIsProgram(firstId) and not glIsProgram(thirdId)
+    assert first.program == third.program == 0
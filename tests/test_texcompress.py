@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+
+import texcompress
+
+
+def _Touch(path, mtime):
+    path.write_bytes(b"")
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_sources_with_same_stem_do_not_share_dds(tmp_path):
+    png, jpg = tmp_path / "foo.png", tmp_path / "foo.jpg"
+    assert texcompress.compressed_path(png) != texcompress.compressed_path(jpg)
+
+    _Touch(png, 1_000)
+    _Touch(jpg, 1_000)
+    _Touch(texcompress.compressed_path(png), 2_000)
+    assert texcompress.find_compressed(png) == tmp_path / "foo.png.dds"
+    assert texcompress.find_compressed(jpg) is None
+
+
+def test_dds_roundtrip(tmp_path):
+    pixels = np.random.default_rng(0).integers(0, 256, (16, 16, 4), np.uint8)
+    mips = texcompress.compress_image(pixels, "bc1")
+    path = tmp_path / "foo.png.dds"
+    texcompress.write_dds(path, "bc1", mips)
+
+    image = texcompress.read_dds(path)
+    assert (image.format, image.width, image.height) == ("bc1", 16, 16)
+    assert len(image.levels) == len(mips) == 5
@@ -0,0 +1,37 @@
+import shutil
+import threading
+
+import assets
+from assets import AssetLoader
+from texturemanager import TextureManager
+
+TEXTURE = "textures/0000.jpg.jpeg"
+
+
+def test_copies_share_a_layer_and_hash_off_main_thread(gl_context, tmp_path, monkeypatch):
+    copy = tmp_path / "copia.jpeg"
+    shutil.copy(TEXTURE, copy)
+
+    threads = []
+    digest = assets.FileDigest
+    monkeypatch.setattr(assets, "FileDigest", lambda p: threads.append(threading.current_thread()) or digest(p))
+
+    loader = AssetLoader(workers=1)
+    loader.useCompressed = False
+    manager = TextureManager(loader)
+    a = manager.Acquire(TEXTURE)
+    b = manager.Acquire(str(copy))
+    assert a is not b and a.digest is None          # Acquire no lee el archivo
+    loader.Wait()
+
+    assert threads and threading.main_thread() not in threads
+    assert a.ready and b.ready
+    assert (a.array, a.layer) == (b.array, b.layer)
+    assert manager.stats["hash_hits"] == 1 and manager.stats["layers"] == 1
+
+    # Las referencias de la copia sostienen la capa del original
+    manager.Release(a)
+    assert b.ready and manager.stats["layers"] == 1
+    manager.Release(b)
+    assert manager.stats["layers"] == 0 and not manager.byPath and not manager.byHash
+    loader.Shutdown()
@@ -0,0 +1,51 @@
+import copy
+
+import glm
+import numpy as np
+
+from transforms import TransformStore
+
+
+def test_view_is_glm_vec3():
+    store = TransformStore()
+    slot = store.Allocate(position=(1.0, 2.0, 3.0))
+    pos = store.View(slot, "positions")
+
+    m = glm.translate(glm.mat4(1.0), pos)
+    assert tuple(m[3]) == (1.0, 2.0, 3.0, 1.0)
+    assert glm.length(pos) == glm.length(glm.vec3(1, 2, 3))
+    assert glm.dot(pos, glm.vec3(1, 0, 0)) == 1.0
+    assert type(pos + pos) is glm.vec3
+    assert type(copy.copy(pos)) is glm.vec3
+    assert np.array(pos).tolist() == [1.0, 2.0, 3.0]
+
+
+def test_view_writes_through():
+    store = TransformStore()
+    slot = store.Allocate()
+    store.dirty[:] = False
+
+    rot = store.View(slot, "rotations")
+    rot.y += 30.0
+    assert store.rotations[slot].tolist() == [0.0, 30.0, 0.0]
+    assert store.dirty[slot]
+
+    pos = store.View(slot, "positions")
+    pos += glm.vec3(1.0, 1.0, 1.0)
+    pos.xy = glm.vec2(5.0, 6.0)
+    pos[2] = 7.0
+    assert store.positions[slot].tolist() == [5.0, 6.0, 7.0]
+
+
+def test_model_position_with_glm(gl_context):
+    from model import Model
+
+    store = TransformStore()
+    m = Model("models/sphere.obj", useCache=False, transforms=store, lods=False)
+    m.position = glm.vec3(1.0, 2.0, 3.0)
+    m.rotation.y += 45.0
+
+    world = glm.translate(glm.mat4(1.0), m.position)
+    assert tuple(world[3]) == (1.0, 2.0, 3.0, 1.0)
+    assert m.rotation.y == 45.0
+    assert store.rotations[m._slot].tolist() == [0.0, 45.0, 0.0]
@@ -0,0 +1,317 @@
+"""
+Texturas comprimidas offline: DDS con mipmaps y bloques BC1 (DXT1) o
+BC3 (DXT5), listos para glCompressedTexImage2D.
+
+Cada imagen se guarda junto a la original agregando .dds al nombre
+completo (skybox/right.jpg -> skybox/right.jpg.dds), así foo.png y
+foo.jpg no comparten el mismo .dds. Las filas quedan en el mismo
+orden en que el loader sube el JPEG, así que la orientación no cambia.
+AssetLoader usa el .dds si existe, es más nuevo que la fuente y el driver
+soporta el formato; si no, decodifica la imagen como antes.
+
+BC1 guarda 4 bits por texel (8:1 frente a RGBA8), BC3 8 bits con alfa.
+El encoder es vectorizado: eje principal (PCA) de cada bloque 4x4 para
+los extremos y el índice más cercano de la paleta para cada texel.
+
+CLI:
+    python texcompress.py build [textures/ skybox/ ...] [--format bc1|bc3] [--force]
+    python texcompress.py stats [textures/ skybox/ ...]
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# formato -> (FourCC DDS, bytes por bloque 4x4, enum GL)
+FORMATS = {
+    "bc1": (b"DXT1", 8,  0x83F0),      # GL_COMPRESSED_RGB_S3TC_DXT1_EXT
+    "bc3": (b"DXT5", 16, 0x83F3),      # GL_COMPRESSED_RGBA_S3TC_DXT5_EXT
+}
+SOURCE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp", ".tga")
+
+_BLOCK_CHUNK = 1 << 16      # bloques por pasada del encoder (acota memoria)
+
+DDS_MAGIC = b"DDS "
+DDS_HEADER_DTYPE = np.dtype([
+    ("size", "<u4"), ("flags", "<u4"), ("height", "<u4"), ("width", "<u4"),
+    ("linearSize", "<u4"), ("depth", "<u4"), ("mipMapCount", "<u4"), ("reserved1", "<u4", 11),
+    ("pfSize", "<u4"), ("pfFlags", "<u4"), ("fourCC", "S4"), ("rgbBitCount", "<u4"),
+    ("rMask", "<u4"), ("gMask", "<u4"), ("bMask", "<u4"), ("aMask", "<u4"),
+    ("caps", "<u4"), ("caps2", "<u4"), ("caps3", "<u4"), ("caps4", "<u4"), ("reserved2", "<u4"),
+])
+assert DDS_HEADER_DTYPE.itemsize == 124
+
+_DDSD_FLAGS = 0x1 | 0x2 | 0x4 | 0x1000 | 0x20000 | 0x80000   # CAPS HEIGHT WIDTH PIXELFORMAT MIPMAPCOUNT LINEARSIZE
+_DDPF_FOURCC = 0x4
+_DDSCAPS = 0x1000 | 0x400000 | 0x8                          # TEXTURE MIPMAP COMPLEX
+
+
+class CompressedImage(object):
+    """Contenido de un .dds: formato y, por nivel, (ancho, alto, offset, tamaño) dentro de data"""
+
+    def __init__(self, fmt, width, height, levels, data):
+        self.format = fmt
+        self.width = width
+        self.height = height
+        self.levels = levels
+        self.data = data
+
+    @property
+    def glFormat(self):
+        return FORMATS[self.format][2]
+
+
+def compressed_path(src_path) -> Path:
+    """foo.png -> foo.png.dds (se conserva la extensión original para no mezclar fuentes)"""
+    src = Path(src_path)
+    return src.with_name(src.name + ".dds")
+
+
+def find_compressed(src_path):
+    """Ruta del .dds de `src_path` si existe y no es más viejo que la fuente"""
+    src = Path(src_path)
+    if src.suffix.lower() == ".dds":
+        return src if src.exists() else None
+    dds = compressed_path(src)
+    try:
+        if dds.stat().st_mtime_ns >= src.stat().st_mtime_ns:
+            return dds
+    except OSError:
+        pass
+    return None
+
+
+# -------------------- Lectura / escritura ------------------------
+def read_dds(path):
+    raw = np.fromfile(path, dtype=np.uint8)
+    if len(raw) < 128 or raw[:4].tobytes() != DDS_MAGIC:
+        raise ValueError(f"{path}: no es un DDS")
+    header = raw[4:128].view(DDS_HEADER_DTYPE)[0]
+
+    fourCC = bytes(header["fourCC"])
+    fmt = next((k for k, v in FORMATS.items() if v[0] == fourCC), None)
+    if fmt is None:
+        raise ValueError(f"{path}: formato DDS no soportado ({fourCC!r})")
+    blockBytes = FORMATS[fmt][1]
+
+    w, h = int(header["width"]), int(header["height"])
+    levels, offset = [], 0
+    for _ in range(max(1, int(header["mipMapCount"]))):
+        size = ((w + 3) // 4) * ((h + 3) // 4) * blockBytes
+        levels.append((w, h, offset, size))
+        offset += size
+        w, h = max(1, w // 2), max(1, h // 2)
+
+    data = raw[128:128 + offset]
+    if len(data) < offset:
+        raise ValueError(f"{path}: DDS truncado")
+    return CompressedImage(fmt, int(header["width"]), int(header["height"]), levels, data)
+
+
+def write_dds(path, fmt, mips):
+    """mips: salida de compress_image, [(bloques, alto, ancho)] del nivel 0 al más chico"""
+    fourCC, blockBytes, _ = FORMATS[fmt]
+    h, w = mips[0][1], mips[0][2]
+
+    header = np.zeros((), DDS_HEADER_DTYPE)
+    header["size"] = 124
+    header["flags"] = _DDSD_FLAGS
+    header["width"], header["height"] = w, h
+    header["linearSize"] = len(mips[0][0])
+    header["mipMapCount"] = len(mips)
+    header["pfSize"] = 32
+    header["pfFlags"] = _DDPF_FOURCC
+    header["fourCC"] = fourCC
+    header["caps"] = _DDSCAPS
+
+    path = Path(path)
+    tmp = path.with_suffix(f".tmp{os.getpid()}")
+    with tmp.open("wb") as f:
+        f.write(DDS_MAGIC)
+        f.write(header.tobytes())
+        for blocks, _, _ in mips:
+            f.write(blocks)
+    os.replace(tmp, path)
+    return path
+
+
+# -------------------- Encoder ------------------------
+def compress_image(pixels, fmt="bc1", mipmaps=True):
+    """(alto, ancho, 3|4) uint8 -> lista de (bytes, alto, ancho) por nivel de mip"""
+    img = np.asarray(pixels, np.uint8)
+    if img.shape[2] == 3:
+        img = np.concatenate([img, np.full(img.shape[:2] + (1,), 255, np.uint8)], axis=2)
+
+    levels = []
+    level = img.astype(np.float32)
+    while True:
+        h, w = level.shape[:2]
+        blocks = _to_blocks(np.clip(np.rint(level), 0, 255).astype(np.uint8))
+        levels.append((_encode_blocks(blocks, fmt), h, w))
+        if not mipmaps or (h == 1 and w == 1):
+            break
+        level = _downsample(level)
+    return levels
+
+
+def _downsample(level):
+    """Box filter 2x2 al tamaño de mip de GL (max(1, n // 2)); una fila/columna impar se descarta"""
+    h, w = level.shape[:2]
+    sh, sw = (2 if h > 1 else 1), (2 if w > 1 else 1)
+    level = level[:h // sh * sh, :w // sw * sw]
+    return level.reshape(h // sh, sh, w // sw, sw, -1).mean(axis=(1, 3))
+
+
+def _to_blocks(img):
+    """(h, w, c) -> (bloques, 16, c) en orden de filas de bloques, texels en orden de fila"""
+    h, w, c = img.shape
+    ph, pw = -h % 4, -w % 4
+    if ph or pw:
+        img = np.pad(img, ((0, ph), (0, pw), (0, 0)), mode="edge")
+    H, W = img.shape[:2]
+    return img.reshape(H // 4, 4, W // 4, 4, c).transpose(0, 2, 1, 3, 4).reshape(-1, 16, c)
+
+
+def _encode_blocks(blocks, fmt):
+    out = np.empty((len(blocks), FORMATS[fmt][1]), np.uint8)
+    for s in range(0, len(blocks), _BLOCK_CHUNK):
+        chunk = blocks[s:s + _BLOCK_CHUNK]
+        if fmt == "bc1":
+            out[s:s + len(chunk)] = _encode_bc1(chunk[:, :, :3])
+        else:
+            out[s:s + len(chunk), :8] = _encode_alpha(chunk[:, :, 3])
+            out[s:s + len(chunk), 8:] = _encode_bc1(chunk[:, :, :3])
+    return out.tobytes()
+
+
+def _encode_bc1(rgb):
+    """(B, 16, 3) uint8 -> (B, 8) uint8 en modo 4 colores"""
+    rgb = rgb.astype(np.float32)
+    mean = rgb.mean(axis=1)
+    centered = rgb - mean[:, None]
+
+    # Eje principal por iteración de potencias sobre la covarianza
+    cov = np.einsum("bni,bnj->bij", centered, centered)
+    axis = np.ones((len(rgb), 3), np.float32)
+    for _ in range(4):
+        axis = np.einsum("bij,bj->bi", cov, axis)
+        norm = np.linalg.norm(axis, axis=1, keepdims=True)
+        axis = np.where(norm > 1e-6, axis / np.maximum(norm, 1e-6), 0.57735027)
+
+    proj = np.einsum("bni,bi->bn", centered, axis)
+    hi = np.clip(mean + proj.max(axis=1)[:, None] * axis, 0, 255)
+    lo = np.clip(mean + proj.min(axis=1)[:, None] * axis, 0, 255)
+
+    c0, c1 = _to_565(hi), _to_565(lo)
+    swap = c0 < c1
+    c0, c1 = np.where(swap, c1, c0), np.where(swap, c0, c1)
+
+    p0, p1 = _from_565(c0), _from_565(c1)
+    palette = np.stack([p0, p1, (2 * p0 + p1) / 3, (p0 + 2 * p1) / 3], axis=1)
+    dist = ((rgb[:, :, None, :] - palette[:, None, :, :]) ** 2).sum(axis=3)
+    idx = dist.argmin(axis=2).astype(np.uint32)
+    idx[c0 == c1] = 0           # bloque de un solo color
+
+    bits = (idx << (2 * np.arange(16, dtype=np.uint32))).sum(axis=1, dtype=np.uint32)
+
+    out = np.empty((len(rgb), 8), np.uint8)
+    out[:, 0:2] = c0.astype("<u2").view(np.uint8).reshape(-1, 2)
+    out[:, 2:4] = c1.astype("<u2").view(np.uint8).reshape(-1, 2)
+    out[:, 4:8] = bits.astype("<u4").view(np.uint8).reshape(-1, 4)
+    return out
+
+
+def _encode_alpha(alpha):
+    """(B, 16) uint8 -> (B, 8) uint8 bloque de alfa BC3 en modo 8 valores"""
+    a0 = alpha.max(axis=1).astype(np.float32)
+    a1 = alpha.min(axis=1).astype(np.float32)
+
+    # Códigos 0..7 -> a0, a1, y 6 interpolados de a0 a a1
+    t = np.array([0, 7, 1, 2, 3, 4, 5, 6], np.float32) / 7.0
+    palette = a0[:, None] * (1 - t) + a1[:, None] * t
+    idx = np.abs(alpha[:, :, None].astype(np.float32) - palette[:, None, :]).argmin(axis=2)
+    idx[a0 == a1] = 0
+
+    bits = (idx.astype(np.uint64) << (3 * np.arange(16, dtype=np.uint64))).sum(axis=1, dtype=np.uint64)
+
+    out = np.empty((len(alpha), 8), np.uint8)
+    out[:, 0] = a0.astype(np.uint8)
+    out[:, 1] = a1.astype(np.uint8)
+    out[:, 2:8] = bits.astype("<u8").view(np.uint8).reshape(-1, 8)[:, :6]
+    return out
+
+
+def _to_565(c):
+    r = np.rint(c[:, 0] * 31 / 255).astype(np.uint32)
+    g = np.rint(c[:, 1] * 63 / 255).astype(np.uint32)
+    b = np.rint(c[:, 2] * 31 / 255).astype(np.uint32)
+    return (r << 11) | (g << 5) | b
+
+
+def _from_565(c):
+    r, g, b = (c >> 11) & 31, (c >> 5) & 63, c & 31
+    return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], axis=1).astype(np.float32)
+
+
+# -------------------- CLI ------------------------
+def _load_pixels(path):
+    """Píxeles (alto, ancho, 4) en el mismo orden de filas que usa assets._DecodeImage"""
+    import pygame
+    surf = pygame.image.load(str(path))
+    w, h = surf.get_size()
+    return np.frombuffer(pygame.image.tostring(surf, "RGBA", False), np.uint8).reshape(h, w, 4)
+
+
+def _sources(paths):
+    files = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            files.extend(sorted(f for f in p.rglob("*") if f.suffix.lower() in SOURCE_SUFFIXES))
+        else:
+            files.append(p)
+    return files
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    ap = argparse.ArgumentParser(description="Texturas comprimidas (DDS BC1/BC3)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="comprimir las imágenes indicadas")
+    b.add_argument("paths", nargs="*", default=["textures", "skybox"])
+    b.add_argument("--format", choices=sorted(FORMATS), default="bc1",
+                   help="bc1 (opaco, 4 bpp) o bc3 (con alfa, 8 bpp)")
+    b.add_argument("--no-mips", action="store_true", help="solo el nivel 0")
+    b.add_argument("--force", action="store_true", help="recomprimir aunque el .dds esté al día")
+    s = sub.add_parser("stats", help="tamaño de cada .dds frente a RGBA8 sin comprimir")
+    s.add_argument("paths", nargs="*", default=["textures", "skybox"])
+    args = ap.parse_args(argv)
+
+    for src in _sources(args.paths):
+        dds = compressed_path(src)
+        if args.cmd == "stats":
+            if find_compressed(src) is None:
+                print(f"- {src} (sin .dds)")
+                continue
+            img = read_dds(dds)
+            raw = sum(w * h * 4 for w, h, _, _ in img.levels)
+            print(f"{dds.stat().st_size / 2**20:8.2f} MB  {dds}  {img.format} {img.width}x{img.height} "
+                  f"{len(img.levels)} mips  ({raw / dds.stat().st_size:.1f}x vs RGBA8)")
+            continue
+
+        if not args.force and find_compressed(src) is not None:
+            print(f"= {src} (al día)")
+            continue
+        t = time.perf_counter()
+        mips = compress_image(_load_pixels(src), args.format, mipmaps=not args.no_mips)
+        write_dds(dds, args.format, mips)
+        print(f"✓ {src} -> {dds} ({dds.stat().st_size / 2**20:.2f} MB, {len(mips)} mips, "
+              f"{time.perf_counter() - t:.1f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""
+Texturas compartidas en arrays (GL_TEXTURE_2D_ARRAY).
+
+TextureManager deduplica por ruta y por hash del contenido: dos modelos
+que piden la misma imagen (aunque sea una copia con otro nombre) comparten
+la misma capa. El hash lo calcula el worker del AssetLoader junto con la
+decodificación, no el hilo de render; si resulta ser una copia de una
+imagen ya pedida, el handle nuevo pasa a apuntar al existente y no se sube
+nada. Las imágenes del mismo tamaño y formato se guardan como capas de un
+mismo array, así que el Renderer solo cambia de textura cuando cambia el
+array y por modelo sube un uniform con la capa.
+
+La decodificación y la subida van por el AssetLoader (en segundo plano,
+vía PBO). Hasta que la imagen llega el handle apunta a un array de
+relleno de 1x1.
+
+Cada Acquire suma una referencia al handle y Release la resta; con la
+última se libera la capa para otra imagen. Model suelta las suyas al
+destruirse (weakref.finalize, como el slot de transformaciones).
+
+Los fragment shaders del repo usan `sampler2D uTexture0`;
+TextureArrayFragmentShader() los adapta a `sampler2DArray` + capa.
+"""
+
+import ctypes
+import os
+import re
+
+from OpenGL.GL import *
+from OpenGL.raw.GL.VERSION.GL_1_3 import glCompressedTexSubImage3D as _glCompressedTexSubImage3D
+
+import assets
+import texcompress
+
+
+def TextureArrayFragmentShader(source):
+    """Variante con `sampler2DArray uTexture0` + `uTextureLayer` (sin tocar el resto del shader)"""
+    decl = re.compile(r"uniform\s+sampler2D\s+uTexture0\s*;")
+    if not decl.search(source):
+        return source
+    source = re.sub(r"texture\(\s*uTexture0\s*,", "textureLayer0(", source)
+    return decl.sub("uniform sampler2DArray uTexture0;\n"
+                    "uniform float     uTextureLayer;\n"
+                    "vec4 textureLayer0(vec2 uv) { return texture(uTexture0, vec3(uv, uTextureLayer)); }",
+                    source, count=1)
+
+
+class TextureHandle(object):
+    """Textura compartida: `array` (id GL) y `layer` cambian cuando la imagen termina de subir"""
+
+    def __init__(self, path, placeholder):
+        self.path = path
+        self.digest = None          # sha1 del archivo; llega con la decodificación
+        self.refs = 1
+        self._layer = 0
+        self._ready = False
+        self._page = None
+        self._placeholder = placeholder
+        self._source = None         # handle con el mismo contenido (copia con otro nombre)
+
+    @property
+    def array(self):
+        if self._source is not None:
+            return self._source.array
+        # El id cambia si el TextureArray crece, por eso se consulta cada vez
+        return self._page.texture if self._page is not None else self._placeholder
+
+    @property
+    def layer(self):
+        return self._source.layer if self._source is not None else self._layer
+
+    @property
+    def ready(self):
+        return self._source.ready if self._source is not None else self._ready
+
+    def __repr__(self):
+        return f"TextureHandle({self.path!r}, array={self.array}, layer={self.layer}, ready={self.ready})"
+
+
+class TextureArray(object):
+    """Un GL_TEXTURE_2D_ARRAY de capas iguales (tamaño, formato, mips); crece duplicando"""
+
+    def __init__(self, width, height, internalFormat, levels, capacity=1):
+        self.width, self.height = width, height
+        self.internalFormat = internalFormat
+        self.levels = levels
+        self.capacity = 0
+        self.used = 0
+        self.free = []
+        self.texture = 0
+        self.mipsDirty = False
+        self._Grow(capacity)
+
+    def Allocate(self, maxLayers):
+        """Índice de capa libre, o None si el array ya está al máximo"""
+        if self.free:
+            return self.free.pop()
+        if self.used == self.capacity:
+            if self.capacity >= maxLayers:
+                return None
+            self._Grow(min(2 * self.capacity, maxLayers))
+        self.used += 1
+        return self.used - 1
+
+    def Release(self, layer):
+        self.free.append(layer)
+
+    def Delete(self):
+        if self.texture:
+            glDeleteTextures(1, [self.texture])
+        self.texture = 0
+
+    def _Grow(self, capacity):
+        texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, texture)
+        glTexStorage3D(GL_TEXTURE_2D_ARRAY, self.levels, self.internalFormat,
+                       self.width, self.height, capacity)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_S, GL_REPEAT)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_T, GL_REPEAT)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+
+        # Las capas ya subidas se copian en GPU (GL 4.3)
+        if self.texture and self.used:
+            w, h = self.width, self.height
+            for level in range(self.levels):
+                glCopyImageSubData(self.texture, GL_TEXTURE_2D_ARRAY, level, 0, 0, 0,
+                                   texture, GL_TEXTURE_2D_ARRAY, level, 0, 0, 0, w, h, self.used)
+                w, h = max(1, w // 2), max(1, h // 2)
+            glDeleteTextures(1, [self.texture])
+
+        self.texture = texture
+        self.capacity = capacity
+
+
+class TextureManager(object):
+    def __init__(self, loader=None):
+        self.loader = loader if loader is not None else assets.GetLoader()
+        self.byPath = {}        # ruta absoluta -> TextureHandle
+        self.byHash = {}        # sha1 del archivo -> TextureHandle
+        self.pages = {}         # (ancho, alto, formato, mips) -> [TextureArray]
+        self.stats = {"requests": 0, "path_hits": 0, "hash_hits": 0, "arrays": 0, "layers": 0}
+
+        self.maxLayers = int(glGetIntegerv(GL_MAX_ARRAY_TEXTURE_LAYERS))
+
+        # Relleno gris de 1x1 mientras la imagen real se decodifica
+        self.placeholder = TextureArray(1, 1, GL_RGBA8, 1)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, self.placeholder.texture)
+        glTexSubImage3D(GL_TEXTURE_2D_ARRAY, 0, 0, 0, 0, 1, 1, 1, GL_RGBA, GL_UNSIGNED_BYTE,
+                        assets.PLACEHOLDER_RGBA)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+        self.placeholder.used = 1
+
+    # -------------------- API pública ------------------------
+    def Acquire(self, path):
+        """TextureHandle compartido para `path` (la carga, si hace falta, sigue en segundo plano)"""
+        self.stats["requests"] += 1
+        key = os.path.realpath(path)
+        handle = self.byPath.get(key)
+        if handle is not None:
+            handle.refs += 1
+            self.stats["path_hits"] += 1
+            return handle
+
+        # El hash del contenido se calcula en el worker (ver _Upload)
+        handle = TextureHandle(path, self.placeholder.texture)
+        self.byPath[key] = handle
+        self.loader.LoadImage(path, lambda image, digest: self._Upload(handle, image, digest),
+                              "RGBA", digest=True)
+        return handle
+
+    def Release(self, handle):
+        handle.refs -= 1
+        if handle._source is not None:
+            # Sus referencias se sumaron al handle original
+            self.Release(handle._source)
+            return
+        if handle.refs > 0:
+            return
+        for k in [k for k, h in self.byPath.items() if h is handle]:
+            del self.byPath[k]
+        if self.byHash.get(handle.digest) is handle:
+            del self.byHash[handle.digest]
+        if handle._page is not None:
+            handle._page.Release(handle._layer)
+            self.stats["layers"] -= 1
+        handle._page, handle._layer, handle._ready = None, 0, False
+
+    def Update(self):
+        """Regenera mipmaps de los arrays que recibieron capas nuevas (una vez por frame)"""
+        for pages in self.pages.values():
+            for page in pages:
+                if page.mipsDirty:
+                    glBindTexture(GL_TEXTURE_2D_ARRAY, page.texture)
+                    glGenerateMipmap(GL_TEXTURE_2D_ARRAY)
+                    glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+                    page.mipsDirty = False
+
+    def Clear(self):
+        for pages in self.pages.values():
+            for page in pages:
+                page.Delete()
+        self.pages.clear()
+        self.byPath.clear()
+        self.byHash.clear()
+
+    # -------------------- Interno ------------------------
+    def _Page(self, width, height, internalFormat, levels):
+        """Array con lugar para una capa más: (TextureArray, capa)"""
+        key = (width, height, internalFormat, levels)
+        pages = self.pages.setdefault(key, [])
+        for page in pages:
+            layer = page.Allocate(self.maxLayers)
+            if layer is not None:
+                return page, layer
+        page = TextureArray(width, height, internalFormat, levels)
+        pages.append(page)
+        self.stats["arrays"] += 1
+        return page, page.Allocate(self.maxLayers)
+
+    def _Upload(self, handle, image, digest):
+        """Generador para AssetLoader: copia la imagen a su capa (o reusa la de una copia ya pedida)"""
+        if handle.refs <= 0:
+            return
+        handle.digest = digest
+        original = self.byHash.get(digest)
+        if original is not None:
+            # Mismo contenido con otro nombre: las referencias pasan al original
+            original.refs += handle.refs
+            handle._source = original
+            for k in [k for k, h in self.byPath.items() if h is handle]:
+                self.byPath[k] = original
+            self.stats["hash_hits"] += 1
+            return
+        self.byHash[digest] = handle
+
+        if isinstance(image, texcompress.CompressedImage):
+            page, layer = self._Page(image.width, image.height, image.glFormat, len(image.levels))
+            pbo = yield from assets.StagePBO(image.data)
+            glBindTexture(GL_TEXTURE_2D_ARRAY, page.texture)
+            glBindBuffer(GL_PIXEL_UNPACK_BUFFER, pbo)
+            for level, (w, h, offset, size) in enumerate(image.levels):
+                _glCompressedTexSubImage3D(GL_TEXTURE_2D_ARRAY, level, 0, 0, layer, w, h, 1,
+                                           image.glFormat, size, ctypes.c_void_p(offset))
+        else:
+            w, h, pixels = image
+            levels = max(w, h).bit_length()
+            page, layer = self._Page(w, h, GL_RGBA8, levels)
+            pbo = assets.CreatePBO(len(pixels))
+            yield
+
+            # Cada paso copia una banda al PBO y la sube (nunca la imagen entera)
+            rows = max(1, assets.UPLOAD_BAND_BYTES // (w * 4))
+            for y in range(0, h, rows):
+                band = min(rows, h - y)
+                assets.FillPBO(pbo, pixels, y * w * 4, band * w * 4)
+                glBindTexture(GL_TEXTURE_2D_ARRAY, page.texture)
+                glBindBuffer(GL_PIXEL_UNPACK_BUFFER, pbo)
+                glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+                glTexSubImage3D(GL_TEXTURE_2D_ARRAY, 0, 0, y, layer, w, band, 1,
+                                GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(y * w * 4))
+                glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
+                glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+                glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+                yield
+            page.mipsDirty = True
+
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+        glDeleteBuffers(1, [pbo])
+
+        if handle.refs <= 0:
+            # Lo soltaron mientras subía: la capa vuelve al array
+            page.Release(layer)
+            return
+        handle._page, handle._layer = page, layer
+        handle._ready = True
+        self.stats["layers"] += 1
+
+
+# Manager compartido (se crea con el primer uso, cuando ya hay contexto GL)
+_default_manager = None
+
+
+def GetManager():
+    global _default_manager
+    if _default_manager is None:
+        _default_manager = TextureManager()
+    return _default_manager
+
+
+def ReleaseHandles(handles):
+    """Suelta los handles pedidos con Acquire al manager compartido (finalizador de Model)"""
+    if _default_manager is not None:
+        for handle in handles:
+            _default_manager.Release(handle)
+    handles.clear()
@@ -0,0 +1,252 @@
+"""
+Composición vectorizada de matrices de modelo con NumPy.
+
+Misma convención que Model.GetModelMatrix: M = T * Rz * Ry * Rx * S con
+la rotación en grados. Las funciones trabajan sobre N transformaciones a
+la vez y devuelven matrices (N,4,4) en orden matemático (fila, columna);
+para subirlas a GL usar ToColumnMajor().
+
+TransformStore guarda las transformaciones de todos los Model en arrays
+y solo recompone las que cambiaron (dirty flags). También guarda el
+volumen local de cada slot (AABB + esfera) para culling.py.
+"""
+
+import glm
+import numpy as np
+
+
+def ComposeModelMatrices(positions, rotations, scales, out=None):
+    """(N,3) posición, (N,3) rotación en grados, (N,3) escala -> (N,4,4) float32"""
+    positions = np.asarray(positions, np.float32).reshape(-1, 3)
+    rot = np.radians(np.asarray(rotations, np.float32).reshape(-1, 3))
+    scales = np.asarray(scales, np.float32).reshape(-1, 3)
+
+    cx, cy, cz = np.cos(rot).T
+    sx, sy, sz = np.sin(rot).T
+
+    if out is None:
+        out = np.empty((len(positions), 4, 4), np.float32)
+
+    # R = Rz * Ry * Rx
+    out[:, 0, 0] = cz * cy
+    out[:, 0, 1] = cz * sy * sx - sz * cx
+    out[:, 0, 2] = cz * sy * cx + sz * sx
+    out[:, 1, 0] = sz * cy
+    out[:, 1, 1] = sz * sy * sx + cz * cx
+    out[:, 1, 2] = sz * sy * cx - cz * sx
+    out[:, 2, 0] = -sy
+    out[:, 2, 1] = cy * sx
+    out[:, 2, 2] = cy * cx
+
+    # * S escala columnas, T va en la última columna
+    out[:, :3, :3] *= scales[:, None, :]
+    out[:, :3, 3] = positions
+    out[:, 3, :3] = 0.0
+    out[:, 3, 3] = 1.0
+    return out
+
+
+def ToColumnMajor(matrices):
+    """(N,4,4) fila-columna -> (N,16) float32 contiguo en el orden que espera GL"""
+    return np.ascontiguousarray(np.asarray(matrices, np.float32).transpose(0, 2, 1)).reshape(-1, 16)
+
+
+def GlmToNumpy(m):
+    """glm.mat4 -> (4,4) float32 en orden (fila, columna)"""
+    return np.array(m.to_list(), np.float32).T
+
+
+def NormalMatrices(matrices, out=None):
+    """(N,4,4) -> (N,3,3) inversa transpuesta del bloque 3x3 (vía cofactores, sin np.linalg.inv)"""
+    m = np.asarray(matrices, np.float32)[:, :3, :3]
+    c0, c1, c2 = m[:, :, 0], m[:, :, 1], m[:, :, 2]
+
+    if out is None:
+        out = np.empty((len(m), 3, 3), np.float32)
+    # Cofactores: columnas = productos cruz de las otras dos columnas
+    out[:, :, 0] = np.cross(c1, c2)
+    out[:, :, 1] = np.cross(c2, c0)
+    out[:, :, 2] = np.cross(c0, c1)
+
+    det = np.einsum("ij,ij->i", c0, out[:, :, 0])
+    det[det == 0.0] = 1.0               # escala 0: se deja el cofactor
+    out /= det[:, None, None]
+    return out
+
+
+# ------------------------------------------------------------
+# Store de transformaciones de la escena
+# ------------------------------------------------------------
+class TransformStore(object):
+    """
+    Posición / rotación (grados) / escala de todos los modelos en arrays
+    (structure of arrays). Cada Model ocupa un slot; escribir sus
+    transformaciones solo marca el slot como sucio y Update() recompone
+    de una vez, vectorizado, las matrices de los slots que cambiaron.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.count = 0          # slots usados (incluye libres intermedios)
+        self._free = []
+        self._lastView = None
+
+        self.stats = {"recomputed": 0, "view_recomputed": 0}
+        self._Allocate(capacity)
+
+    # -------------------- Slots ------------------------
+    def Allocate(self, position=(0.0, 0.0, 0.0), rotation=(0.0, 0.0, 0.0), scale=(1.0, 1.0, 1.0)):
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self.count == len(self.positions):
+                self._Allocate(2 * len(self.positions))
+            slot = self.count
+            self.count += 1
+
+        self.positions[slot] = position
+        self.rotations[slot] = rotation
+        self.scales[slot]    = scale
+        self.alive[slot] = True
+        self.dirty[slot] = True
+        self.boundsRadius[slot] = np.inf    # sin volumen hasta SetBounds: nunca se descarta
+        return slot
+
+    def Free(self, slot):
+        self.alive[slot] = False
+        self.dirty[slot] = False
+        # Quien guarda estado por slot (lod.LODSelector) lo reinicia al ver otra generación
+        self.generations[slot] += 1
+        self._free.append(slot)
+
+    def SetBounds(self, slot, bbMin, bbMax):
+        """AABB local del slot (espacio de modelo); la esfera envolvente sale de ella"""
+        bbMin = np.asarray(bbMin, np.float32)
+        bbMax = np.asarray(bbMax, np.float32)
+        self.boundsCenter[slot] = (bbMin + bbMax) * 0.5
+        self.boundsExtent[slot] = (bbMax - bbMin) * 0.5
+        self.boundsRadius[slot] = np.linalg.norm(self.boundsExtent[slot], axis=-1)
+        self.versions[slot] += 1            # las consultas espaciales (bvh.py) refitean por versión
+
+    def MarkDirty(self, slot=None):
+        """Un slot, o todos si slot es None (tras escribir los arrays directamente)"""
+        if slot is None:
+            self.dirty[:self.count] = self.alive[:self.count]
+        else:
+            self.dirty[slot] = True
+
+    def View(self, slot, kind):
+        """glm.vec3 que también escribe en el store: kind = 'positions' | 'rotations' | 'scales'"""
+        return Vec3View(self, kind, slot)
+
+    def Write(self, kind, slot, value):
+        getattr(self, kind)[slot] = (value[0], value[1], value[2])
+        self.dirty[slot] = True
+
+    # -------------------- Matrices ------------------------
+    def Update(self, viewMatrix=None):
+        """Recompone las matrices sucias; con viewMatrix también model-view y normal matrix"""
+        n = self.count
+        idx = np.flatnonzero(self.dirty[:n])
+        if len(idx):
+            self.matrices[idx] = ComposeModelMatrices(self.positions[idx], self.rotations[idx],
+                                                      self.scales[idx])
+            self.versions[idx] += 1
+            self.viewDirty[idx] = True
+            self.dirty[idx] = False
+            self.stats["recomputed"] += len(idx)
+
+        if viewMatrix is not None:
+            view = GlmToNumpy(viewMatrix)
+            if self._lastView is None or not np.array_equal(view, self._lastView):
+                # Cámara nueva: cambian todas las model-view
+                self.viewDirty[:n] = self.alive[:n]
+                self._lastView = view
+            vidx = np.flatnonzero(self.viewDirty[:n])
+            if len(vidx):
+                self.modelView[vidx] = np.matmul(view, self.matrices[vidx])
+                self.normalMatrices[vidx] = NormalMatrices(self.modelView[vidx])
+                self.viewDirty[vidx] = False
+                self.stats["view_recomputed"] += len(vidx)
+        return len(idx)
+
+    def ResetStats(self):
+        for k in self.stats:
+            self.stats[k] = 0
+
+    # -------------------- Interno ------------------------
+    def _Allocate(self, capacity):
+        """(Re)asigna los arrays conservando los primeros `count` slots"""
+        old = getattr(self, "positions", None)
+        n = self.count
+
+        def grow(name, shape, fill):
+            arr = np.empty((capacity,) + shape, fill.dtype if hasattr(fill, "dtype") else np.float32)
+            arr[...] = fill
+            if old is not None:
+                arr[:n] = getattr(self, name)[:n]
+            setattr(self, name, arr)
+
+        eye = np.eye(4, dtype=np.float32)
+        grow("positions", (3,), np.float32(0.0))
+        grow("rotations", (3,), np.float32(0.0))
+        grow("scales",    (3,), np.float32(1.0))
+        grow("matrices",  (4, 4), eye)
+        grow("modelView", (4, 4), eye)
+        grow("normalMatrices", (3, 3), eye[:3, :3])
+        grow("dirty",     (), np.bool_(False))
+        grow("viewDirty", (), np.bool_(False))
+        grow("alive",     (), np.bool_(False))
+        grow("versions",  (), np.int64(0))
+        grow("generations", (), np.int64(0))
+        grow("boundsCenter", (3,), np.float32(0.0))
+        grow("boundsExtent", (3,), np.float32(0.0))
+        grow("boundsRadius", (),   np.float32(np.inf))
+
+
+class Vec3View(glm.vec3):
+    """
+    glm.vec3 con los valores de una fila del TransformStore (se pasa tal
+    cual a glm.translate, glm.length, etc.). Lo que se escribe en la vista
+    -- componentes, swizzles, índices u operadores in-place -- también va
+    al store y marca el slot como sucio. Es una copia del momento en que se
+    leyó: model.position devuelve una vista nueva en cada acceso.
+    """
+
+    def __init__(self, store, kind, slot):
+        row = getattr(store, kind)[slot]
+        super().__init__(float(row[0]), float(row[1]), float(row[2]))
+        self.__dict__.update(_store=store, _kind=kind, _slot=slot)
+
+    def ToGlm(self):
+        return glm.vec3(self)
+
+    def __copy__(self):
+        return glm.vec3(self)
+
+    def __deepcopy__(self, memo):
+        return glm.vec3(self)
+
+    def __repr__(self):
+        return f"Vec3View{tuple(self)}"
+
+    # ---- Escrituras: también al store ----
+    def __setattr__(self, name, value):
+        glm.vec3.__setattr__(self, name, value)
+        self._Sync()
+
+    def __setitem__(self, i, value):
+        glm.vec3.__setitem__(self, i, value)
+        self._Sync()
+
+    def __iadd__(self, other):     return self._Sync(glm.vec3.__iadd__(self, other))
+    def __isub__(self, other):     return self._Sync(glm.vec3.__isub__(self, other))
+    def __imul__(self, other):     return self._Sync(glm.vec3.__imul__(self, other))
+    def __itruediv__(self, other): return self._Sync(glm.vec3.__itruediv__(self, other))
+
+    def _Sync(self, result=None):
+        self._store.Write(self._kind, self._slot, self)
+        return self
+
+
+# Store por defecto compartido por todos los Model
+scene_transforms = TransformStore()
@@ -1,13 +1,13 @@
+from framedata import frame_uniforms
+
 vertex_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 layout (location=0) in vec3 inPosition;
 layout (location=1) in vec2 inTexCoord;
 layout (location=2) in vec3 inNormal;
 
 uniform mat4 modelMatrix;
-uniform mat4 viewMatrix;
-uniform mat4 projectionMatrix;
 
 out VS_OUT {
     vec2 uv;
@@ -26,15 +26,12 @@ void main() {
 
 water_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 layout (location=0) in vec3 inPosition;
 layout (location=1) in vec2 inTexCoord;
 layout (location=2) in vec3 inNormal;
 
 uniform mat4 modelMatrix;
-uniform mat4 viewMatrix;
-uniform mat4 projectionMatrix;
-uniform float uTime;
 
 out VS_OUT {
     vec2 uv;
@@ -61,15 +58,12 @@ void main() {
 
 twist_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 layout (location=0) in vec3 inPosition;
 layout (location=1) in vec2 inTexCoord;
 layout (location=2) in vec3 inNormal;
 
 uniform mat4 modelMatrix;
-uniform mat4 viewMatrix;
-uniform mat4 projectionMatrix;
-uniform float uTime;
 
 out VS_OUT {
     vec2 uv;
@@ -101,15 +95,12 @@ void main() {
 
 pulse_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 layout (location=0) in vec3 inPosition;
 layout (location=1) in vec2 inTexCoord;
 layout (location=2) in vec3 inNormal;
 
 uniform mat4 modelMatrix;
-uniform mat4 viewMatrix;
-uniform mat4 projectionMatrix;
-uniform float uTime;
 
 out VS_OUT {
     vec2 uv;
@@ -134,15 +125,12 @@ void main() {
 
 explode_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 layout (location=0) in vec3 inPosition;
 layout (location=1) in vec2 inTexCoord;
 layout (location=2) in vec3 inNormal;
 
 uniform mat4 modelMatrix;
-uniform mat4 viewMatrix;
-uniform mat4 projectionMatrix;
-uniform float uTime;
 
 out VS_OUT {
     vec2 uv;
@@ -166,15 +154,12 @@ void main() {
 
 jelly_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 layout (location=0) in vec3 inPosition;
 layout (location=1) in vec2 inTexCoord;
 layout (location=2) in vec3 inNormal;
 
 uniform mat4 modelMatrix;
-uniform mat4 viewMatrix;
-uniform mat4 projectionMatrix;
-uniform float uTime;
 
 out VS_OUT {
     vec2 uv;
@@ -201,15 +186,12 @@ void main() {
 
 spike_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 layout (location=0) in vec3 inPosition;
 layout (location=1) in vec2 inTexCoord;
 layout (location=2) in vec3 inNormal;
 
 uniform mat4 modelMatrix;
-uniform mat4 viewMatrix;
-uniform mat4 projectionMatrix;
-uniform float uTime;
 
 out VS_OUT {
     vec2 uv;
@@ -243,15 +225,12 @@ void main() {
 
 melt_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 layout (location=0) in vec3 inPosition;
 layout (location=1) in vec2 inTexCoord;
 layout (location=2) in vec3 inNormal;
 
 uniform mat4 modelMatrix;
-uniform mat4 viewMatrix;
-uniform mat4 projectionMatrix;
-uniform float uTime;
 
 out VS_OUT {
     vec2 uv;
@@ -276,15 +255,12 @@ void main() {
 
 fat_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 layout (location=0) in vec3 inPosition;
 layout (location=1) in vec2 inTexCoord;
 layout (location=2) in vec3 inNormal;
 
 uniform mat4 modelMatrix;
-uniform mat4 viewMatrix;
-uniform mat4 projectionMatrix;
-uniform float uTime;
 
 out VS_OUT {
     vec2 uv;
@@ -306,15 +282,12 @@ void main() {
 
 glitch_vertex_shader = """
 #version 330 core
-
+""" + frame_uniforms + """
 layout (location=0) in vec3 inPosition;
 layout (location=1) in vec2 inTexCoord;
 layout (location=2) in vec3 inNormal;
 
 uniform mat4 modelMatrix;
-uniform mat4 viewMatrix;
-uniform mat4 projectionMatrix;
-uniform float uTime;
 
 out VS_OUT {
     vec2 uv;
@@ -341,4 +314,19 @@ void main() {
     vout.uv = inTexCoord;
     gl_Position = projectionMatrix * viewMatrix * wpos;
 }
-"""
\ No newline at end of file
+"""
+
+
+# Efectos del selector (RendererOpenGL2025.py) y de preview.py, en orden de tecla
+vertex_shaders = [
+    ("Default", vertex_shader),
+    ("Water", water_shader),
+    ("Twist", twist_shader),
+    ("Pulse", pulse_shader),
+    ("Explode", explode_shader),
+    ("Jelly", jelly_shader),
+    ("Spikes", spike_shader),
+    ("Melt", melt_shader),
+    ("Fat", fat_shader),
+    ("Glitch", glitch_vertex_shader),
+]
@@ -0,0 +1,125 @@
+"""
+Formato de vértice compacto (opcional: Model(..., compact=True)).
+
+    posición  3 x int16 normalizado (+ relleno)   8 B   relativo a la AABB del modelo
+    uv        2 x half float                       4 B
+    normal    GL_INT_2_10_10_10_REV normalizado    4 B
+
+16 bytes por vértice en lugar de 32 (P T N en float32). Las locations
+0/1/2 no cambian y UV y normal llegan al shader ya como vec2 / vec3. La
+posición llega en [-1, 1]: CompactVertexShader() renombra el atributo y
+define `inPosition` como `inPositionQ * uPositionScale + uPositionBias`,
+con uniforms que por defecto valen (1, 0), así que el mismo programa
+dibuja modelos compactos y en float32 (el Renderer sube escala y centro
+de cada modelo; con float32 la cuenta es exacta).
+"""
+
+import re
+
+import numpy as np
+from OpenGL.GL import GL_FLOAT, GL_HALF_FLOAT, GL_INT_2_10_10_10_REV, GL_SHORT
+
+_POSITION_DECL = re.compile(r"layout\s*\(\s*location\s*=\s*0\s*\)\s*in\s+vec3\s+inPosition\s*;")
+
+_SNORM16 = 32767.0
+_SNORM10 = 511.0
+
+
+def CompactVertexShader(source):
+    """Variante que decodifica la posición cuantizada (sin tocar el resto del shader)"""
+    if not _POSITION_DECL.search(source):
+        return source
+    return _POSITION_DECL.sub("layout (location=0) in vec3 inPositionQ;\n"
+                              "uniform vec3 uPositionScale = vec3(1.0);\n"
+                              "uniform vec3 uPositionBias  = vec3(0.0);\n"
+                              "#define inPosition (inPositionQ * uPositionScale + uPositionBias)",
+                              source, count=1)
+
+
+class CompactVertices(object):
+    """Vértices empaquetados + cómo ligarlos (attributes) + escala/centro de la posición"""
+
+    def __init__(self, data, attributes, stride, scale, bias, report):
+        self.data = data                # array estructurado listo para glBufferData
+        self.attributes = attributes    # [(location, componentes, tipo GL, normalizado, offset)]
+        self.stride = stride
+        self.scale = scale
+        self.bias = bias
+        self.report = report
+
+
+def PackCompact(vertices, stride, has_uv, has_normals, bbox_min, bbox_max):
+    """Vértices float32 P [T] [N] (layout de Model.PackObj) -> CompactVertices"""
+    verts = np.asarray(vertices, np.float32).reshape(-1, stride)
+    positions = verts[:, :3]
+
+    fields = [("position", "<i2", 4)]
+    if has_uv:
+        fields.append(("uv", "<f2", 2))
+    if has_normals:
+        fields.append(("normal", "<u4"))
+    dtype = np.dtype(fields)
+    packed = np.zeros(len(verts), dtype)
+
+    # Posición: [-1, 1] dentro de la AABB (eje plano -> escala 1, queda en el centro)
+    lo, hi = np.asarray(bbox_min, np.float32), np.asarray(bbox_max, np.float32)
+    bias = (lo + hi) * 0.5
+    scale = np.where(hi - lo > 1e-12, (hi - lo) * 0.5, 1.0).astype(np.float32)
+    q = np.clip(np.rint((positions - bias) / scale * _SNORM16), -_SNORM16, _SNORM16)
+    packed["position"][:, :3] = q
+    decoded = np.maximum(q / _SNORM16, -1.0) * scale + bias
+
+    attributes = [(0, 3, GL_SHORT, True, dtype.fields["position"][1])]
+    report = {"bytes_before": stride * 4, "bytes_after": dtype.itemsize,
+              "position_error": float(np.abs(decoded - positions).max(initial=0.0)),
+              "position_error_rel": float(np.abs(decoded - positions).max(initial=0.0) /
+                                          max(float(np.linalg.norm(hi - lo)), 1e-12)),
+              "uv_error": 0.0, "normal_error_deg": 0.0}
+
+    offset = 3
+    if has_uv:
+        uvs = verts[:, offset:offset + 2]
+        packed["uv"] = uvs
+        report["uv_error"] = float(np.abs(packed["uv"].astype(np.float32) - uvs).max(initial=0.0))
+        attributes.append((1, 2, GL_HALF_FLOAT, False, dtype.fields["uv"][1]))
+        offset += 2
+    if has_normals:
+        normals = verts[:, offset:offset + 3]
+        packed["normal"], back = _PackSnorm10(normals)
+        report["normal_error_deg"] = float(_MaxAngle(normals, back))
+        attributes.append((2, 4, GL_INT_2_10_10_10_REV, True, dtype.fields["normal"][1]))
+
+    return CompactVertices(packed, attributes, dtype.itemsize, scale, bias, report)
+
+
+def FloatAttributes(stride, has_uv, has_normals):
+    """Layout float32 de siempre (P [T] [N]) con el mismo formato que CompactVertices.attributes"""
+    attributes = [(0, 3, GL_FLOAT, False, 0)]
+    offset = 3 * 4
+    if has_uv:
+        attributes.append((1, 2, GL_FLOAT, False, offset))
+        offset += 2 * 4
+    if has_normals:
+        attributes.append((2, 3, GL_FLOAT, False, offset))
+    return attributes
+
+
+def FormatReport(report):
+    return (f"{report['bytes_before']} -> {report['bytes_after']} B/vértice, error máx: "
+            f"posición {report['position_error']:.1e} ({report['position_error_rel'] * 100:.4f}% de la diagonal), "
+            f"normal {report['normal_error_deg']:.2f}°, uv {report['uv_error']:.1e}")
+
+
+def _PackSnorm10(normals):
+    """(N,3) -> uint32 con x | y << 10 | z << 20 (10 bits con signo, w = 0) y su decodificación"""
+    q = np.clip(np.rint(np.asarray(normals, np.float32) * _SNORM10), -_SNORM10, _SNORM10).astype(np.int32)
+    bits = (q & 0x3FF).astype(np.uint32)
+    packed = bits[:, 0] | (bits[:, 1] << 10) | (bits[:, 2] << 20)
+    return packed, q / _SNORM10
+
+
+def _MaxAngle(a, b):
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    cos = np.clip((a * b).sum(axis=1), -1.0, 1.0)
+    return np.degrees(np.arccos(cos)).max(initial=0.0)